@@ -5,19 +5,53 @@ structured JSON dataset that can be fed into downstream LLM workflows.
 """
 from __future__ import annotations
 
+import argparse
+import asyncio
+import bisect
+import contextlib
+import contextvars
+import cProfile
+import functools
+import hashlib
+import heapq
 import html
 import json
+import math
+import multiprocessing
+import os
+import pstats
+import random
 import re
+import sqlite3
+import struct
+import sys
+import threading
 import time
 import unicodedata
+from array import array
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    MutableMapping,
+    Optional,
+    Tuple,
+    Union,
+)
+from urllib.parse import urlsplit
 
 import csv
 import requests
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
-from bs4.element import NavigableString, Tag
+from bs4.element import Tag
 
 BASE_URL = "https://netnutrition.cbord.com/nn-prod/Duke"
 ITEM_PANEL_ENDPOINT = f"{BASE_URL}/Unit/SelectUnitFromUnitsList"
@@ -32,9 +66,46 @@ EXCLUDED_UNIT_NAMES = {
 }
 JSON_OUTPUT_PATH = Path.home() / "Desktop" / "duke_netnutrition.json"
 CSV_OUTPUT_PATH = Path.home() / "Desktop" / "duke_netnutrition_items.csv"
+PARQUET_OUTPUT_PATH = Path.home() / "Desktop" / "duke_netnutrition_items.parquet"
+ARROW_OUTPUT_PATH = Path.home() / "Desktop" / "duke_netnutrition_items.arrow"
+MEALS_CSV_OUTPUT_PATH = Path.home() / "Desktop" / "duke_meals_compact.csv"
+NUTRIENT_MATRIX_PATH = Path.home() / "Desktop" / "duke_nutrients.npz"
+INGREDIENT_INDEX_PATH = Path.home() / "Desktop" / "duke_meals_ingredients.bin"
+MACRO_INDEX_PATH = Path.home() / "Desktop" / "duke_meals_macros.json"
+SEARCH_INDEX_PATH = Path.home() / "Desktop" / "duke_meals_search.json"
+MEAL_INDEX_PATH = Path.home() / "Desktop" / "duke_meals_index.json"
+MEAL_TABLE_PATH = Path.home() / "Desktop" / "duke_meals_compact.bin"
+MEAL_SECTIONS_PATH = (
+    Path(__file__).resolve().parent.parent / "public" / "duke_meals_compact.csv"
+)
+NDJSON_OUTPUT_PATH = Path.home() / "Desktop" / "duke_netnutrition_items.ndjson"
+DELTA_OUTPUT_PATH = Path.home() / "Desktop" / "duke_netnutrition_delta.json"
+METRICS_JSON_PATH = Path.home() / "Desktop" / "duke_netnutrition_metrics.json"
+METRICS_PROM_PATH = Path.home() / "Desktop" / "duke_netnutrition_metrics.prom"
+PROFILE_DIR = Path.home() / "Desktop" / "duke_netnutrition_profile"
+JOURNAL_PATH = Path.home() / "Desktop" / "duke_netnutrition.journal.ndjson"
+DEFAULT_CHECKPOINT_EVERY = 1
+LABEL_CACHE_PATH = Path.home() / "Desktop" / "duke_netnutrition_labels.sqlite"
+DEFAULT_MAX_LABEL_AGE_HOURS = 24.0
+DEFAULT_LABEL_CACHE_MAX_MB = 64.0
+RESPONSE_CACHE_PATH = Path.home() / "Desktop" / "duke_netnutrition_responses.sqlite"
+PARSED_RETENTION_DAYS = 30
+PARSE_CACHE_VERSION = 1
 REQUEST_TIMEOUT = 30
 LABEL_DELAY_SECONDS = 0.1
 MAX_RETRIES = 3
+DEFAULT_PANEL_RATE = 5.0
+DEFAULT_PANEL_BURST = 5
+DEFAULT_LABEL_RATE = 1 / LABEL_DELAY_SECONDS
+DEFAULT_LABEL_BURST = 5
+DEFAULT_CONCURRENCY = 8
+DEFAULT_PER_HOST_CONCURRENCY = 4
+REQUEST_LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+PARSE_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+METRICS_PREFIX = "aurora_crawl"
+PROFILERS = ("auto", "cprofile", "pyinstrument")
+PROFILE_MIN_SECONDS = 1e-6
+PROFILE_TOP_FUNCTIONS = 25
 
 SESSION_HEADERS = {
     "User-Agent": (
@@ -53,6 +124,180 @@ AJAX_HEADERS = {
 AMOUNT_PATTERN = re.compile(r"([0-9]+(?:\.[0-9]+)?)\s*([a-zA-Zµ]+)?")
 CATEGORY_ID_PATTERN = re.compile(r"toggleCourseItems\([^,]+,\s*(\d+)\)")
 DETAIL_ID_PATTERN = re.compile(r"(\d+)")
+JSON_CELL_ENCODER = json.JSONEncoder(ensure_ascii=False)
+DIETARY_FLAGS = (
+    "milk",
+    "eggs",
+    "fish",
+    "shellfish",
+    "tree_nuts",
+    "peanuts",
+    "wheat",
+    "soy",
+    "sesame",
+    "gluten",
+    "alcohol",
+    "pork",
+    "vegan",
+    "vegetarian",
+    "gluten_free",
+    "halal",
+    "kosher",
+    "organic",
+    "locally_grown",
+)
+DIETARY_FLAG_BITS = {flag: 1 << bit for bit, flag in enumerate(DIETARY_FLAGS)}
+DIETARY_FLAG_ALIASES = {
+    "dairy": "milk",
+    "egg": "eggs",
+    "shell fish": "shellfish",
+    "crustacean shellfish": "shellfish",
+    "tree nut": "tree_nuts",
+    "nuts": "tree_nuts",
+    "peanut": "peanuts",
+    "soybeans": "soy",
+    "soybean": "soy",
+    "plant based": "vegan",
+    "avoiding gluten": "gluten_free",
+    "made without gluten": "gluten_free",
+    "local": "locally_grown",
+}
+DIETARY_LABEL_PREFIX = re.compile(r"^(?:contains|made with) ")
+INGREDIENT_INDEX_MAGIC = b"HINGR2\x00\x00"
+INGREDIENT_INDEX_HEADER = struct.Struct("<8sIIII")
+INGREDIENT_STOPWORDS = frozenset(
+    "a and as contains for from in less of or than the to with".split()
+)
+INGREDIENT_IRREGULAR_FORMS = {
+    "halves": "half",
+    "leaves": "leaf",
+    "loaves": "loaf",
+    "molasses": "molasses",
+}
+MEAL_TABLE_MAGIC = b"HMEALS1\x00"
+MEAL_TABLE_HEADER = struct.Struct("<8sIII")
+MEAL_ROW_STRUCT = struct.Struct("<7I6f")
+MEAL_STRING_FIELDS = (
+    "location",
+    "meal_section",
+    "category",
+    "item_name",
+    "serving_size",
+    "ingredients",
+    "name_key",
+)
+MEAL_MACRO_FIELDS = ("calories", "fat_g", "carb_g", "protein_g", "sugar_g", "sodium_mg")
+MEAL_MACRO_SOURCES = (
+    ("fat_g", ("total_fat",), "g"),
+    ("carb_g", ("total_carbohydrate", "total_carbohydrates"), "g"),
+    ("protein_g", ("protein",), "g"),
+    ("sugar_g", ("total_sugars", "sugars"), "g"),
+    ("sodium_mg", ("sodium", "total_sodium"), "mg"),
+)
+MEALS_CSV_FIELDNAMES = (
+    "location",
+    "meal_section",
+    "category",
+    "item_name",
+    "serving_size",
+    "ingredients",
+) + MEAL_MACRO_FIELDS
+DEFAULT_MEAL_SECTION = "Any"
+MEAL_SECTION_KEYWORDS = (
+    ("breakfast", "Breakfast"),
+    ("brunch", "Breakfast"),
+    ("lunch", "Lunch"),
+    ("dinner", "Dinner"),
+    ("late night", "Snack"),
+)
+NAME_INDEX_VERSION = 1
+SEARCH_INDEX_VERSION = 2
+MACRO_INDEX_VERSION = 2
+BM25_K1 = 1.2
+BM25_B = 0.75
+DEFAULT_SEARCH_LIMIT = 20
+NAME_BENCHMARK_SIZES = (1_000, 10_000, 100_000)
+NAME_BENCHMARK_QUERIES = 200
+NAME_BENCHMARK_WORDS = (
+    "grilled roasted crispy spicy vegan chicken tofu salmon beef turkey "
+    "rice bowl wrap salad burger taco pasta soup sandwich pizza bagel "
+    "cheddar pesto teriyaki buffalo honey garlic lemon herb chipotle"
+).split()
+MASS_UNIT_GRAMS = {"g": 1.0, "mg": 1e-3, "mcg": 1e-6, "µg": 1e-6, "ug": 1e-6}
+COLUMNAR_FIELDS = (
+    "unit_id",
+    "unit_name",
+    "category_id",
+    "category_title",
+    "category_guidance",
+    "item_detail_id",
+    "item_name",
+    "description",
+    "allergens",
+    "allergen_mask",
+    "serving_display",
+    "serving_choices",
+    "calories",
+    "calories_raw",
+    "serving_size",
+    "servings_per_container",
+    "ingredients_raw",
+    "ingredients",
+)
+CSV_FIELDNAMES = (
+    "unit_id",
+    "unit_name",
+    "category_id",
+    "category_title",
+    "category_guidance",
+    "item_detail_id",
+    "item_name",
+    "description",
+    "allergens",
+    "serving_display",
+    "serving_choices",
+    "calories",
+    "calories_raw",
+    "serving_size",
+    "servings_per_container",
+    "ingredients_raw",
+    "ingredients_list",
+    "nutrients",
+)
+SYMBOL_CATEGORY_FIELDS = ("title", "selection_guidance", "raw_title")
+SYMBOL_NUTRIENT_FIELDS = ("key", "label", "unit", "daily_value_raw")
+DESCRIPTION_CLASS_PATTERN = re.compile("description", re.I)
+PARSER_BACKENDS = ("html.parser", "lxml", "selectolax")
+PARSER_BACKEND = "html.parser"
+LABEL_FAST_PATH = True
+LABEL_TOKEN_PATTERN = re.compile(
+    r"""<(/?)([a-zA-Z][a-zA-Z0-9:-]*)((?:[^>"']|"[^"]*"|'[^']*')*)>"""
+    r"""|<!--.*?-->|<!(?!--)[^>]*>|<\?[^>]*>|([^<]+)|(<)""",
+    re.S,
+)
+CLASS_ATTR_PATTERN = re.compile(
+    r"""(?:^|\s)class\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'=<>`]+))""", re.I
+)
+LABEL_BLOCK_CLASSES = {"cbo_nn_LabelBorderedSubHeader", "cbo_nn_LabelNoBorderSubHeader"}
+LABEL_CONTEXT_CLASSES = ("cbo_nn_LabelBottomBorderLabel", "cbo_nn_LabelSubHeader")
+LABEL_RAW_TEXT_TAGS = {"script", "style"}
+LABEL_VOID_TAGS = {
+    "area",
+    "base",
+    "br",
+    "col",
+    "embed",
+    "hr",
+    "img",
+    "input",
+    "link",
+    "meta",
+    "param",
+    "source",
+    "track",
+    "wbr",
+}
+CORPUS_DIR: Optional[Path] = None
 
 
 def normalize_name(value: str) -> str:
@@ -68,23 +313,728 @@ def normalize_name(value: str) -> str:
 EXCLUDED_UNIT_TOKENS = {normalize_name(name) for name in EXCLUDED_UNIT_NAMES}
 
 
+class TokenBucket:
+    def __init__(
+        self, rate: float, burst: int, clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        self.rate = rate
+        self.capacity = float(max(1, burst))
+        self.tokens = self.capacity
+        self.clock = clock
+        self.updated = clock()
+        self.lock = threading.Lock()
+
+    def reserve(self) -> float:
+        if self.rate <= 0:
+            return 0.0
+        with self.lock:
+            now = self.clock()
+            self.tokens = min(
+                self.capacity, self.tokens + (now - self.updated) * self.rate
+            )
+            self.updated = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def acquire(self) -> None:
+        delay = self.reserve()
+        if delay:
+            time.sleep(delay)
+
+    async def acquire_async(self) -> None:
+        delay = self.reserve()
+        if delay:
+            await asyncio.sleep(delay)
+
+
+RATE_LIMITERS: Dict[str, TokenBucket] = {
+    ITEM_PANEL_ENDPOINT: TokenBucket(DEFAULT_PANEL_RATE, DEFAULT_PANEL_BURST),
+    LABEL_ENDPOINT: TokenBucket(DEFAULT_LABEL_RATE, DEFAULT_LABEL_BURST),
+}
+
+
+def configure_rate_limits(limits: Dict[str, Tuple[float, int]]) -> None:
+    for url, (rate, burst) in limits.items():
+        RATE_LIMITERS[url] = TokenBucket(rate, burst)
+
+
+class SqliteStore:
+    def __init__(
+        self, path: Path, schema: Iterable[str], commit_every: int = 100
+    ) -> None:
+        self.path = path
+        self.commit_every = commit_every
+        self.uncommitted = 0
+        self.lock = threading.Lock()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(path), check_same_thread=False)
+        for statement in schema:
+            self.conn.execute(statement)
+        self.conn.commit()
+
+    def mark_dirty(self) -> None:
+        self.uncommitted += 1
+        if self.uncommitted >= self.commit_every:
+            self.conn.commit()
+            self.uncommitted = 0
+
+    def close(self) -> None:
+        with self.lock:
+            self.conn.commit()
+            self.conn.close()
+
+
+def content_hash(body: Any) -> str:
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    return hashlib.sha256(body).hexdigest()
+
+
+class ResponseCache(SqliteStore):
+    def __init__(self, path: Path) -> None:
+        super().__init__(
+            path,
+            (
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, body BLOB NOT NULL, encoding TEXT, "
+                "etag TEXT, last_modified TEXT, content_hash TEXT NOT NULL, "
+                "stored_at REAL NOT NULL)",
+                "CREATE TABLE IF NOT EXISTS parsed ("
+                "content_hash TEXT NOT NULL, kind TEXT NOT NULL, body TEXT NOT NULL, "
+                "used_at REAL NOT NULL, PRIMARY KEY (content_hash, kind))",
+            ),
+        )
+
+    @staticmethod
+    def request_key(method: str, url: str, kwargs: Dict[str, Any]) -> str:
+        payload = {
+            key: kwargs.get(key) for key in ("params", "data") if kwargs.get(key)
+        }
+        return f"{method.upper()} {url} {json.dumps(payload, sort_keys=True)}"
+
+    def validators(self, key: str) -> Dict[str, str]:
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT etag, last_modified FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return {}
+        headers: Dict[str, str] = {}
+        if row[0]:
+            headers["If-None-Match"] = row[0]
+        if row[1]:
+            headers["If-Modified-Since"] = row[1]
+        return headers
+
+    def revalidated(self, key: str, resp: requests.Response) -> requests.Response:
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT body, encoding FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return resp
+            self.conn.execute(
+                "UPDATE responses SET stored_at = ? WHERE key = ?", (time.time(), key)
+            )
+            self.mark_dirty()
+        resp._content = row[0]
+        resp.encoding = row[1]
+        return resp
+
+    def store(self, key: str, resp: requests.Response) -> None:
+        etag = resp.headers.get("ETag")
+        last_modified = resp.headers.get("Last-Modified")
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(key, body, encoding, etag, last_modified, content_hash, stored_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    resp.content,
+                    resp.encoding,
+                    etag,
+                    last_modified,
+                    content_hash(resp.content),
+                    time.time(),
+                ),
+            )
+            self.mark_dirty()
+
+    def parsed(self, digest: str, kind: str) -> Optional[Any]:
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT body FROM parsed WHERE content_hash = ? AND kind = ?",
+                (digest, kind),
+            ).fetchone()
+            if row is None:
+                return None
+            self.conn.execute(
+                "UPDATE parsed SET used_at = ? WHERE content_hash = ? AND kind = ?",
+                (time.time(), digest, kind),
+            )
+            self.mark_dirty()
+        return json.loads(row[0])
+
+    def store_parsed(self, digest: str, kind: str, value: Any) -> None:
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO parsed (content_hash, kind, body, used_at) "
+                "VALUES (?, ?, ?, ?)",
+                (digest, kind, json.dumps(value, ensure_ascii=False), time.time()),
+            )
+            self.mark_dirty()
+
+    def close(self) -> None:
+        with self.lock:
+            self.conn.execute(
+                "DELETE FROM parsed WHERE used_at < ?",
+                (time.time() - PARSED_RETENTION_DAYS * 86400,),
+            )
+        super().close()
+
+
+RESPONSE_CACHE: Optional[ResponseCache] = None
+CURRENT_UNIT: contextvars.ContextVar[Optional[int]] = contextvars.ContextVar(
+    "current_unit", default=None
+)
+
+
+class Histogram:
+    __slots__ = ("bounds", "counts", "total")
+
+    def __init__(self, bounds: Tuple[float, ...]) -> None:
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0.0
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.total += value
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        running = 0
+        buckets: List[Tuple[str, int]] = []
+        for bound, count in zip(self.bounds + (math.inf,), self.counts):
+            running += count
+            buckets.append(("+Inf" if bound == math.inf else repr(bound), running))
+        return buckets
+
+    def quantile(self, q: float) -> Optional[float]:
+        target = q * self.count
+        if not target:
+            return None
+        running = 0
+        for bound, count in zip(self.bounds, self.counts):
+            running += count
+            if running >= target:
+                return bound
+        return None
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum": round(self.total, 6),
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "buckets": dict(self.cumulative()),
+        }
+
+
+class EndpointStats:
+    __slots__ = ("requests", "failures", "retries", "not_modified", "bytes", "latency")
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.failures = 0
+        self.retries = 0
+        self.not_modified = 0
+        self.bytes = 0
+        self.latency = Histogram(REQUEST_LATENCY_BUCKETS)
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "failures": self.failures,
+            "retries": self.retries,
+            "not_modified": self.not_modified,
+            "bytes": self.bytes,
+            "latency_seconds": self.latency.to_json(),
+        }
+
+
+class CrawlMetrics:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.started = time.perf_counter()
+        self.endpoints: Dict[str, EndpointStats] = {}
+        self.parses: Dict[str, Histogram] = {}
+        self.unit_parse_seconds: Dict[int, float] = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def endpoint(self, url: str) -> EndpointStats:
+        name = urlsplit(url).path.rstrip("/").rsplit("/", 1)[-1] or "root"
+        stats = self.endpoints.get(name)
+        if stats is None:
+            stats = self.endpoints[name] = EndpointStats()
+        return stats
+
+    def observe_request(
+        self, url: str, seconds: float, resp: Optional[requests.Response], retry: bool
+    ) -> None:
+        with self.lock:
+            stats = self.endpoint(url)
+            stats.requests += 1
+            stats.retries += retry
+            stats.latency.observe(seconds)
+            if resp is None:
+                stats.failures += 1
+                return
+            stats.failures += resp.status_code >= 400
+            stats.bytes += len(resp.content)
+            stats.not_modified += resp.status_code == 304
+
+    def observe_cache(self, hit: bool) -> None:
+        with self.lock:
+            if hit:
+                self.cache_hits += 1
+            else:
+                self.cache_misses += 1
+
+    def observe_parse(self, kind: str, seconds: float) -> None:
+        unit_id = CURRENT_UNIT.get()
+        with self.lock:
+            histogram = self.parses.get(kind)
+            if histogram is None:
+                histogram = self.parses[kind] = Histogram(PARSE_LATENCY_BUCKETS)
+            histogram.observe(seconds)
+            if unit_id is not None:
+                self.unit_parse_seconds[unit_id] = (
+                    self.unit_parse_seconds.get(unit_id, 0.0) + seconds
+                )
+
+    def cache_hit_rate(self) -> Optional[float]:
+        lookups = self.cache_hits + self.cache_misses
+        return round(self.cache_hits / lookups, 4) if lookups else None
+
+    def summary(self, extra: Dict[str, Any]) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "generated_at": datetime.now(timezone.utc).isoformat(),
+                "wall_seconds": round(time.perf_counter() - self.started, 3),
+                **extra,
+                "endpoints": {
+                    name: stats.to_json()
+                    for name, stats in sorted(self.endpoints.items())
+                },
+                "nutrition_cache": {
+                    "hits": self.cache_hits,
+                    "misses": self.cache_misses,
+                    "hit_rate": self.cache_hit_rate(),
+                },
+                "parse_seconds": {
+                    kind: histogram.to_json()
+                    for kind, histogram in sorted(self.parses.items())
+                },
+                "unit_parse_seconds": {
+                    str(unit_id): round(seconds, 6)
+                    for unit_id, seconds in self.unit_parse_seconds.items()
+                },
+            }
+
+    def prometheus(self, extra: Dict[str, Any]) -> str:
+        lines: List[str] = []
+
+        def metric(name: str, kind: str, help_text: str) -> str:
+            full = f"{METRICS_PREFIX}_{name}"
+            lines.append(f"# HELP {full} {help_text}")
+            lines.append(f"# TYPE {full} {kind}")
+            return full
+
+        def histogram(name: str, label: str, value: str, data: Histogram) -> None:
+            for bound, count in data.cumulative():
+                lines.append(f'{name}_bucket{{{label}="{value}",le="{bound}"}} {count}')
+            lines.append(f'{name}_sum{{{label}="{value}"}} {data.total:.6f}')
+            lines.append(f'{name}_count{{{label}="{value}"}} {data.count}')
+
+        with self.lock:
+            endpoints = sorted(self.endpoints.items())
+            name = metric(
+                "request_duration_seconds", "histogram", "HTTP request latency."
+            )
+            for endpoint, stats in endpoints:
+                histogram(name, "endpoint", endpoint, stats.latency)
+            for field, help_text in (
+                ("requests", "HTTP requests sent, including retries."),
+                ("failures", "HTTP requests that raised or returned status >= 400."),
+                ("retries", "HTTP requests that were retries."),
+                ("not_modified", "HTTP requests answered with 304."),
+                ("bytes", "Response body bytes received."),
+            ):
+                name = metric(f"{field}_total", "counter", help_text)
+                for endpoint, stats in endpoints:
+                    lines.append(
+                        f'{name}{{endpoint="{endpoint}"}} {getattr(stats, field)}'
+                    )
+            name = metric(
+                "nutrition_cache_lookups_total", "counter", "nutrition_cache lookups."
+            )
+            lines.append(f'{name}{{result="hit"}} {self.cache_hits}')
+            lines.append(f'{name}{{result="miss"}} {self.cache_misses}')
+            name = metric("parse_duration_seconds", "histogram", "Markup parse time.")
+            for kind, data in sorted(self.parses.items()):
+                histogram(name, "kind", kind, data)
+            name = metric(
+                "unit_parse_seconds", "gauge", "Parse time attributed to each unit."
+            )
+            for unit_id, seconds in self.unit_parse_seconds.items():
+                lines.append(f'{name}{{unit_id="{unit_id}"}} {seconds:.6f}')
+            name = metric("wall_seconds", "gauge", "Crawl wall-clock time.")
+            lines.append(f"{name} {time.perf_counter() - self.started:.3f}")
+            for key, value in extra.items():
+                gauge = key[: -len("_total")] if key.endswith("_total") else key
+                name = metric(gauge, "gauge", f"{gauge.capitalize()} in this crawl.")
+                lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    def write(
+        self,
+        json_path: Optional[Path],
+        prom_path: Optional[Path],
+        extra: Dict[str, Any],
+    ) -> None:
+        if json_path is not None:
+            json_path.parent.mkdir(parents=True, exist_ok=True)
+            json_path.write_text(json.dumps(self.summary(extra), indent=2))
+        if prom_path is not None:
+            prom_path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = prom_path.with_name(prom_path.name + ".tmp")
+            temp_path.write_text(self.prometheus(extra))
+            os.replace(temp_path, prom_path)
+
+
+METRICS: Optional[CrawlMetrics] = None
+
+
+class StageTimers:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.stages: Dict[str, List[float]] = {}
+
+    def observe(self, stage: str, seconds: float) -> None:
+        with self.lock:
+            stats = self.stages.get(stage)
+            if stats is None:
+                stats = self.stages[stage] = [0, 0.0, 0.0]
+            stats[0] += 1
+            stats[1] += seconds
+            stats[2] = max(stats[2], seconds)
+
+    def to_json(self) -> Dict[str, Dict[str, float]]:
+        with self.lock:
+            return {
+                stage: {
+                    "calls": int(calls),
+                    "total_seconds": round(total, 6),
+                    "mean_seconds": round(total / calls, 6),
+                    "max_seconds": round(longest, 6),
+                }
+                for stage, (calls, total, longest) in self.stages.items()
+            }
+
+    def report(self) -> str:
+        lines = [
+            f"{'stage':<24}{'calls':>8}{'total s':>12}{'mean ms':>12}{'max ms':>12}"
+        ]
+        for stage, stats in sorted(
+            self.to_json().items(), key=lambda entry: -entry[1]["total_seconds"]
+        ):
+            lines.append(
+                f"{stage:<24}{stats['calls']:>8}{stats['total_seconds']:>12.3f}"
+                f"{stats['mean_seconds'] * 1000:>12.2f}"
+                f"{stats['max_seconds'] * 1000:>12.2f}"
+            )
+        return "\n".join(lines)
+
+
+STAGE_TIMERS: Optional[StageTimers] = None
+
+
+@contextlib.contextmanager
+def stage_timer(stage: str) -> Iterator[None]:
+    timers = STAGE_TIMERS
+    if timers is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timers.observe(stage, time.perf_counter() - started)
+
+
+def timed_stage(func: Callable[..., Any]) -> Callable[..., Any]:
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        if STAGE_TIMERS is None:
+            return func(*args, **kwargs)
+        with stage_timer(func.__name__):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+def timed_parse(kind: str, markup: str, parser: Callable[[str], Any]) -> Any:
+    if METRICS is None:
+        return parser(markup)
+    started = time.perf_counter()
+    value = parser(markup)
+    METRICS.observe_parse(kind, time.perf_counter() - started)
+    return value
+
+
+def parse_cache_entry(kind: str, markup: str) -> Optional[Tuple[str, str]]:
+    if RESPONSE_CACHE is None:
+        return None
+    return content_hash(markup), f"{kind}:v{PARSE_CACHE_VERSION}"
+
+
+def parse_with_cache(kind: str, markup: str, parser: Callable[[str], Any]) -> Any:
+    entry = parse_cache_entry(kind, markup)
+    if entry and RESPONSE_CACHE is not None:
+        cached = RESPONSE_CACHE.parsed(*entry)
+        if cached is not None:
+            return intern_parsed(kind, cached)
+    value = timed_parse(kind, markup, parser)
+    if entry and RESPONSE_CACHE is not None:
+        RESPONSE_CACHE.store_parsed(*entry, value)
+    return value
+
+
 def request_with_retry(
-    session: requests.Session, method: str, url: str, **kwargs: Any
+    session: requests.Session,
+    method: str,
+    url: str,
+    throttle: bool = True,
+    **kwargs: Any,
 ) -> requests.Response:
+    limiter = RATE_LIMITERS.get(url)
+    cache = RESPONSE_CACHE
+    cache_key = None
+    if cache is not None:
+        cache_key = cache.request_key(method, url, kwargs)
+        validators = cache.validators(cache_key)
+        if validators:
+            kwargs["headers"] = {**(kwargs.get("headers") or {}), **validators}
     for attempt in range(1, MAX_RETRIES + 1):
+        if limiter and (throttle or attempt > 1):
+            limiter.acquire()
+        started = time.perf_counter()
+        resp = None
         try:
             resp = session.request(method, url, timeout=REQUEST_TIMEOUT, **kwargs)
+            if METRICS is not None:
+                METRICS.observe_request(
+                    url, time.perf_counter() - started, resp, attempt > 1
+                )
             resp.raise_for_status()
+            if cache is not None and cache_key is not None:
+                if resp.status_code == 304:
+                    return cache.revalidated(cache_key, resp)
+                cache.store(cache_key, resp)
             return resp
         except requests.RequestException:
+            if METRICS is not None and resp is None:
+                METRICS.observe_request(
+                    url, time.perf_counter() - started, None, attempt > 1
+                )
             if attempt == MAX_RETRIES:
                 raise
             time.sleep(1.5 * attempt)
     raise RuntimeError("request_with_retry exhausted retries")
 
 
+class LexborDocument:
+    def __init__(self, markup: str) -> None:
+        from selectolax.lexbor import LexborHTMLParser
+
+        self.tree = LexborHTMLParser(markup)
+        self.wrappers: Dict[int, LexborNode] = {}
+
+    def wrap(self, node: Any) -> "LexborNode":
+        wrapper = self.wrappers.get(node.mem_id)
+        if wrapper is None:
+            wrapper = self.wrappers[node.mem_id] = LexborNode(node, self)
+        return wrapper
+
+
+class LexborNode:
+    __slots__ = ("node", "document")
+
+    def __init__(self, node: Any, document: LexborDocument) -> None:
+        self.node = node
+        self.document = document
+
+    @property
+    def name(self) -> str:
+        return self.node.tag
+
+    @property
+    def children(self) -> Iterator[Union[str, "LexborNode"]]:
+        for child in self.node.iter(include_text=True):
+            if child.is_text_node:
+                yield child.text_content or ""
+            elif child.is_comment_node:
+                yield child.comment_content or ""
+            else:
+                yield self.document.wrap(child)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        attributes = self.node.attributes
+        if key not in attributes:
+            return default
+        value = attributes[key] or ""
+        return value.split() if key == "class" else value
+
+    def has_attr(self, key: str) -> bool:
+        return key in self.node.attributes
+
+    def __getitem__(self, key: str) -> Any:
+        if not self.has_attr(key):
+            raise KeyError(key)
+        return self.get(key)
+
+    def get_text(self, separator: str = "", strip: bool = False) -> str:
+        parts = [
+            node.text_content or ""
+            for node in self.node.traverse(include_text=True)
+            if node.is_text_node
+        ]
+        if strip:
+            parts = [part.strip() for part in parts if part.strip()]
+        return separator.join(parts)
+
+    def select(self, selector: str) -> List["LexborNode"]:
+        seen = {self.node.mem_id}
+        matches: List[LexborNode] = []
+        for node in self.node.css(selector):
+            if node.mem_id in seen:
+                continue
+            seen.add(node.mem_id)
+            matches.append(self.document.wrap(node))
+        return matches
+
+    def select_one(self, selector: str) -> Optional["LexborNode"]:
+        matches = self.select(selector)
+        return matches[0] if matches else None
+
+    def find_all(self, name: str) -> List["LexborNode"]:
+        return self.select(name)
+
+    def find(self, name: str) -> Optional["LexborNode"]:
+        return self.select_one(name)
+
+    def find_parent(self, name: str) -> Optional["LexborNode"]:
+        node = self.node.parent
+        while node is not None:
+            if node.tag == name:
+                return self.document.wrap(node)
+            node = node.parent
+        return None
+
+
+HtmlNode = Union[Tag, LexborNode]
+
+
+def configure_parser(backend: str) -> None:
+    global PARSER_BACKEND
+    if backend not in PARSER_BACKENDS:
+        raise ValueError(f"unknown parser backend {backend!r}")
+    if backend == "lxml":
+        import lxml  # noqa: F401
+    elif backend == "selectolax":
+        import selectolax.lexbor  # noqa: F401
+    PARSER_BACKEND = backend
+
+
+def available_parsers() -> List[str]:
+    backends: List[str] = []
+    for backend in PARSER_BACKENDS:
+        previous = PARSER_BACKEND
+        try:
+            configure_parser(backend)
+        except ImportError:
+            continue
+        finally:
+            configure_parser(previous)
+        backends.append(backend)
+    return backends
+
+
+def make_soup(markup: str, backend: Optional[str] = None) -> HtmlNode:
+    backend = backend or PARSER_BACKEND
+    if backend == "selectolax":
+        document = LexborDocument(markup)
+        return document.wrap(document.tree.root)
+    return BeautifulSoup(markup, backend)
+
+
+def record_corpus(name: str, markup: str) -> None:
+    if CORPUS_DIR is None:
+        return
+    CORPUS_DIR.mkdir(parents=True, exist_ok=True)
+    (CORPUS_DIR / f"{name}.html").write_text(markup, encoding="utf-8")
+
+
+def check_parser_parity(corpus_dir: Path) -> int:
+    parsers: Dict[str, Callable[[str], Any]] = {
+        "homepage": extract_units,
+        "panel": parse_unit_structure,
+        "label": parse_nutrition_label_soup,
+    }
+    backends = available_parsers()
+    previous = PARSER_BACKEND
+    checked = mismatches = 0
+    try:
+        for path in sorted(corpus_dir.glob("*.html")):
+            parser = parsers.get(path.stem.split("_", 1)[0])
+            if parser is None:
+                continue
+            markup = path.read_text(encoding="utf-8")
+            configure_parser("html.parser")
+            expected = parser(markup)
+            for backend in backends[1:]:
+                configure_parser(backend)
+                if parser(markup) != expected:
+                    mismatches += 1
+                    print(f"{path.name}: {backend} differs from html.parser")
+            if parser is parse_nutrition_label_soup:
+                fast = parse_nutrition_label_fast(markup)
+                if fast is not None and fast != expected:
+                    mismatches += 1
+                    print(f"{path.name}: fast label path differs from html.parser")
+            checked += 1
+    finally:
+        configure_parser(previous)
+    if not checked:
+        print(f"No homepage, panel or label pages found in {corpus_dir}")
+        return 1
+    print(
+        f"Checked {checked} pages with {', '.join(backends)}: "
+        f"{mismatches} mismatches"
+    )
+    return 1 if mismatches else 0
+
+
 def extract_units(markup: str) -> List[Dict[str, Any]]:
-    soup = BeautifulSoup(markup, "html.parser")
+    soup = make_soup(markup)
     units: List[Dict[str, Any]] = []
     seen_ids: set[int] = set()
     for anchor in soup.select("[data-unitoid]"):
@@ -105,27 +1055,48 @@ def extract_units(markup: str) -> List[Dict[str, Any]]:
     return units
 
 
-def fetch_unit_panel(session: requests.Session, unit_id: int) -> str:
+@timed_stage
+def fetch_unit_panel(
+    session: requests.Session, unit_id: int, throttle: bool = True
+) -> str:
     resp = request_with_retry(
         session,
         "post",
         ITEM_PANEL_ENDPOINT,
+        throttle=throttle,
         data={"unitOid": unit_id},
         headers=AJAX_HEADERS,
     )
     payload = resp.json()
     for panel in payload.get("panels", []):
         if panel.get("id") == "itemPanel":
-            return html.unescape(panel.get("html", ""))
+            markup = html.unescape(panel.get("html", ""))
+            record_corpus(f"panel_{unit_id}", markup)
+            return markup
     return ""
 
 
+@timed_stage
 def parse_unit_panel(
     html_fragment: str,
     session: requests.Session,
-    nutrition_cache: Dict[int, Dict[str, Any]],
+    nutrition_cache: MutableMapping[int, Dict[str, Any]],
+    previous: Optional["PreviousDataset"] = None,
 ) -> List[Dict[str, Any]]:
-    soup = BeautifulSoup(html_fragment, "html.parser")
+    categories = parse_with_cache("unit_panel", html_fragment, parse_unit_structure)
+    if previous is not None:
+        previous.attach_known_nutrition(categories)
+    for item in iter_category_items(categories):
+        if item.get("detail_id") and "nutrition" not in item:
+            item["nutrition"] = fetch_nutrition(
+                item["detail_id"], session, nutrition_cache
+            )
+    return categories
+
+
+@timed_stage
+def parse_unit_structure(html_fragment: str) -> List[Dict[str, Any]]:
+    soup = make_soup(html_fragment)
     categories: List[Dict[str, Any]] = []
     category_lookup: Dict[str, Dict[str, Any]] = {}
     tables = [
@@ -149,13 +1120,20 @@ def parse_unit_panel(
                 )
                 if not cat:
                     continue
-                item = build_item(row, session, nutrition_cache)
+                item = build_item(row)
                 if item:
                     cat["items"].append(item)
     return [cat for cat in categories if cat["items"]]
 
 
-def build_category(row: Tag) -> Dict[str, Any]:
+def iter_category_items(
+    categories: List[Dict[str, Any]]
+) -> Iterable[Dict[str, Any]]:
+    for category in categories:
+        yield from category["items"]
+
+
+def build_category(row: HtmlNode) -> Dict[str, Any]:
     text = row.get_text(" ", strip=True)
     category_id = None
     onclick = row.get("onclick") or ""
@@ -170,18 +1148,14 @@ def build_category(row: Tag) -> Dict[str, Any]:
         name = text[:idx].strip()
     return {
         "category_id": category_id,
-        "title": name,
-        "selection_guidance": guidance,
-        "raw_title": text,
+        "title": sys.intern(name),
+        "selection_guidance": intern_text(guidance),
+        "raw_title": sys.intern(text),
         "items": [],
     }
 
 
-def build_item(
-    row: Tag,
-    session: requests.Session,
-    nutrition_cache: Dict[int, Dict[str, Any]],
-) -> Optional[Dict[str, Any]]:
+def build_item(row: HtmlNode) -> Optional[Dict[str, Any]]:
     cells = [
         cell for cell in row.find_all("td") if cell.find_parent("tr") is row
     ]
@@ -204,20 +1178,24 @@ def build_item(
         ),
         "serving_choices": parse_serving_choices(servings_cell),
     }
-    item = {k: v for k, v in item.items() if v not in (None, [], "")}
-    if detail_id:
-        item["nutrition"] = fetch_nutrition(detail_id, session, nutrition_cache)
-    return item
+    return {k: v for k, v in item.items() if v not in (None, [], "")}
 
 
-def extract_detail_id(action_cell: Tag, name_cell: Tag) -> Optional[int]:
-    button = action_cell.find(attrs={"data-detailoid": True})
+def extract_detail_id(action_cell: HtmlNode, name_cell: HtmlNode) -> Optional[int]:
+    button = action_cell.select_one("[data-detailoid]")
     if button and button.get("data-detailoid"):
         try:
             return int(button["data-detailoid"])
         except ValueError:
             pass
-    anchor = name_cell.find("a", id=DETAIL_ID_PATTERN)
+    anchor = next(
+        (
+            link
+            for link in name_cell.select("a[id]")
+            if DETAIL_ID_PATTERN.search(link["id"])
+        ),
+        None,
+    )
     if anchor and anchor.get("id"):
         match = DETAIL_ID_PATTERN.search(anchor["id"])
         if match:
@@ -225,17 +1203,17 @@ def extract_detail_id(action_cell: Tag, name_cell: Tag) -> Optional[int]:
     return None
 
 
-def extract_item_name(cell: Tag) -> Optional[str]:
-    anchor = cell.find("a", class_="cbo_nn_itemHover")
+def extract_item_name(cell: HtmlNode) -> Optional[str]:
+    anchor = cell.select_one("a.cbo_nn_itemHover")
     if not anchor:
         return cell.get_text(" ", strip=True) or None
     parts: List[str] = []
     for child in anchor.children:
-        if isinstance(child, NavigableString):
+        if isinstance(child, str):
             text = str(child).strip()
             if text:
                 parts.append(text)
-        elif isinstance(child, Tag):
+        else:
             if child.name == "span":
                 continue
             text = child.get_text(" ", strip=True)
@@ -246,24 +1224,31 @@ def extract_item_name(cell: Tag) -> Optional[str]:
     return anchor.get_text(" ", strip=True) or None
 
 
-def extract_description(cell: Tag) -> Optional[str]:
-    desc = cell.find("div", class_=re.compile("description", re.I)) or cell.find("small")
+def extract_description(cell: HtmlNode) -> Optional[str]:
+    desc = next(
+        (
+            div
+            for div in cell.select("div[class]")
+            if DESCRIPTION_CLASS_PATTERN.search(" ".join(div.get("class")))
+        ),
+        None,
+    ) or cell.find("small")
     if desc:
         text = desc.get_text(" ", strip=True)
         return text or None
     return None
 
 
-def extract_allergens(cell: Tag) -> List[str]:
+def extract_allergens(cell: HtmlNode) -> List[str]:
     labels: List[str] = []
     for img in cell.find_all("img"):
         label = (img.get("title") or img.get("alt") or "").strip()
         if label and label not in labels:
-            labels.append(label)
+            labels.append(sys.intern(label))
     return labels
 
 
-def parse_serving_choices(cell: Optional[Tag]) -> Optional[Dict[str, Any]]:
+def parse_serving_choices(cell: Optional[HtmlNode]) -> Optional[Dict[str, Any]]:
     if not cell:
         return None
     select = cell.find("select")
@@ -285,28 +1270,178 @@ def parse_serving_choices(cell: Optional[Tag]) -> Optional[Dict[str, Any]]:
     return {"type": "select", "options": options} if options else None
 
 
+class LabelCache(SqliteStore, MutableMapping[int, Dict[str, Any]]):
+    def __init__(
+        self,
+        path: Path,
+        max_age: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+    ) -> None:
+        super().__init__(
+            path,
+            (
+                "CREATE TABLE IF NOT EXISTS labels ("
+                "detail_id INTEGER PRIMARY KEY, body TEXT NOT NULL, "
+                "size INTEGER NOT NULL, fetched_at REAL NOT NULL, "
+                "accessed_at REAL NOT NULL)",
+                "CREATE INDEX IF NOT EXISTS labels_accessed_at "
+                "ON labels (accessed_at)",
+            ),
+        )
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self.memory: Dict[int, Dict[str, Any]] = {}
+        self.evict()
+
+    def oldest_fresh(self) -> float:
+        return time.time() - self.max_age if self.max_age else 0.0
+
+    def __getitem__(self, detail_id: int) -> Dict[str, Any]:
+        if detail_id in self.memory:
+            return self.memory[detail_id]
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT body FROM labels WHERE detail_id = ? AND fetched_at >= ?",
+                (detail_id, self.oldest_fresh()),
+            ).fetchone()
+            if row is None:
+                raise KeyError(detail_id)
+            self.conn.execute(
+                "UPDATE labels SET accessed_at = ? WHERE detail_id = ?",
+                (time.time(), detail_id),
+            )
+            self.mark_dirty()
+        data = self.memory[detail_id] = intern_label(json.loads(row[0]))
+        return data
+
+    def __contains__(self, detail_id: object) -> bool:
+        if detail_id in self.memory:
+            return True
+        try:
+            self[detail_id]  # type: ignore[index]
+        except KeyError:
+            return False
+        return True
+
+    def __setitem__(self, detail_id: int, data: Dict[str, Any]) -> None:
+        self.store(detail_id, data, time.time())
+
+    def store(self, detail_id: int, data: Dict[str, Any], fetched_at: float) -> None:
+        if fetched_at >= self.oldest_fresh():
+            self.memory[detail_id] = data
+        else:
+            self.memory.pop(detail_id, None)
+        body = json.dumps(data, ensure_ascii=False)
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO labels "
+                "(detail_id, body, size, fetched_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (detail_id, body, len(body.encode("utf-8")), fetched_at, time.time()),
+            )
+            self.mark_dirty()
+
+    def __delitem__(self, detail_id: int) -> None:
+        self.memory.pop(detail_id, None)
+        with self.lock:
+            deleted = self.conn.execute(
+                "DELETE FROM labels WHERE detail_id = ?", (detail_id,)
+            ).rowcount
+            self.mark_dirty()
+        if not deleted:
+            raise KeyError(detail_id)
+
+    def __iter__(self) -> Iterator[int]:
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT detail_id FROM labels WHERE fetched_at >= ?",
+                (self.oldest_fresh(),),
+            ).fetchall()
+        return iter([row[0] for row in rows])
+
+    def __len__(self) -> int:
+        with self.lock:
+            return self.conn.execute(
+                "SELECT COUNT(*) FROM labels WHERE fetched_at >= ?",
+                (self.oldest_fresh(),),
+            ).fetchone()[0]
+
+    def evict(self) -> None:
+        with self.lock:
+            if self.max_age:
+                self.conn.execute(
+                    "DELETE FROM labels WHERE fetched_at < ?", (self.oldest_fresh(),)
+                )
+            if self.max_bytes is not None:
+                total = self.conn.execute(
+                    "SELECT COALESCE(SUM(size), 0) FROM labels"
+                ).fetchone()[0]
+                if total > self.max_bytes:
+                    rows = self.conn.execute(
+                        "SELECT detail_id, size FROM labels ORDER BY accessed_at"
+                    ).fetchall()
+                    stale: List[Tuple[int]] = []
+                    for detail_id, size in rows:
+                        if total <= self.max_bytes:
+                            break
+                        stale.append((detail_id,))
+                        total -= size
+                    self.conn.executemany(
+                        "DELETE FROM labels WHERE detail_id = ?", stale
+                    )
+            self.conn.commit()
+            self.uncommitted = 0
+
+    def close(self) -> None:
+        self.evict()
+        super().close()
+
+
+@timed_stage
 def fetch_nutrition(
     detail_id: int,
     session: requests.Session,
-    nutrition_cache: Dict[int, Dict[str, Any]],
+    nutrition_cache: MutableMapping[int, Dict[str, Any]],
+    throttle: bool = True,
 ) -> Dict[str, Any]:
-    if detail_id in nutrition_cache:
+    hit = detail_id in nutrition_cache
+    if METRICS is not None:
+        METRICS.observe_cache(hit)
+    if hit:
         return nutrition_cache[detail_id]
+    markup = fetch_label_markup(session, detail_id, throttle)
+    data = parse_with_cache("nutrition_label", markup, parse_nutrition_label)
+    nutrition_cache[detail_id] = data
+    return data
+
+
+@timed_stage
+def fetch_label_markup(
+    session: requests.Session, detail_id: int, throttle: bool = True
+) -> str:
     resp = request_with_retry(
         session,
         "post",
         LABEL_ENDPOINT,
+        throttle=throttle,
         data={"detailOid": detail_id},
         headers=AJAX_HEADERS,
     )
-    data = parse_nutrition_label(resp.text)
-    nutrition_cache[detail_id] = data
-    time.sleep(LABEL_DELAY_SECONDS)
-    return data
+    record_corpus(f"label_{detail_id}", resp.text)
+    return resp.text
 
 
+@timed_stage
 def parse_nutrition_label(markup: str) -> Dict[str, Any]:
-    soup = BeautifulSoup(markup, "html.parser")
+    if LABEL_FAST_PATH:
+        data = parse_nutrition_label_fast(markup)
+        if data is not None:
+            return data
+    return parse_nutrition_label_soup(markup)
+
+
+def parse_nutrition_label_soup(markup: str) -> Dict[str, Any]:
+    soup = make_soup(markup)
     header = soup.select_one(".cbo_nn_LabelHeader")
     servings_span = soup.select_one(".cbo_nn_LabelBottomBorderLabel span")
     serving_size = soup.select_one(
@@ -314,27 +1449,49 @@ def parse_nutrition_label(markup: str) -> Dict[str, Any]:
     )
     calories = soup.select_one(".cbo_nn_LabelSubHeader .inline-div-right")
     ingredients_block = soup.select_one(".cbo_nn_Label_IngredientsTable")
+    return build_label(
+        header.get_text(" ", strip=True) if header else None,
+        servings_span.get_text() if servings_span else None,
+        serving_size.get_text() if serving_size else None,
+        calories.get_text() if calories else None,
+        parse_nutrient_rows(soup),
+        ingredients_block.get_text(" ", strip=True) if ingredients_block else None,
+    )
+
+
+def build_label(
+    label_name: Optional[str],
+    servings_text: Optional[str],
+    serving_size_text: Optional[str],
+    calories_text: Optional[str],
+    nutrients: List[Dict[str, Any]],
+    ingredients_text: Optional[str],
+) -> Dict[str, Any]:
     ingredients_raw = None
     ingredients_list: Optional[List[str]] = None
-    if ingredients_block:
+    if ingredients_text is not None:
         ingredients_raw = re.sub(
-            r"^Ingredients:\s*", "", ingredients_block.get_text(" ", strip=True), flags=re.I
+            r"^Ingredients:\s*", "", ingredients_text, flags=re.I
         ).strip()
         if ingredients_raw:
             ingredients_list = [
                 token.strip() for token in re.split(r",\s*", ingredients_raw) if token.strip()
             ] or None
     return {
-        "label_name": header.get_text(" ", strip=True) if header else None,
+        "label_name": label_name,
         "servings_per_container": (
-            normalize_space(servings_span.get_text()) if servings_span else None
+            normalize_space(servings_text) if servings_text is not None else None
         ),
         "serving_size": (
-            normalize_space(serving_size.get_text()) if serving_size else None
+            normalize_space(serving_size_text)
+            if serving_size_text is not None
+            else None
         ),
-        "calories": parse_int(calories.get_text()) if calories else None,
-        "calories_raw": normalize_space(calories.get_text()) if calories else None,
-        "nutrients": parse_nutrient_rows(soup),
+        "calories": parse_int(calories_text) if calories_text is not None else None,
+        "calories_raw": (
+            normalize_space(calories_text) if calories_text is not None else None
+        ),
+        "nutrients": nutrients,
         "ingredients": (
             {"raw": ingredients_raw, "list": ingredients_list}
             if ingredients_raw
@@ -343,7 +1500,171 @@ def parse_nutrition_label(markup: str) -> Dict[str, Any]:
     }
 
 
-def parse_nutrient_rows(soup: BeautifulSoup) -> List[Dict[str, Any]]:
+class LabelScanAbort(Exception):
+    pass
+
+
+class LabelCapture:
+    __slots__ = ("pieces",)
+
+    def __init__(self) -> None:
+        self.pieces: List[str] = []
+
+    def text(self) -> str:
+        return "".join(self.pieces)
+
+    def stripped(self) -> str:
+        return " ".join(piece.strip() for piece in self.pieces if piece.strip())
+
+
+class NutrientBlockScan:
+    __slots__ = ("left", "left_open", "spans", "span_count", "right")
+
+    def __init__(self) -> None:
+        self.left: Optional[LabelCapture] = None
+        self.left_open = False
+        self.spans: List[LabelCapture] = []
+        self.span_count = 0
+        self.right: Optional[LabelCapture] = None
+
+    def finish(self) -> Optional[Dict[str, Any]]:
+        if self.left is None:
+            return None
+        if self.span_count >= 2:
+            label_text = normalize_space(self.spans[0].text())
+            amount_text: Optional[str] = normalize_space(self.spans[1].text())
+        else:
+            label_text = normalize_space(self.left.stripped())
+            amount_text = None
+        if not label_text:
+            return None
+        dv_text = normalize_space(self.right.text()) if self.right else None
+        return build_nutrient_row(label_text, amount_text, dv_text)
+
+
+class NutritionLabelScanner:
+    def __init__(self) -> None:
+        self.stack: List[Tuple[str, int, Tuple[str, ...], bool, bool]] = []
+        self.active: List[LabelCapture] = []
+        self.open_classes = dict.fromkeys(LABEL_CONTEXT_CLASSES, 0)
+        self.found: Dict[str, LabelCapture] = {}
+        self.nutrients: List[Dict[str, Any]] = []
+        self.block: Optional[NutrientBlockScan] = None
+
+    def scan(self, markup: str) -> Optional[Dict[str, Any]]:
+        for match in LABEL_TOKEN_PATTERN.finditer(markup):
+            closing, tag, attrs, text, stray = match.groups()
+            if text is not None:
+                if self.active:
+                    piece = html.unescape(text)
+                    for capture in self.active:
+                        capture.pieces.append(piece)
+            elif stray is not None:
+                raise LabelScanAbort("unterminated markup")
+            elif tag is not None:
+                tag = tag.lower()
+                if tag in LABEL_RAW_TEXT_TAGS:
+                    raise LabelScanAbort(f"raw text element <{tag}>")
+                if closing:
+                    self.end(tag)
+                else:
+                    self.start(tag, attrs)
+                    if tag in LABEL_VOID_TAGS or attrs.rstrip().endswith("/"):
+                        self.end(tag)
+        found = self.found
+        if self.stack or ("header" not in found and not self.nutrients):
+            return None
+        return build_label(
+            found["header"].stripped() if "header" in found else None,
+            found["servings"].text() if "servings" in found else None,
+            found["serving_size"].text() if "serving_size" in found else None,
+            found["calories"].text() if "calories" in found else None,
+            self.nutrients,
+            found["ingredients"].stripped() if "ingredients" in found else None,
+        )
+
+    def capture(
+        self, captures: List[LabelCapture], name: Optional[str] = None
+    ) -> LabelCapture:
+        capture = LabelCapture()
+        captures.append(capture)
+        if name:
+            self.found[name] = capture
+        return capture
+
+    def start(self, tag: str, attrs: str) -> None:
+        class_match = CLASS_ATTR_PATTERN.search(attrs)
+        classes = (
+            set(html.unescape(next(g for g in class_match.groups() if g)).split())
+            if class_match and any(class_match.groups())
+            else set()
+        )
+        found = self.found
+        open_classes = self.open_classes
+        captures: List[LabelCapture] = []
+        if "cbo_nn_LabelHeader" in classes and "header" not in found:
+            self.capture(captures, "header")
+        if "cbo_nn_Label_IngredientsTable" in classes and "ingredients" not in found:
+            self.capture(captures, "ingredients")
+        if open_classes["cbo_nn_LabelBottomBorderLabel"]:
+            if tag == "span" and "servings" not in found:
+                self.capture(captures, "servings")
+            if "inline-div-right" in classes and "serving_size" not in found:
+                self.capture(captures, "serving_size")
+        if (
+            open_classes["cbo_nn_LabelSubHeader"]
+            and "inline-div-right" in classes
+            and "calories" not in found
+        ):
+            self.capture(captures, "calories")
+        block = self.block
+        is_left = False
+        if block is not None:
+            if "inline-div-left" in classes and block.left is None:
+                block.left = self.capture(captures)
+                block.left_open = is_left = True
+            elif tag == "span" and block.left_open:
+                block.span_count += 1
+                if block.span_count <= 2:
+                    block.spans.append(self.capture(captures))
+            if "inline-div-right" in classes and block.right is None:
+                block.right = self.capture(captures)
+        is_block = bool(classes & LABEL_BLOCK_CLASSES)
+        if is_block:
+            if block is not None:
+                raise LabelScanAbort("nested nutrient block")
+            self.block = NutrientBlockScan()
+        contexts = tuple(name for name in LABEL_CONTEXT_CLASSES if name in classes)
+        for name in contexts:
+            open_classes[name] += 1
+        self.active.extend(captures)
+        self.stack.append((tag, len(captures), contexts, is_block, is_left))
+
+    def end(self, tag: str) -> None:
+        if not self.stack or self.stack[-1][0] != tag:
+            raise LabelScanAbort(f"unbalanced </{tag}>")
+        _, started, contexts, is_block, is_left = self.stack.pop()
+        if started:
+            del self.active[-started:]
+        for name in contexts:
+            self.open_classes[name] -= 1
+        if is_left and self.block is not None:
+            self.block.left_open = False
+        if is_block and self.block is not None:
+            row = self.block.finish()
+            if row:
+                self.nutrients.append(row)
+            self.block = None
+
+
+def parse_nutrition_label_fast(markup: str) -> Optional[Dict[str, Any]]:
+    try:
+        return NutritionLabelScanner().scan(markup)
+    except LabelScanAbort:
+        return None
+
+
+def parse_nutrient_rows(soup: HtmlNode) -> List[Dict[str, Any]]:
     nutrient_rows: List[Dict[str, Any]] = []
     for block in soup.select(
         ".cbo_nn_LabelBorderedSubHeader, .cbo_nn_LabelNoBorderSubHeader"
@@ -356,22 +1677,59 @@ def parse_nutrient_rows(soup: BeautifulSoup) -> List[Dict[str, Any]]:
             continue
         right = block.select_one(".inline-div-right")
         dv_text = normalize_space(right.get_text()) if right else None
-        quantity, unit = parse_amount(amount_text)
-        nutrient_rows.append(
-            {
-                "key": normalize_label_key(label_text),
-                "label": label_text,
-                "amount": amount_text,
-                "quantity": quantity,
-                "unit": unit,
-                "daily_value_percent": parse_percent(dv_text),
-                "daily_value_raw": dv_text,
-            }
-        )
+        nutrient_rows.append(build_nutrient_row(label_text, amount_text, dv_text))
     return nutrient_rows
 
 
-def extract_label_and_amount(container: Tag) -> Tuple[str, Optional[str]]:
+def build_nutrient_row(
+    label_text: str, amount_text: Optional[str], dv_text: Optional[str]
+) -> Dict[str, Any]:
+    quantity, unit = parse_amount(amount_text)
+    return {
+        "key": sys.intern(normalize_label_key(label_text)),
+        "label": sys.intern(label_text),
+        "amount": amount_text,
+        "quantity": quantity,
+        "unit": intern_text(unit),
+        "daily_value_percent": parse_percent(dv_text),
+        "daily_value_raw": intern_text(dv_text),
+    }
+
+
+def intern_text(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if value is not None else None
+
+
+def intern_label(data: Dict[str, Any]) -> Dict[str, Any]:
+    for row in data.get("nutrients") or []:
+        for key in ("key", "label", "unit", "daily_value_raw"):
+            if row.get(key) is not None:
+                row[key] = sys.intern(row[key])
+    return data
+
+
+def intern_categories(categories: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    for category in categories:
+        for key in ("title", "selection_guidance", "raw_title"):
+            if category.get(key) is not None:
+                category[key] = sys.intern(category[key])
+        for item in category.get("items") or []:
+            if item.get("allergens"):
+                item["allergens"] = [sys.intern(label) for label in item["allergens"]]
+            if item.get("nutrition"):
+                intern_label(item["nutrition"])
+    return categories
+
+
+def intern_parsed(kind: str, value: Any) -> Any:
+    if kind == "nutrition_label":
+        return intern_label(value)
+    if kind == "unit_panel":
+        return intern_categories(value)
+    return value
+
+
+def extract_label_and_amount(container: HtmlNode) -> Tuple[str, Optional[str]]:
     spans = container.find_all("span")
     if len(spans) >= 2:
         label = normalize_space(spans[0].get_text())
@@ -416,6 +1774,20 @@ def parse_int(value: Optional[str]) -> Optional[int]:
         return None
 
 
+def convert_quantity(
+    quantity: Optional[float], unit: Optional[str], target: Optional[str]
+) -> Optional[float]:
+    if quantity is None:
+        return None
+    source = (unit or "").lower()
+    target = (target or "").lower()
+    if source == target:
+        return quantity
+    if source in MASS_UNIT_GRAMS and target in MASS_UNIT_GRAMS:
+        return quantity * MASS_UNIT_GRAMS[source] / MASS_UNIT_GRAMS[target]
+    return None
+
+
 def normalize_label_key(label: str) -> str:
     key = normalize_space(label).lower()
     substitutions = {
@@ -428,130 +1800,2744 @@ def normalize_label_key(label: str) -> str:
     return re.sub(r"[^a-z0-9]+", "_", key).strip("_")
 
 
-def main() -> None:
-    session = requests.Session()
-    session.headers.update(SESSION_HEADERS)
-    homepage = request_with_retry(session, "get", BASE_URL).text
-    discovered_units = extract_units(homepage)
-    active_units: List[Dict[str, Any]] = []
-    skipped_units: List[str] = []
-    for unit in discovered_units:
-        normalized = normalize_name(unit["name"])
-        if normalized in EXCLUDED_UNIT_TOKENS:
-            skipped_units.append(unit["name"])
-            continue
-        if unit not in active_units:
-            active_units.append(unit)
-    print(
-        f"Discovered {len(discovered_units)} units, "
-        f"processing {len(active_units)} (skipped {len(skipped_units)})"
-    )
-    nutrition_cache: Dict[int, Dict[str, Any]] = {}
-    dataset_units: List[Dict[str, Any]] = []
-    total_items = 0
-    for idx, unit in enumerate(active_units, start=1):
-        print(f"[{idx}/{len(active_units)}] Fetching {unit['name']}...", end=" ")
-        try:
-            panel_html = fetch_unit_panel(session, unit["id"])
-            categories = parse_unit_panel(panel_html, session, nutrition_cache)
-        except Exception as exc:  # pragma: no cover - defensive
-            print("failed")
-            dataset_units.append(
-                {
-                    "unit_id": unit["id"],
-                    "name": unit["name"],
-                    "error": str(exc),
-                    "categories": [],
-                }
-            )
-            continue
-        item_count = sum(len(cat["items"]) for cat in categories)
-        total_items += item_count
-        dataset_units.append(
-            {
-                "unit_id": unit["id"],
-                "name": unit["name"],
-                "category_count": len(categories),
-                "item_count": item_count,
-                "categories": categories,
-            }
+UnitCallback = Callable[[int, Dict[str, Any], Dict[str, Any]], None]
+
+
+@dataclass(frozen=True)
+class NutrientRow:
+    __slots__ = (
+        "key",
+        "label",
+        "amount",
+        "quantity",
+        "unit",
+        "daily_value_percent",
+        "daily_value_raw",
+    )
+    key: str
+    label: str
+    amount: Optional[str]
+    quantity: Optional[float]
+    unit: Optional[str]
+    daily_value_percent: Optional[float]
+    daily_value_raw: Optional[str]
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> "NutrientRow":
+        return cls(
+            sys.intern(data["key"]),
+            sys.intern(data["label"]),
+            data.get("amount"),
+            data.get("quantity"),
+            intern_text(data.get("unit")),
+            data.get("daily_value_percent"),
+            intern_text(data.get("daily_value_raw")),
         )
-        print(f"{item_count} items across {len(categories)} categories")
-    payload = {
-        "source": BASE_URL,
-        "generated_at": datetime.now(timezone.utc).isoformat(),
-        "units_total": len(active_units),
-        "units_skipped": skipped_units,
-        "items_total": total_items,
-        "excluded_names": sorted(EXCLUDED_UNIT_NAMES),
-        "units": dataset_units,
-    }
-    JSON_OUTPUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    JSON_OUTPUT_PATH.write_text(json.dumps(payload, indent=2, ensure_ascii=False))
-    flat_rows = flatten_items(dataset_units)
-    write_csv(flat_rows, CSV_OUTPUT_PATH)
-    print(
-        f"Wrote dataset to {JSON_OUTPUT_PATH} and CSV to {CSV_OUTPUT_PATH} "
-        f"({total_items} items captured)"
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "key": self.key,
+            "label": self.label,
+            "amount": self.amount,
+            "quantity": self.quantity,
+            "unit": self.unit,
+            "daily_value_percent": self.daily_value_percent,
+            "daily_value_raw": self.daily_value_raw,
+        }
+
+
+@dataclass(frozen=True)
+class NutritionLabel:
+    __slots__ = (
+        "label_name",
+        "servings_per_container",
+        "serving_size",
+        "calories",
+        "calories_raw",
+        "nutrients",
+        "ingredients_raw",
+        "ingredients_list",
     )
+    label_name: Optional[str]
+    servings_per_container: Optional[str]
+    serving_size: Optional[str]
+    calories: Optional[int]
+    calories_raw: Optional[str]
+    nutrients: Tuple[NutrientRow, ...]
+    ingredients_raw: Optional[str]
+    ingredients_list: Optional[Tuple[str, ...]]
 
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> "NutritionLabel":
+        ingredients = data.get("ingredients") or {}
+        listed = ingredients.get("list")
+        return cls(
+            data.get("label_name"),
+            data.get("servings_per_container"),
+            data.get("serving_size"),
+            data.get("calories"),
+            data.get("calories_raw"),
+            tuple(NutrientRow.from_json(row) for row in data.get("nutrients") or []),
+            ingredients.get("raw"),
+            tuple(listed) if listed is not None else None,
+        )
 
-def flatten_items(units: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    rows: List[Dict[str, Any]] = []
-    for unit in units:
-        for category in unit.get("categories", []):
-            for item in category.get("items", []):
-                nutrition = item.get("nutrition") or {}
-                ingredients = nutrition.get("ingredients") or {}
-                rows.append(
-                    {
-                        "unit_id": unit.get("unit_id"),
-                        "unit_name": unit.get("name"),
-                        "category_id": category.get("category_id"),
-                        "category_title": category.get("title"),
-                        "category_guidance": category.get("selection_guidance"),
-                        "item_detail_id": item.get("detail_id"),
-                        "item_name": item.get("name"),
-                        "description": item.get("description"),
-                        "allergens": "; ".join(item.get("allergens", [])),
-                        "serving_display": item.get("serving_display"),
-                        "serving_choices": json.dumps(
-                            item.get("serving_choices"), ensure_ascii=False
-                        )
-                        if item.get("serving_choices") is not None
-                        else None,
-                        "calories": nutrition.get("calories"),
-                        "calories_raw": nutrition.get("calories_raw"),
-                        "serving_size": nutrition.get("serving_size"),
-                        "servings_per_container": nutrition.get(
-                            "servings_per_container"
-                        ),
-                        "ingredients_raw": ingredients.get("raw"),
-                        "ingredients_list": json.dumps(
-                            ingredients.get("list"), ensure_ascii=False
-                        )
-                        if ingredients.get("list") is not None
-                        else None,
-                        "nutrients": json.dumps(
-                            nutrition.get("nutrients"), ensure_ascii=False
-                        )
-                        if nutrition.get("nutrients") is not None
-                        else None,
-                    }
-                )
-    return rows
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "label_name": self.label_name,
+            "servings_per_container": self.servings_per_container,
+            "serving_size": self.serving_size,
+            "calories": self.calories,
+            "calories_raw": self.calories_raw,
+            "nutrients": [row.to_json() for row in self.nutrients],
+            "ingredients": (
+                {
+                    "raw": self.ingredients_raw,
+                    "list": (
+                        list(self.ingredients_list)
+                        if self.ingredients_list is not None
+                        else None
+                    ),
+                }
+                if self.ingredients_raw
+                else None
+            ),
+        }
 
 
-def write_csv(rows: List[Dict[str, Any]], path: Path) -> None:
-    if not rows:
-        path.write_text("")
-        return
-    fieldnames = list(rows[0].keys())
-    with path.open("w", newline="", encoding="utf-8") as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
-        for row in rows:
-            writer.writerow(row)
+@dataclass
+class Item:
+    __slots__ = (
+        "detail_id",
+        "name",
+        "description",
+        "allergens",
+        "serving_display",
+        "serving_choices",
+        "nutrition",
+    )
+    detail_id: Optional[int]
+    name: str
+    description: Optional[str]
+    allergens: Tuple[str, ...]
+    serving_display: Optional[str]
+    serving_choices: Optional[Dict[str, Any]]
+    nutrition: Optional[NutritionLabel]
+
+    @classmethod
+    def from_json(
+        cls,
+        data: Dict[str, Any],
+        labels: Optional[Dict[NutritionLabel, NutritionLabel]] = None,
+    ) -> "Item":
+        nutrition = None
+        if data.get("nutrition") is not None:
+            nutrition = NutritionLabel.from_json(data["nutrition"])
+            if labels is not None:
+                nutrition = labels.setdefault(nutrition, nutrition)
+        return cls(
+            data.get("detail_id"),
+            data["name"],
+            data.get("description"),
+            tuple(sys.intern(label) for label in data.get("allergens") or ()),
+            data.get("serving_display"),
+            data.get("serving_choices"),
+            nutrition,
+        )
+
+    def to_json(self) -> Dict[str, Any]:
+        item: Dict[str, Any] = {}
+        for key, value in (
+            ("detail_id", self.detail_id),
+            ("name", self.name),
+            ("description", self.description),
+            ("allergens", list(self.allergens)),
+            ("serving_display", self.serving_display),
+            ("serving_choices", self.serving_choices),
+        ):
+            if value not in (None, [], ""):
+                item[key] = value
+        if self.nutrition is not None:
+            item["nutrition"] = self.nutrition.to_json()
+        return item
+
+
+@dataclass
+class Category:
+    __slots__ = ("category_id", "title", "selection_guidance", "raw_title", "items")
+    category_id: Optional[int]
+    title: str
+    selection_guidance: Optional[str]
+    raw_title: str
+    items: List[Item]
+
+    @classmethod
+    def from_json(
+        cls,
+        data: Dict[str, Any],
+        labels: Optional[Dict[NutritionLabel, NutritionLabel]] = None,
+    ) -> "Category":
+        return cls(
+            data.get("category_id"),
+            sys.intern(data["title"]),
+            intern_text(data.get("selection_guidance")),
+            sys.intern(data["raw_title"]),
+            [Item.from_json(item, labels) for item in data.get("items") or []],
+        )
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "category_id": self.category_id,
+            "title": self.title,
+            "selection_guidance": self.selection_guidance,
+            "raw_title": self.raw_title,
+            "items": [item.to_json() for item in self.items],
+        }
+
+
+@dataclass
+class Unit:
+    __slots__ = ("unit_id", "name", "panel_hash", "categories", "error")
+    unit_id: int
+    name: str
+    panel_hash: Optional[str]
+    categories: List[Category]
+    error: Optional[str]
+
+    @classmethod
+    def from_json(
+        cls,
+        data: Dict[str, Any],
+        labels: Optional[Dict[NutritionLabel, NutritionLabel]] = None,
+    ) -> "Unit":
+        return cls(
+            data["unit_id"],
+            data["name"],
+            data.get("panel_hash"),
+            [Category.from_json(cat, labels) for cat in data.get("categories") or []],
+            data.get("error"),
+        )
+
+    def to_json(self) -> Dict[str, Any]:
+        categories = [category.to_json() for category in self.categories]
+        if self.error is not None:
+            return {
+                "unit_id": self.unit_id,
+                "name": self.name,
+                "error": self.error,
+                "categories": categories,
+            }
+        record: Dict[str, Any] = {"unit_id": self.unit_id, "name": self.name}
+        if self.panel_hash is not None:
+            record["panel_hash"] = self.panel_hash
+        record["category_count"] = len(categories)
+        record["item_count"] = sum(len(cat["items"]) for cat in categories)
+        record["categories"] = categories
+        return record
+
+
+def build_unit_record(
+    unit: Dict[str, Any], categories: List[Dict[str, Any]], panel_hash: str
+) -> Dict[str, Any]:
+    return {
+        "unit_id": unit["id"],
+        "name": unit["name"],
+        "panel_hash": panel_hash,
+        "category_count": len(categories),
+        "item_count": sum(len(cat["items"]) for cat in categories),
+        "categories": categories,
+    }
+
+
+def build_unit_error(unit: Dict[str, Any], exc: BaseException) -> Dict[str, Any]:
+    return {
+        "unit_id": unit["id"],
+        "name": unit["name"],
+        "error": str(exc),
+        "categories": [],
+    }
+
+
+class PreviousDataset:
+    def __init__(self, payload: Dict[str, Any]) -> None:
+        self.generated_at = payload.get("generated_at")
+        units = payload.get("units", [])
+        labels = payload.get("labels")
+        symbols = payload.get("symbols")
+        if symbols is not None:
+            decode = symbol_decoder(symbols)
+            units = [map_symbol_fields(unit, decode) for unit in units]
+            if labels is not None:
+                labels = {
+                    key: map_nutrition_symbols(body, decode)
+                    for key, body in labels.items()
+                }
+        if labels is not None:
+            units = [denormalize_unit_record(unit, labels) for unit in units]
+        shared: Dict[NutritionLabel, NutritionLabel] = {}
+        self.units: Dict[int, Unit] = {
+            unit["unit_id"]: Unit.from_json(unit, shared)
+            for unit in units
+            if "error" not in unit
+        }
+        self.items: Dict[int, List[Item]] = {}
+        self.nutrition: Dict[int, Dict[str, Any]] = {}
+        for unit in self.units.values():
+            for category in unit.categories:
+                for item in category.items:
+                    if item.detail_id and item.nutrition is not None:
+                        self.items.setdefault(item.detail_id, []).append(item)
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["PreviousDataset"]:
+        if not path.exists():
+            return None
+        return cls(json.loads(path.read_text(encoding="utf-8")))
+
+    def unit_record(self, unit_id: int) -> Optional[Dict[str, Any]]:
+        unit = self.units.get(unit_id)
+        return unit.to_json() if unit is not None else None
+
+    def unchanged_unit(
+        self, unit_id: int, panel_hash: str
+    ) -> Optional[List[Dict[str, Any]]]:
+        unit = self.units.get(unit_id)
+        if unit is None or unit.panel_hash != panel_hash:
+            return None
+        return [category.to_json() for category in unit.categories]
+
+    def attach_known_nutrition(self, categories: List[Dict[str, Any]]) -> None:
+        for item in iter_category_items(categories):
+            detail_id = item.get("detail_id")
+            known = self.items.get(detail_id) if detail_id else None
+            if not known:
+                continue
+            rows = [
+                {k: v for k, v in model.to_json().items() if k != "nutrition"}
+                for model in known
+            ]
+            if item in rows:
+                nutrition = self.nutrition.get(detail_id)
+                if nutrition is None:
+                    nutrition = known[-1].nutrition.to_json()
+                    self.nutrition[detail_id] = nutrition
+                item["nutrition"] = nutrition
+
+
+def iter_item_entries(unit: Dict[str, Any]) -> Iterable[Tuple[str, Dict[str, Any]]]:
+    for category in unit.get("categories", []):
+        for item in category.get("items", []):
+            key = (
+                f"{unit.get('unit_id')}:{category.get('category_id')}:"
+                f"{item.get('detail_id') or item.get('name')}"
+            )
+            yield key, {
+                "unit_id": unit.get("unit_id"),
+                "unit_name": unit.get("name"),
+                "category_id": category.get("category_id"),
+                "category_title": category.get("title"),
+                "item": item,
+            }
+
+
+class DatasetDelta:
+    def __init__(self, previous: PreviousDataset) -> None:
+        self.previous = previous
+        self.seen_units: set[int] = set()
+        self.failed_units: List[str] = []
+        self.unchanged_units = 0
+        self.added: List[Dict[str, Any]] = []
+        self.removed: List[Dict[str, Any]] = []
+        self.modified: List[Dict[str, Any]] = []
+
+    def add_unit(self, record: Dict[str, Any]) -> None:
+        self.seen_units.add(record["unit_id"])
+        if "error" in record:
+            self.failed_units.append(record["name"])
+            return
+        old_unit = self.previous.unit_record(record["unit_id"])
+        if old_unit is not None and old_unit.get("panel_hash") == record.get(
+            "panel_hash"
+        ):
+            self.unchanged_units += 1
+            return
+        old_entries = dict(iter_item_entries(old_unit)) if old_unit else {}
+        for key, entry in iter_item_entries(record):
+            old_entry = old_entries.pop(key, None)
+            if old_entry is None:
+                self.added.append(entry)
+            elif old_entry["item"] != entry["item"]:
+                self.modified.append({**entry, "previous": old_entry["item"]})
+        self.removed.extend(old_entries.values())
+
+    def finish(self) -> Dict[str, Any]:
+        for unit_id, unit in self.previous.units.items():
+            if unit_id not in self.seen_units:
+                self.removed.extend(
+                    entry for _, entry in iter_item_entries(unit.to_json())
+                )
+        return {
+            "generated_at": datetime.now(timezone.utc).isoformat(),
+            "previous_generated_at": self.previous.generated_at,
+            "unchanged_units": self.unchanged_units,
+            "failed_units": self.failed_units,
+            "added_total": len(self.added),
+            "removed_total": len(self.removed),
+            "modified_total": len(self.modified),
+            "added": self.added,
+            "removed": self.removed,
+            "modified": self.modified,
+        }
+
+
+class CrawlJournal:
+    def __init__(self, path: Path, checkpoint_every: int) -> None:
+        self.path = path
+        self.checkpoint_every = max(1, checkpoint_every)
+        self.units: Dict[int, Dict[str, Any]] = {}
+        self.labels: Dict[int, Dict[str, Any]] = {}
+        self.label_times: Dict[int, float] = {}
+        self.since_checkpoint = 0
+        self.lock = threading.Lock()
+        self.handle: Optional[Any] = None
+        self.valid_bytes: Optional[int] = None
+
+    def load(self) -> None:
+        if not self.path.exists():
+            return
+        offset = 0
+        with self.path.open("rb") as handle:
+            for line in handle:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                if entry.get("type") == "unit":
+                    record = entry["record"]
+                    intern_categories(record.get("categories") or [])
+                    self.units[record["unit_id"]] = record
+                elif entry.get("type") == "label":
+                    self.labels[entry["detail_id"]] = intern_label(entry["data"])
+                    self.label_times[entry["detail_id"]] = entry.get("fetched_at", 0.0)
+                offset += len(line)
+        self.valid_bytes = offset
+
+    def open(self, resume: bool) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if resume and self.valid_bytes is not None:
+            with self.path.open("r+b") as handle:
+                handle.truncate(self.valid_bytes)
+        self.handle = self.path.open("a" if resume else "w", encoding="utf-8")
+        self.append(
+            {"type": "start", "at": datetime.now(timezone.utc).isoformat()}
+        )
+
+    def append(self, entry: Dict[str, Any]) -> None:
+        line = json.dumps(entry, ensure_ascii=False)
+        with self.lock:
+            if self.handle is not None:
+                self.handle.write(line + "\n")
+
+    def record_label(self, detail_id: int, data: Dict[str, Any]) -> None:
+        self.append(
+            {
+                "type": "label",
+                "detail_id": detail_id,
+                "fetched_at": time.time(),
+                "data": data,
+            }
+        )
+
+    def record_unit(self, record: Dict[str, Any]) -> None:
+        if "error" in record:
+            return
+        self.append({"type": "unit", "record": record})
+        self.since_checkpoint += 1
+        if self.since_checkpoint >= self.checkpoint_every:
+            self.checkpoint()
+
+    def checkpoint(self) -> None:
+        with self.lock:
+            if self.handle is None:
+                return
+            self.handle.flush()
+            os.fsync(self.handle.fileno())
+            self.since_checkpoint = 0
+
+    def close(self) -> None:
+        self.checkpoint()
+        with self.lock:
+            if self.handle is not None:
+                self.handle.close()
+                self.handle = None
+
+    def complete(self) -> None:
+        self.close()
+        self.path.unlink(missing_ok=True)
+
+
+class JournaledCache(MutableMapping[int, Dict[str, Any]]):
+    def __init__(
+        self, inner: MutableMapping[int, Dict[str, Any]], journal: CrawlJournal
+    ) -> None:
+        self.inner = inner
+        self.journal = journal
+
+    def __getitem__(self, detail_id: int) -> Dict[str, Any]:
+        return self.inner[detail_id]
+
+    def __contains__(self, detail_id: object) -> bool:
+        return detail_id in self.inner
+
+    def __setitem__(self, detail_id: int, data: Dict[str, Any]) -> None:
+        self.inner[detail_id] = data
+        self.journal.record_label(detail_id, data)
+
+    def __delitem__(self, detail_id: int) -> None:
+        del self.inner[detail_id]
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.inner)
+
+    def __len__(self) -> int:
+        return len(self.inner)
+
+
+def crawl_sync(
+    session: requests.Session,
+    units: List[Dict[str, Any]],
+    nutrition_cache: MutableMapping[int, Dict[str, Any]],
+    on_unit: UnitCallback,
+    previous: Optional[PreviousDataset] = None,
+) -> None:
+    for idx, unit in enumerate(units, start=1):
+        CURRENT_UNIT.set(unit["id"])
+        try:
+            panel_html = fetch_unit_panel(session, unit["id"])
+            panel_hash = content_hash(panel_html)
+            categories = (
+                previous.unchanged_unit(unit["id"], panel_hash) if previous else None
+            )
+            if categories is None:
+                categories = parse_unit_panel(
+                    panel_html, session, nutrition_cache, previous
+                )
+        except Exception as exc:  # pragma: no cover - defensive
+            on_unit(idx, unit, build_unit_error(unit, exc))
+            continue
+        on_unit(idx, unit, build_unit_record(unit, categories, panel_hash))
+
+
+class AsyncCrawler:
+    def __init__(
+        self,
+        session: requests.Session,
+        nutrition_cache: MutableMapping[int, Dict[str, Any]],
+        executor: ThreadPoolExecutor,
+        concurrency: int,
+        per_host: int,
+        parse_executor: Optional[Executor] = None,
+        previous: Optional[PreviousDataset] = None,
+    ) -> None:
+        self.session = session
+        self.previous = previous
+        self.nutrition_cache = nutrition_cache
+        self.executor = executor
+        self.parse_executor = parse_executor or executor
+        self.per_host = per_host
+        self.global_limit = asyncio.Semaphore(concurrency)
+        self.host_limits: Dict[str, asyncio.Semaphore] = {}
+        self.pending_labels: Dict[int, asyncio.Future] = {}
+
+    async def call(self, url: str, func: Callable[..., Any], *args: Any) -> Any:
+        limiter = RATE_LIMITERS.get(url)
+        if limiter:
+            await limiter.acquire_async()
+        host = urlsplit(url).netloc
+        host_limit = self.host_limits.get(host)
+        if host_limit is None:
+            host_limit = self.host_limits[host] = asyncio.Semaphore(self.per_host)
+        async with self.global_limit, host_limit:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, func, *args)
+
+    async def parse(
+        self, kind: str, markup: str, parser: Callable[[str], Any]
+    ) -> Any:
+        entry = parse_cache_entry(kind, markup)
+        if entry and RESPONSE_CACHE is not None:
+            cached = RESPONSE_CACHE.parsed(*entry)
+            if cached is not None:
+                return intern_parsed(kind, cached)
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        if isinstance(self.parse_executor, ProcessPoolExecutor):
+            with stage_timer(parser.__name__):
+                value = await loop.run_in_executor(self.parse_executor, parser, markup)
+            value = intern_parsed(kind, value)
+        else:
+            value = await loop.run_in_executor(self.parse_executor, parser, markup)
+        if METRICS is not None:
+            METRICS.observe_parse(kind, time.perf_counter() - started)
+        if entry and RESPONSE_CACHE is not None:
+            RESPONSE_CACHE.store_parsed(*entry, value)
+        return value
+
+    async def fetch_label(self, detail_id: int) -> Dict[str, Any]:
+        markup = await self.call(
+            LABEL_ENDPOINT, fetch_label_markup, self.session, detail_id, False
+        )
+        data = await self.parse("nutrition_label", markup, parse_nutrition_label)
+        self.nutrition_cache[detail_id] = data
+        return data
+
+    async def nutrition(self, detail_id: int) -> Dict[str, Any]:
+        hit = detail_id in self.nutrition_cache
+        pending = self.pending_labels.get(detail_id)
+        if METRICS is not None:
+            METRICS.observe_cache(hit or pending is not None)
+        with stage_timer("fetch_nutrition"):
+            if hit:
+                return self.nutrition_cache[detail_id]
+            if pending is None:
+                pending = asyncio.ensure_future(self.fetch_label(detail_id))
+                self.pending_labels[detail_id] = pending
+            try:
+                return await pending
+            finally:
+                if pending.done():
+                    self.pending_labels.pop(detail_id, None)
+
+    async def unit(self, unit: Dict[str, Any]) -> Dict[str, Any]:
+        CURRENT_UNIT.set(unit["id"])
+        panel_html = await self.call(
+            ITEM_PANEL_ENDPOINT, fetch_unit_panel, self.session, unit["id"], False
+        )
+        panel_hash = content_hash(panel_html)
+        if self.previous is not None:
+            categories = self.previous.unchanged_unit(unit["id"], panel_hash)
+            if categories is not None:
+                return build_unit_record(unit, categories, panel_hash)
+        with stage_timer("parse_unit_panel"):
+            categories = await self.parse(
+                "unit_panel", panel_html, parse_unit_structure
+            )
+            if self.previous is not None:
+                self.previous.attach_known_nutrition(categories)
+            items = [
+                item
+                for item in iter_category_items(categories)
+                if item.get("detail_id") and "nutrition" not in item
+            ]
+            labels = await asyncio.gather(
+                *(self.nutrition(item["detail_id"]) for item in items)
+            )
+        for item, label in zip(items, labels):
+            item["nutrition"] = label
+        return build_unit_record(unit, categories, panel_hash)
+
+
+async def crawl_async(
+    session: requests.Session,
+    units: List[Dict[str, Any]],
+    nutrition_cache: MutableMapping[int, Dict[str, Any]],
+    on_unit: UnitCallback,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    per_host: int = DEFAULT_PER_HOST_CONCURRENCY,
+    parse_workers: int = 0,
+    previous: Optional[PreviousDataset] = None,
+) -> None:
+    session.mount("https://", HTTPAdapter(pool_maxsize=concurrency))
+    parse_executor = (
+        ProcessPoolExecutor(
+            max_workers=parse_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=configure_parse_worker,
+            initargs=(PARSER_BACKEND, LABEL_FAST_PATH),
+        )
+        if parse_workers
+        else None
+    )
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            crawler = AsyncCrawler(
+                session,
+                nutrition_cache,
+                executor,
+                concurrency,
+                per_host,
+                parse_executor,
+                previous,
+            )
+            tasks = [asyncio.ensure_future(crawler.unit(unit)) for unit in units]
+            for idx, (unit, task) in enumerate(zip(units, tasks), start=1):
+                try:
+                    record = await task
+                except Exception as exc:  # pragma: no cover - defensive
+                    on_unit(idx, unit, build_unit_error(unit, exc))
+                    continue
+                on_unit(idx, unit, record)
+    finally:
+        if parse_executor is not None:
+            parse_executor.shutdown()
+
+
+def configure_parse_worker(backend: str, fast_labels: bool) -> None:
+    global LABEL_FAST_PATH
+    configure_parser(backend)
+    LABEL_FAST_PATH = fast_labels
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--engine",
+        choices=("sync", "async"),
+        default="sync",
+        help="crawl units one at a time (sync) or concurrently (async)",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help="maximum in-flight requests for the async engine",
+    )
+    parser.add_argument(
+        "--per-host",
+        type=int,
+        default=DEFAULT_PER_HOST_CONCURRENCY,
+        help="maximum in-flight requests per host for the async engine",
+    )
+    parser.add_argument(
+        "--parse-workers",
+        type=int,
+        default=0,
+        help="parse pages in this many worker processes (async engine only)",
+    )
+    parser.add_argument(
+        "--panel-rate",
+        type=float,
+        default=DEFAULT_PANEL_RATE,
+        help="unit panel requests per second (0 disables the limit)",
+    )
+    parser.add_argument(
+        "--panel-burst",
+        type=int,
+        default=DEFAULT_PANEL_BURST,
+        help="unit panel requests allowed back to back",
+    )
+    parser.add_argument(
+        "--label-rate",
+        type=float,
+        default=DEFAULT_LABEL_RATE,
+        help="nutrition label requests per second (0 disables the limit)",
+    )
+    parser.add_argument(
+        "--label-burst",
+        type=int,
+        default=DEFAULT_LABEL_BURST,
+        help="nutrition label requests allowed back to back",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="write the JSON dataset unit by unit instead of all at the end",
+    )
+    parser.add_argument(
+        "--ndjson",
+        type=Path,
+        nargs="?",
+        const=NDJSON_OUTPUT_PATH,
+        help=f"also write one item per line (default: {NDJSON_OUTPUT_PATH})",
+    )
+    parser.add_argument(
+        "--parquet",
+        type=Path,
+        nargs="?",
+        const=PARQUET_OUTPUT_PATH,
+        help=f"also write a typed Parquet item table (default: {PARQUET_OUTPUT_PATH})",
+    )
+    parser.add_argument(
+        "--arrow",
+        type=Path,
+        nargs="?",
+        const=ARROW_OUTPUT_PATH,
+        help=(
+            "also write the item table as a memory-mappable Arrow IPC file "
+            f"(default: {ARROW_OUTPUT_PATH})"
+        ),
+    )
+    parser.add_argument(
+        "--meals-csv",
+        type=Path,
+        nargs="?",
+        const=MEALS_CSV_OUTPUT_PATH,
+        help=(
+            "also write the compact meals CSV with macros in g/mg "
+            f"(default: {MEALS_CSV_OUTPUT_PATH})"
+        ),
+    )
+    parser.add_argument(
+        "--meal-table",
+        type=Path,
+        nargs="?",
+        const=MEAL_TABLE_PATH,
+        help=(
+            "also write the binary meal table loaded by the Nuxt server "
+            f"(default: {MEAL_TABLE_PATH})"
+        ),
+    )
+    parser.add_argument(
+        "--meal-sections",
+        type=Path,
+        default=MEAL_SECTIONS_PATH,
+        help=(
+            "meals CSV whose meal_section column is carried into --meals-csv and "
+            "--meal-table; unlisted items take the meal period named in their "
+            f"category title, else {DEFAULT_MEAL_SECTION!r} "
+            f"(default: {MEAL_SECTIONS_PATH})"
+        ),
+    )
+    parser.add_argument(
+        "--meal-index",
+        type=Path,
+        nargs="?",
+        const=MEAL_INDEX_PATH,
+        help=(
+            "also write the meal name lookup index used by the Nuxt server "
+            f"(default: {MEAL_INDEX_PATH})"
+        ),
+    )
+    parser.add_argument(
+        "--search-index",
+        type=Path,
+        nargs="?",
+        const=SEARCH_INDEX_PATH,
+        help=(
+            "also write the BM25 index used to pre-rank meal candidates "
+            f"(default: {SEARCH_INDEX_PATH})"
+        ),
+    )
+    parser.add_argument(
+        "--macro-index",
+        type=Path,
+        nargs="?",
+        const=MACRO_INDEX_PATH,
+        help=(
+            "also write sorted per-macro columns for range filtering "
+            f"(default: {MACRO_INDEX_PATH})"
+        ),
+    )
+    parser.add_argument(
+        "--ingredient-index",
+        type=Path,
+        nargs="?",
+        const=INGREDIENT_INDEX_PATH,
+        help=(
+            "also write the inverted ingredient index "
+            f"(default: {INGREDIENT_INDEX_PATH})"
+        ),
+    )
+    parser.add_argument(
+        "--nutrient-matrix",
+        type=Path,
+        nargs="?",
+        const=NUTRIENT_MATRIX_PATH,
+        help=(
+            "also write the float32 item x nutrient matrix as .npz "
+            f"(default: {NUTRIENT_MATRIX_PATH})"
+        ),
+    )
+    parser.add_argument(
+        "--symbols",
+        action="store_true",
+        help=(
+            "encode nutrient keys, units, labels, allergens and category titles "
+            "through a symbol table in the JSON and CSV outputs"
+        ),
+    )
+    parser.add_argument(
+        "--normalize-labels",
+        action="store_true",
+        help=(
+            "write each distinct nutrition label once in a top-level labels table "
+            "and reference it from items by label_id"
+        ),
+    )
+    parser.add_argument(
+        "--metrics",
+        type=Path,
+        nargs="?",
+        const=METRICS_JSON_PATH,
+        help=(
+            "write request latency, bytes, retries, label cache and parse timings "
+            f"as a JSON summary (default: {METRICS_JSON_PATH})"
+        ),
+    )
+    parser.add_argument(
+        "--metrics-prom",
+        type=Path,
+        nargs="?",
+        const=METRICS_PROM_PATH,
+        help=(
+            "write the same metrics in Prometheus textfile format "
+            f"(default: {METRICS_PROM_PATH})"
+        ),
+    )
+    parser.add_argument(
+        "--incremental",
+        type=Path,
+        nargs="?",
+        const=JSON_OUTPUT_PATH,
+        metavar="PREVIOUS_JSON",
+        help=(
+            "reuse unchanged units and labels from a previous dataset and "
+            f"write a delta file (default previous: {JSON_OUTPUT_PATH})"
+        ),
+    )
+    parser.add_argument(
+        "--journal",
+        type=Path,
+        default=JOURNAL_PATH,
+        help="checkpoint journal of completed units and fetched labels",
+    )
+    parser.add_argument(
+        "--checkpoint-every",
+        type=int,
+        default=DEFAULT_CHECKPOINT_EVERY,
+        help="fsync the journal after this many completed units",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="continue from the last checkpoint in --journal",
+    )
+    parser.add_argument(
+        "--label-cache",
+        type=Path,
+        default=LABEL_CACHE_PATH,
+        help="SQLite file that keeps parsed nutrition labels between runs",
+    )
+    parser.add_argument(
+        "--no-label-cache",
+        action="store_true",
+        help="keep parsed labels in memory for this run only",
+    )
+    parser.add_argument(
+        "--max-label-age",
+        type=float,
+        default=DEFAULT_MAX_LABEL_AGE_HOURS,
+        help="hours before a cached label is fetched again (0 keeps labels forever)",
+    )
+    parser.add_argument(
+        "--label-cache-max-mb",
+        type=float,
+        default=DEFAULT_LABEL_CACHE_MAX_MB,
+        help="evict least recently used labels beyond this size",
+    )
+    parser.add_argument(
+        "--response-cache",
+        type=Path,
+        default=RESPONSE_CACHE_PATH,
+        help="SQLite file of raw responses used for conditional requests",
+    )
+    parser.add_argument(
+        "--no-response-cache",
+        action="store_true",
+        help="always perform full fetches and parses",
+    )
+    parser.add_argument(
+        "--parser",
+        choices=PARSER_BACKENDS,
+        default=PARSER_BACKEND,
+        help="HTML parser backend used for units, panels and labels",
+    )
+    parser.add_argument(
+        "--no-fast-labels",
+        action="store_true",
+        help="parse nutrition labels with the parser backend only",
+    )
+    parser.add_argument(
+        "--record-corpus",
+        type=Path,
+        help="save every fetched page to this directory for parity checks",
+    )
+    parser.add_argument(
+        "--check-parser-parity",
+        type=Path,
+        metavar="CORPUS_DIR",
+        help="compare all installed parser backends on a recorded corpus and exit",
+    )
+    parser.add_argument(
+        "--benchmark-name-index",
+        action="store_true",
+        help="time meal name index lookups against a linear scan and exit",
+    )
+    parser.add_argument(
+        "--profile",
+        type=Path,
+        nargs="?",
+        const=PROFILE_DIR,
+        metavar="DIR",
+        help=(
+            "run under a profiler and write profile.pstats (cProfile) or "
+            "profile.html (pyinstrument), profile.folded and stage_timers.json "
+            f"to DIR (default: {PROFILE_DIR}); use --engine sync for full stacks"
+        ),
+    )
+    parser.add_argument(
+        "--profiler",
+        choices=PROFILERS,
+        default="auto",
+        help="profiler for --profile; auto samples with pyinstrument if installed",
+    )
+    parser.add_argument(
+        "--time-stages",
+        action="store_true",
+        help=(
+            "print wall-clock totals for panel and label fetches and parses "
+            "(inclusive of nested stages)"
+        ),
+    )
+    args = parser.parse_args(argv)
+    if args.concurrency < 1 or args.per_host < 1:
+        parser.error("--concurrency and --per-host must be at least 1")
+    if args.parquet or args.arrow:
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            parser.error("--parquet and --arrow require the pyarrow package")
+    if args.nutrient_matrix:
+        try:
+            import numpy  # noqa: F401
+        except ImportError:
+            parser.error("--nutrient-matrix requires the numpy package")
+    if args.parse_workers < 0:
+        parser.error("--parse-workers cannot be negative")
+    if args.parse_workers and args.engine != "async":
+        parser.error("--parse-workers requires --engine async")
+    if args.profiler != "cprofile":
+        try:
+            import pyinstrument  # noqa: F401
+        except ImportError:
+            if args.profiler == "pyinstrument":
+                parser.error("--profiler pyinstrument requires pyinstrument")
+            args.profiler = "cprofile"
+    return args
+
+
+ProfileFunc = Tuple[str, int, str]
+
+
+def profile_frame_label(function: str, path: str, line: int) -> str:
+    label = f"{function} ({Path(path).name}:{line})" if line else function
+    return label.replace(";", ",")
+
+
+def pstats_stacks(stats: pstats.Stats) -> Dict[str, float]:
+    entries: Dict[ProfileFunc, Any] = stats.stats  # type: ignore[attr-defined]
+    callees: Dict[ProfileFunc, List[Tuple[ProfileFunc, float]]] = {}
+    for func, (_, _, _, _, callers) in entries.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((func, edge[3]))
+    stacks: Dict[str, float] = {}
+
+    def walk(
+        func: ProfileFunc, budget: float, path: Tuple[str, ...], seen: frozenset
+    ) -> None:
+        _, _, own, cumulative, _ = entries[func]
+        share = budget / cumulative if cumulative else 0.0
+        filename, line, name = func
+        frames = path + (profile_frame_label(name, filename, line),)
+        if own * share >= PROFILE_MIN_SECONDS:
+            stack = ";".join(frames)
+            stacks[stack] = stacks.get(stack, 0.0) + own * share
+        for child, edge in callees.get(func, ()):
+            if child not in seen and edge * share >= PROFILE_MIN_SECONDS:
+                walk(child, edge * share, frames, seen | {child})
+
+    for func, entry in entries.items():
+        if not entry[4]:
+            walk(func, entry[3], (), frozenset((func,)))
+    return stacks
+
+
+def sampled_stacks(
+    frame: Any, path: Tuple[str, ...] = (), stacks: Optional[Dict[str, float]] = None
+) -> Dict[str, float]:
+    stacks = {} if stacks is None else stacks
+    frames = path + (
+        profile_frame_label(frame.function, frame.file_path or "", frame.line_no),
+    )
+    if frame.self_time >= PROFILE_MIN_SECONDS:
+        stack = ";".join(frames)
+        stacks[stack] = stacks.get(stack, 0.0) + frame.self_time
+    for child in frame.children:
+        sampled_stacks(child, frames, stacks)
+    return stacks
+
+
+def write_collapsed_stacks(path: Path, stacks: Dict[str, float]) -> None:
+    with path.open("w", encoding="utf-8") as handle:
+        for stack, seconds in sorted(stacks.items()):
+            micros = round(seconds * 1_000_000)
+            if micros:
+                handle.write(f"{stack} {micros}\n")
+
+
+def run_profiled(func: Callable[[], None], directory: Path, backend: str) -> None:
+    directory.mkdir(parents=True, exist_ok=True)
+    folded_path = directory / "profile.folded"
+    if backend == "pyinstrument":
+        from pyinstrument import Profiler
+
+        sampler = Profiler(async_mode="enabled")
+        sampler.start()
+        try:
+            func()
+        finally:
+            session = sampler.stop()
+            (directory / "profile.html").write_text(sampler.output_html())
+            root = session.root_frame()
+            write_collapsed_stacks(folded_path, sampled_stacks(root) if root else {})
+            print(f"Wrote pyinstrument profile and {folded_path}")
+        return
+    profiler = cProfile.Profile()
+    try:
+        profiler.runcall(func)
+    finally:
+        stats = pstats.Stats(profiler)
+        stats.dump_stats(directory / "profile.pstats")
+        write_collapsed_stacks(folded_path, pstats_stacks(stats))
+        stats.sort_stats("cumulative").print_stats(PROFILE_TOP_FUNCTIONS)
+        print(f"Wrote {directory / 'profile.pstats'} and {folded_path}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    global STAGE_TIMERS
+    args = parse_args(argv)
+    if args.profile or args.time_stages:
+        STAGE_TIMERS = StageTimers()
+    try:
+        if args.profile:
+            run_profiled(lambda: run_crawl(args), args.profile, args.profiler)
+        else:
+            run_crawl(args)
+    finally:
+        timers, STAGE_TIMERS = STAGE_TIMERS, None
+        if timers is not None and timers.stages:
+            print(timers.report())
+            if args.profile:
+                (args.profile / "stage_timers.json").write_text(
+                    json.dumps(timers.to_json(), indent=2)
+                )
+
+
+def run_crawl(args: argparse.Namespace) -> None:
+    configure_rate_limits(
+        {
+            ITEM_PANEL_ENDPOINT: (args.panel_rate, args.panel_burst),
+            LABEL_ENDPOINT: (args.label_rate, args.label_burst),
+        }
+    )
+    global RESPONSE_CACHE, CORPUS_DIR, LABEL_FAST_PATH, METRICS
+    if args.check_parser_parity:
+        raise SystemExit(check_parser_parity(args.check_parser_parity))
+    if args.benchmark_name_index:
+        raise SystemExit(benchmark_name_index())
+    configure_parser(args.parser)
+    LABEL_FAST_PATH = not args.no_fast_labels
+    CORPUS_DIR = args.record_corpus
+    label_cache: Optional[LabelCache] = None
+    journal: Optional[CrawlJournal] = None
+    try:
+        if not args.no_response_cache:
+            RESPONSE_CACHE = ResponseCache(args.response_cache)
+        if args.metrics or args.metrics_prom:
+            METRICS = CrawlMetrics()
+        session = requests.Session()
+        session.headers.update(SESSION_HEADERS)
+        homepage = request_with_retry(session, "get", BASE_URL).text
+        record_corpus("homepage", homepage)
+        discovered_units = extract_units(homepage)
+        active_units: List[Dict[str, Any]] = []
+        skipped_units: List[str] = []
+        for unit in discovered_units:
+            normalized = normalize_name(unit["name"])
+            if normalized in EXCLUDED_UNIT_TOKENS:
+                skipped_units.append(unit["name"])
+                continue
+            if unit not in active_units:
+                active_units.append(unit)
+        print(
+            f"Discovered {len(discovered_units)} units, "
+            f"processing {len(active_units)} (skipped {len(skipped_units)})"
+        )
+        previous = PreviousDataset.load(args.incremental) if args.incremental else None
+        delta = DatasetDelta(previous) if previous is not None else None
+        if args.incremental and previous is None:
+            print(f"No previous dataset at {args.incremental}, running a full crawl")
+        label_cache = (
+            None
+            if args.no_label_cache
+            else LabelCache(
+                args.label_cache,
+                max_age=args.max_label_age * 3600 if args.max_label_age > 0 else None,
+                max_bytes=int(args.label_cache_max_mb * 1024 * 1024),
+            )
+        )
+        journal = CrawlJournal(args.journal, args.checkpoint_every)
+        if args.resume:
+            journal.load()
+            print(
+                f"Resuming with {len(journal.units)} completed units and "
+                f"{len(journal.labels)} labels from {args.journal}"
+            )
+        journal.open(resume=args.resume)
+        label_store: MutableMapping[int, Dict[str, Any]] = (
+            label_cache if label_cache is not None else {}
+        )
+        for detail_id, data in journal.labels.items():
+            if label_cache is not None:
+                label_cache.store(detail_id, data, journal.label_times[detail_id])
+            else:
+                label_store[detail_id] = data
+        nutrition_cache = JournaledCache(label_store, journal)
+        resumed = {
+            unit["id"]: journal.units[unit["id"]]
+            for unit in active_units
+            if unit["id"] in journal.units
+        }
+        pending_units = [unit for unit in active_units if unit["id"] not in resumed]
+        positions = {unit["id"]: idx for idx, unit in enumerate(active_units)}
+        next_position = 0
+        header = {
+            "source": BASE_URL,
+            "generated_at": datetime.now(timezone.utc).isoformat(),
+            "units_total": len(active_units),
+            "units_skipped": skipped_units,
+            "excluded_names": sorted(EXCLUDED_UNIT_NAMES),
+        }
+        writers: List[Any] = [
+            (StreamingJsonWriter if args.stream else JsonDatasetWriter)(
+                JSON_OUTPUT_PATH,
+                header,
+                SymbolTable() if args.symbols else None,
+                LabelTable() if args.normalize_labels else None,
+            ),
+            StreamingCsvWriter(
+                CSV_OUTPUT_PATH, SymbolTable() if args.symbols else None
+            ),
+        ]
+        if args.ndjson:
+            writers.append(NdjsonItemWriter(args.ndjson))
+        sections = (
+            load_meal_sections(args.meal_sections)
+            if args.meals_csv or args.meal_table
+            else None
+        )
+        if args.meals_csv:
+            writers.append(MealCsvWriter(args.meals_csv, sections))
+        if args.nutrient_matrix:
+            writers.append(NutrientMatrixWriter(args.nutrient_matrix))
+        if args.ingredient_index:
+            writers.append(IngredientIndexWriter(args.ingredient_index))
+        if args.macro_index:
+            writers.append(MacroIndexWriter(args.macro_index))
+        if args.search_index:
+            writers.append(MealSearchIndexWriter(args.search_index))
+        if args.meal_index:
+            writers.append(MealIndexWriter(args.meal_index))
+        if args.meal_table:
+            writers.append(MealTableWriter(args.meal_table, sections))
+        if args.parquet:
+            writers.append(ColumnarItemWriter(args.parquet, "parquet"))
+        if args.arrow:
+            writers.append(ColumnarItemWriter(args.arrow, "arrow"))
+        total_items = 0
+
+        def emit(position: int, record: Dict[str, Any], resumed_unit: bool) -> None:
+            nonlocal total_items
+            for writer in writers:
+                writer.write_unit(record)
+            if delta is not None:
+                delta.add_unit(record)
+            unit = active_units[position]
+            prefix = f"[{position + 1}/{len(active_units)}] Fetching {unit['name']}..."
+            if "error" in record:
+                print(f"{prefix} failed")
+                return
+            total_items += record["item_count"]
+            print(
+                f"{prefix} {record['item_count']} items across "
+                f"{record['category_count']} categories"
+                + (" (resumed)" if resumed_unit else "")
+            )
+
+        def emit_resumed(until: int) -> None:
+            nonlocal next_position
+            while next_position < until:
+                unit_id = active_units[next_position]["id"]
+                if unit_id in resumed:
+                    emit(next_position, resumed[unit_id], True)
+                next_position += 1
+
+        def on_unit(idx: int, unit: Dict[str, Any], record: Dict[str, Any]) -> None:
+            nonlocal next_position
+            position = positions[unit["id"]]
+            emit_resumed(position)
+            journal.record_unit(record)
+            emit(position, record, False)
+            next_position = position + 1
+
+        if args.engine == "async":
+            asyncio.run(
+                crawl_async(
+                    session,
+                    pending_units,
+                    nutrition_cache,
+                    on_unit,
+                    concurrency=args.concurrency,
+                    per_host=args.per_host,
+                    parse_workers=args.parse_workers,
+                    previous=previous,
+                )
+            )
+        else:
+            crawl_sync(session, pending_units, nutrition_cache, on_unit, previous)
+        emit_resumed(len(active_units))
+        for writer in writers:
+            writer.close({"items_total": total_items})
+        print(
+            f"Wrote dataset to {JSON_OUTPUT_PATH} and CSV to {CSV_OUTPUT_PATH} "
+            f"({total_items} items captured)"
+        )
+        if delta is not None:
+            changes = delta.finish()
+            DELTA_OUTPUT_PATH.parent.mkdir(parents=True, exist_ok=True)
+            DELTA_OUTPUT_PATH.write_text(
+                json.dumps(changes, indent=2, ensure_ascii=False)
+            )
+            print(
+                f"Wrote delta to {DELTA_OUTPUT_PATH} ({changes['added_total']} added, "
+                f"{changes['removed_total']} removed, "
+                f"{changes['modified_total']} modified)"
+            )
+        if METRICS is not None:
+            METRICS.write(
+                args.metrics,
+                args.metrics_prom,
+                {"units_total": len(active_units), "items_total": total_items},
+            )
+            for path in (args.metrics, args.metrics_prom):
+                if path:
+                    print(f"Wrote crawl metrics to {path}")
+        journal.complete()
+    finally:
+        if journal is not None:
+            journal.close()
+        if label_cache is not None:
+            label_cache.close()
+        if RESPONSE_CACHE is not None:
+            RESPONSE_CACHE.close()
+            RESPONSE_CACHE = None
+        METRICS = None
+
+
+def iter_unit_items(
+    units: Iterable[Dict[str, Any]]
+) -> Iterator[Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any]]]:
+    for unit in units:
+        for category in unit.get("categories", []):
+            for item in category.get("items", []):
+                yield unit, category, item
+
+
+class SymbolTable:
+    def __init__(self) -> None:
+        self.ids: Dict[str, int] = {}
+        self.values: List[str] = []
+
+    def encode(self, value: Optional[str]) -> Optional[int]:
+        if value is None:
+            return None
+        index = self.ids.get(value)
+        if index is None:
+            index = self.ids[value] = len(self.values)
+            self.values.append(value)
+        return index
+
+    def write_csv(self, path: Path) -> None:
+        with path.open("w", newline="", encoding="utf-8") as handle:
+            writer = csv.writer(handle)
+            writer.writerow(("symbol_id", "value"))
+            writer.writerows(enumerate(self.values))
+
+
+def map_nutrition_symbols(
+    nutrition: Dict[str, Any], convert: Callable[[Any], Any]
+) -> Dict[str, Any]:
+    return {
+        **nutrition,
+        "nutrients": [
+            {
+                **row,
+                **{
+                    field: convert(row[field])
+                    for field in SYMBOL_NUTRIENT_FIELDS
+                    if field in row
+                },
+            }
+            for row in nutrition.get("nutrients") or []
+        ],
+    }
+
+
+def map_symbol_fields(
+    record: Dict[str, Any], convert: Callable[[Any], Any]
+) -> Dict[str, Any]:
+    categories = []
+    for category in record.get("categories", []):
+        items = []
+        for item in category.get("items", []):
+            mapped = dict(item)
+            if "allergens" in item:
+                mapped["allergens"] = [convert(label) for label in item["allergens"]]
+            if item.get("nutrition"):
+                mapped["nutrition"] = map_nutrition_symbols(item["nutrition"], convert)
+            items.append(mapped)
+        categories.append(
+            {
+                **category,
+                **{
+                    field: convert(category[field])
+                    for field in SYMBOL_CATEGORY_FIELDS
+                    if field in category
+                },
+                "items": items,
+            }
+        )
+    return {**record, "categories": categories}
+
+
+def encode_symbols(
+    record: Dict[str, Any], symbols: Optional[SymbolTable]
+) -> Dict[str, Any]:
+    if symbols is None:
+        return record
+    return map_symbol_fields(record, symbols.encode)
+
+
+class LabelTable:
+    def __init__(self) -> None:
+        self.bodies: Dict[str, Dict[str, Any]] = {}
+        self.keys_by_hash: Dict[str, str] = {}
+
+    def add(self, detail_id: Optional[int], nutrition: Dict[str, Any]) -> str:
+        digest = content_hash(json.dumps(nutrition, sort_keys=True, ensure_ascii=False))
+        key = self.keys_by_hash.get(digest)
+        if key is None:
+            key = str(detail_id)
+            if key in self.bodies:
+                key = f"{detail_id}:{digest[:12]}"
+            self.keys_by_hash[digest] = key
+            self.bodies[key] = nutrition
+        return key
+
+    def encoded(self, symbols: Optional[SymbolTable]) -> Dict[str, Dict[str, Any]]:
+        if symbols is None:
+            return self.bodies
+        return {
+            key: map_nutrition_symbols(body, symbols.encode)
+            for key, body in self.bodies.items()
+        }
+
+
+def map_item_labels(
+    record: Dict[str, Any], convert: Callable[[Dict[str, Any]], Dict[str, Any]]
+) -> Dict[str, Any]:
+    return {
+        **record,
+        "categories": [
+            {
+                **category,
+                "items": [convert(item) for item in category.get("items", [])],
+            }
+            for category in record.get("categories", [])
+        ],
+    }
+
+
+def normalize_unit_record(record: Dict[str, Any], labels: LabelTable) -> Dict[str, Any]:
+    def convert(item: Dict[str, Any]) -> Dict[str, Any]:
+        if item.get("nutrition") is None:
+            return item
+        mapped = {key: value for key, value in item.items() if key != "nutrition"}
+        mapped["label_id"] = labels.add(item.get("detail_id"), item["nutrition"])
+        return mapped
+
+    return map_item_labels(record, convert)
+
+
+def denormalize_unit_record(
+    record: Dict[str, Any], labels: Dict[str, Dict[str, Any]]
+) -> Dict[str, Any]:
+    def convert(item: Dict[str, Any]) -> Dict[str, Any]:
+        if "label_id" not in item:
+            return item
+        mapped = {key: value for key, value in item.items() if key != "label_id"}
+        mapped["nutrition"] = labels[item["label_id"]]
+        return mapped
+
+    return map_item_labels(record, convert)
+
+
+def encode_record(
+    record: Dict[str, Any],
+    symbols: Optional[SymbolTable],
+    labels: Optional[LabelTable],
+) -> Dict[str, Any]:
+    if labels is not None:
+        record = normalize_unit_record(record, labels)
+    return encode_symbols(record, symbols)
+
+
+def symbol_decoder(symbols: List[str]) -> Callable[[Any], Any]:
+    return lambda index: sys.intern(symbols[index]) if index is not None else None
+
+
+def symbols_path(path: Path) -> Path:
+    return path.with_name(f"{path.stem}.symbols.csv")
+
+
+def encode_cell(value: Any) -> Optional[str]:
+    return JSON_CELL_ENCODER.encode(value) if value is not None else None
+
+
+def iter_flat_values(units: Iterable[Dict[str, Any]]) -> Iterator[Tuple[Any, ...]]:
+    for unit, category, item in iter_unit_items(units):
+        nutrition = item.get("nutrition") or {}
+        ingredients = nutrition.get("ingredients") or {}
+        yield (
+            unit.get("unit_id"),
+            unit.get("name"),
+            category.get("category_id"),
+            category.get("title"),
+            category.get("selection_guidance"),
+            item.get("detail_id"),
+            item.get("name"),
+            item.get("description"),
+            "; ".join(str(label) for label in item.get("allergens", [])),
+            item.get("serving_display"),
+            encode_cell(item.get("serving_choices")),
+            nutrition.get("calories"),
+            nutrition.get("calories_raw"),
+            nutrition.get("serving_size"),
+            nutrition.get("servings_per_container"),
+            ingredients.get("raw"),
+            encode_cell(ingredients.get("list")),
+            encode_cell(nutrition.get("nutrients")),
+        )
+
+
+def dietary_flag(label: str) -> Optional[str]:
+    key = DIETARY_LABEL_PREFIX.sub("", normalize_name(label))
+    flag = DIETARY_FLAG_ALIASES.get(key, key.replace(" ", "_"))
+    return flag if flag in DIETARY_FLAG_BITS else None
+
+
+def allergen_mask(
+    labels: Iterable[str], unmapped: Optional[Dict[str, int]] = None
+) -> int:
+    mask = 0
+    for label in labels:
+        flag = dietary_flag(label)
+        if flag:
+            mask |= DIETARY_FLAG_BITS[flag]
+        elif unmapped is not None:
+            unmapped[label] = unmapped.get(label, 0) + 1
+    return mask
+
+
+def ingredient_token(word: str) -> str:
+    irregular = INGREDIENT_IRREGULAR_FORMS.get(word)
+    if irregular:
+        return irregular
+    if len(word) <= 3:
+        return word
+    if len(word) > 4 and word.endswith("ies"):
+        stem = word[:-3] + "i"
+    elif word.endswith(("sses", "ches", "shes", "xes", "oes")):
+        stem = word[:-2]
+    elif word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        stem = word[:-1]
+    else:
+        stem = word
+    if stem.endswith(("che", "she", "oe")):
+        return stem[:-1]
+    if len(stem) > 3 and stem.endswith("ie"):
+        return stem[:-1]
+    if len(stem) > 3 and stem.endswith("y") and stem[-2] not in "aeiou":
+        return stem[:-1] + "i"
+    return stem
+
+
+def ingredient_tokens(value: Optional[str]) -> List[str]:
+    return [
+        ingredient_token(word)
+        for word in normalize_name(value or "").split()
+        if word not in INGREDIENT_STOPWORDS and not word.isdigit()
+    ]
+
+
+def encode_postings(row_ids: Iterable[int]) -> bytes:
+    encoded = bytearray()
+    previous = 0
+    for row_id in row_ids:
+        delta = row_id - previous
+        previous = row_id
+        while delta >= 0x80:
+            encoded.append(delta & 0x7F | 0x80)
+            delta >>= 7
+        encoded.append(delta)
+    return bytes(encoded)
+
+
+def decode_postings(data: bytes) -> array:
+    row_ids = array("I")
+    current = shift = value = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        current += value
+        row_ids.append(current)
+        shift = value = 0
+    return row_ids
+
+
+class IngredientIndex:
+    def __init__(self) -> None:
+        self.detail_ids: List[Optional[int]] = []
+        self.postings: Dict[str, array] = {}
+
+    @classmethod
+    def read(cls, path: Path) -> "IngredientIndex":
+        data = path.read_bytes()
+        magic, row_count, term_count, string_bytes, posting_bytes = (
+            INGREDIENT_INDEX_HEADER.unpack_from(data)
+        )
+        if magic != INGREDIENT_INDEX_MAGIC:
+            raise ValueError(f"{path} is not an ingredient index")
+        offset = INGREDIENT_INDEX_HEADER.size
+        index = cls()
+        index.detail_ids = [
+            detail_id if detail_id >= 0 else None
+            for detail_id in struct.unpack_from(f"<{row_count}q", data, offset)
+        ]
+        offset += 8 * row_count
+        term_bounds = struct.unpack_from(f"<{term_count + 1}I", data, offset)
+        offset += 4 * (term_count + 1)
+        posting_bounds = struct.unpack_from(f"<{term_count + 1}I", data, offset)
+        offset += 4 * (term_count + 1)
+        strings = data[offset : offset + string_bytes]
+        offset += string_bytes
+        blob = data[offset : offset + posting_bytes]
+        for term_id in range(term_count):
+            term = strings[term_bounds[term_id] : term_bounds[term_id + 1]]
+            index.postings[term.decode("utf-8")] = decode_postings(
+                blob[posting_bounds[term_id] : posting_bounds[term_id + 1]]
+            )
+        return index
+
+    def add(self, detail_id: Optional[int], ingredients: Iterable[str]) -> None:
+        row_id = len(self.detail_ids)
+        self.detail_ids.append(detail_id)
+        tokens = {
+            token for ingredient in ingredients for token in ingredient_tokens(ingredient)
+        }
+        for token in sorted(tokens):
+            self.postings.setdefault(token, array("I")).append(row_id)
+
+    def matching(self, phrase: str) -> set:
+        tokens = ingredient_tokens(phrase)
+        if not tokens:
+            raise ValueError(f"no ingredient tokens in {phrase!r}")
+        rows = set(self.postings.get(tokens[0], ()))
+        for token in tokens[1:]:
+            rows.intersection_update(self.postings.get(token, ()))
+        return rows
+
+    def query(
+        self, include: Iterable[str] = (), exclude: Iterable[str] = ()
+    ) -> List[int]:
+        rows: Optional[set] = None
+        for phrase in include:
+            matches = self.matching(phrase)
+            rows = matches if rows is None else rows & matches
+        if rows is None:
+            rows = set(range(len(self.detail_ids)))
+        for phrase in exclude:
+            rows -= self.matching(phrase)
+        return sorted(rows)
+
+    def write(self, path: Path) -> None:
+        terms = sorted(self.postings)
+        encoded_terms = [term.encode("utf-8") for term in terms]
+        encoded_postings = [encode_postings(self.postings[term]) for term in terms]
+        term_bounds = [0]
+        for term in encoded_terms:
+            term_bounds.append(term_bounds[-1] + len(term))
+        posting_bounds = [0]
+        for postings in encoded_postings:
+            posting_bounds.append(posting_bounds[-1] + len(postings))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("wb") as handle:
+            handle.write(
+                INGREDIENT_INDEX_HEADER.pack(
+                    INGREDIENT_INDEX_MAGIC,
+                    len(self.detail_ids),
+                    len(terms),
+                    term_bounds[-1],
+                    posting_bounds[-1],
+                )
+            )
+            handle.write(
+                struct.pack(
+                    f"<{len(self.detail_ids)}q",
+                    *(-1 if value is None else value for value in self.detail_ids),
+                )
+            )
+            handle.write(struct.pack(f"<{len(term_bounds)}I", *term_bounds))
+            handle.write(struct.pack(f"<{len(posting_bounds)}I", *posting_bounds))
+            handle.write(b"".join(encoded_terms))
+            handle.write(b"".join(encoded_postings))
+
+
+NutrientSource = Tuple[Optional[int], Optional[int], List[Dict[str, Any]]]
+
+
+class NutrientMatrix:
+    def __init__(
+        self,
+        values: Any,
+        mask: Any,
+        keys: List[str],
+        units: List[Optional[str]],
+        unit_ids: Any,
+        detail_ids: Any,
+    ) -> None:
+        self.values = values
+        self.mask = mask
+        self.keys = keys
+        self.units = units
+        self.unit_ids = unit_ids
+        self.detail_ids = detail_ids
+        self.columns = {key: column for column, key in enumerate(keys)}
+
+    @classmethod
+    def from_items(cls, items: Iterable[NutrientSource]) -> "NutrientMatrix":
+        import numpy as np
+
+        columns: Dict[str, int] = {}
+        units: List[Optional[str]] = []
+        rows: List[Dict[int, Tuple[float, Optional[str]]]] = []
+        unit_ids: List[int] = []
+        detail_ids: List[int] = []
+        for unit_id, detail_id, nutrients in items:
+            values: Dict[int, Tuple[float, Optional[str]]] = {}
+            seen = set()
+            for row in nutrients:
+                key = row.get("key")
+                if not key or key in seen:
+                    continue
+                seen.add(key)
+                if key not in columns:
+                    columns[key] = len(units)
+                    units.append(None)
+                column = columns[key]
+                quantity = row.get("quantity")
+                if quantity is None:
+                    continue
+                if units[column] is None and row.get("unit"):
+                    units[column] = row["unit"]
+                values[column] = (quantity, row.get("unit"))
+            rows.append(values)
+            unit_ids.append(-1 if unit_id is None else unit_id)
+            detail_ids.append(-1 if detail_id is None else detail_id)
+        matrix = np.zeros((len(rows), len(units)), dtype=np.float32)
+        mask = np.zeros((len(rows), len(units)), dtype=bool)
+        for row_id, values in enumerate(rows):
+            for column, (quantity, unit) in values.items():
+                converted = convert_quantity(quantity, unit, units[column])
+                if converted is not None:
+                    matrix[row_id, column] = converted
+                    mask[row_id, column] = True
+        return cls(
+            matrix,
+            mask,
+            list(columns),
+            units,
+            np.array(unit_ids, dtype=np.int32),
+            np.array(detail_ids, dtype=np.int64),
+        )
+
+    @classmethod
+    def from_units(cls, units: Iterable[Dict[str, Any]]) -> "NutrientMatrix":
+        return cls.from_items(
+            (
+                unit.get("unit_id"),
+                item.get("detail_id"),
+                (item.get("nutrition") or {}).get("nutrients") or [],
+            )
+            for unit, _, item in iter_unit_items(units)
+        )
+
+    @classmethod
+    def load(cls, path: Path) -> "NutrientMatrix":
+        import numpy as np
+
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                data["values"],
+                data["mask"],
+                [str(key) for key in data["keys"]],
+                [str(unit) or None for unit in data["units"]],
+                data["unit_ids"],
+                data["detail_ids"],
+            )
+
+    def save(self, path: Path) -> None:
+        import numpy as np
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("wb") as handle:
+            np.savez(
+                handle,
+                values=self.values,
+                mask=self.mask,
+                keys=np.array(self.keys, dtype=str),
+                units=np.array([unit or "" for unit in self.units], dtype=str),
+                unit_ids=self.unit_ids,
+                detail_ids=self.detail_ids,
+            )
+
+    def column(self, key: str) -> Any:
+        import numpy as np
+
+        column = self.columns[key]
+        return np.where(self.mask[:, column], self.values[:, column], np.nan)
+
+    def totals(self, rows: Any = None) -> Dict[str, float]:
+        import numpy as np
+
+        present = np.where(self.mask, self.values, 0)
+        if rows is not None:
+            present = present[rows]
+        sums = present.sum(axis=0, dtype=np.float64)
+        return dict(zip(self.keys, sums.tolist()))
+
+    def unit_stats(self) -> Dict[int, Dict[str, Any]]:
+        import numpy as np
+
+        unit_ids, groups = np.unique(self.unit_ids, return_inverse=True)
+        shape = (len(unit_ids), len(self.keys))
+        counts = np.zeros(shape, dtype=np.int64)
+        sums = np.zeros(shape, dtype=np.float64)
+        lows = np.full(shape, np.inf)
+        highs = np.full(shape, -np.inf)
+        np.add.at(counts, groups, self.mask)
+        np.add.at(sums, groups, np.where(self.mask, self.values, 0))
+        np.minimum.at(lows, groups, np.where(self.mask, self.values, np.inf))
+        np.maximum.at(highs, groups, np.where(self.mask, self.values, -np.inf))
+        empty = counts == 0
+        means = np.divide(sums, counts, out=np.full(shape, np.nan), where=~empty)
+        lows[empty] = np.nan
+        highs[empty] = np.nan
+        return {
+            int(unit_id): {
+                "count": counts[group],
+                "sum": sums[group],
+                "mean": means[group],
+                "min": lows[group],
+                "max": highs[group],
+            }
+            for group, unit_id in enumerate(unit_ids)
+        }
+
+    def scaled(self, servings: Any) -> "NutrientMatrix":
+        import numpy as np
+
+        factors = np.asarray(servings, dtype=np.float32)
+        if factors.ndim == 1:
+            factors = factors[:, None]
+        return NutrientMatrix(
+            (self.values * factors).astype(np.float32),
+            self.mask.copy(),
+            list(self.keys),
+            list(self.units),
+            self.unit_ids.copy(),
+            self.detail_ids.copy(),
+        )
+
+
+def meal_key(value: Optional[str]) -> str:
+    return re.sub(r"[^a-z0-9]", "", (value or "").lower())
+
+
+def meal_keys_digest(keys: Iterable[str]) -> str:
+    return content_hash("\n".join(keys))
+
+
+def meal_macros(nutrition: Dict[str, Any]) -> Dict[str, float]:
+    nutrients: Dict[str, Dict[str, Any]] = {}
+    for row in nutrition.get("nutrients") or []:
+        nutrients.setdefault(row.get("key"), row)
+    macros = {"calories": float(nutrition.get("calories") or 0)}
+    for field, keys, unit in MEAL_MACRO_SOURCES:
+        value = None
+        for key in keys:
+            row = nutrients.get(key)
+            if row is not None:
+                value = convert_quantity(row.get("quantity"), row.get("unit"), unit)
+                break
+        macros[field] = value or 0.0
+    return macros
+
+
+MealSections = Dict[Tuple[str, str, str], str]
+
+
+def load_meal_sections(path: Optional[Path]) -> MealSections:
+    if path is None or not path.exists():
+        return {}
+    with path.open(newline="", encoding="utf-8") as handle:
+        return {
+            (row["location"], row["category"], row["item_name"]): row["meal_section"]
+            for row in csv.DictReader(handle)
+            if row.get("meal_section")
+        }
+
+
+def meal_section(
+    sections: Optional[MealSections], location: str, category: str, item_name: str
+) -> str:
+    if sections:
+        known = sections.get((location, category, item_name))
+        if known:
+            return known
+    title = f" {normalize_name(category)} "
+    for keyword, section in MEAL_SECTION_KEYWORDS:
+        if f" {keyword} " in title:
+            return section
+    return DEFAULT_MEAL_SECTION
+
+
+def iter_meal_rows(
+    units: Iterable[Dict[str, Any]], sections: Optional[MealSections] = None
+) -> Iterator[Dict[str, Any]]:
+    for unit, category, item in iter_unit_items(units):
+        nutrition = item.get("nutrition") or {}
+        ingredients = nutrition.get("ingredients") or {}
+        location = unit.get("name") or ""
+        title = category.get("title") or ""
+        name = item.get("name") or ""
+        yield {
+            "location": location,
+            "meal_section": meal_section(sections, location, title, name),
+            "category": title,
+            "item_name": name,
+            "serving_size": item.get("serving_display")
+            or nutrition.get("serving_size")
+            or "",
+            "ingredients": ingredients.get("raw") or "",
+            **meal_macros(nutrition),
+        }
+
+
+class MacroIndex:
+    def __init__(self, rows: Iterable[Dict[str, Any]]) -> None:
+        self.values = [
+            tuple(float(row[field]) for field in MEAL_MACRO_FIELDS) for row in rows
+        ]
+        self.columns: Dict[str, List[int]] = {}
+        self.sorted_values: Dict[str, List[float]] = {}
+        for axis, field in enumerate(MEAL_MACRO_FIELDS):
+            order = sorted(
+                range(len(self.values)), key=lambda row_id: self.values[row_id][axis]
+            )
+            self.columns[field] = order
+            self.sorted_values[field] = [self.values[row_id][axis] for row_id in order]
+        self.scales: List[float] = []
+        for field in MEAL_MACRO_FIELDS:
+            column = self.sorted_values[field]
+            spread = 0.0
+            if column:
+                mean = sum(column) / len(column)
+                spread = math.sqrt(
+                    sum((value - mean) ** 2 for value in column) / len(column)
+                )
+            self.scales.append(spread or 1.0)
+        self.points = [
+            tuple(value / scale for value, scale in zip(values, self.scales))
+            for values in self.values
+        ]
+        self.trees: Dict[Tuple[int, ...], Optional[List[Any]]] = {}
+
+    @classmethod
+    def from_meal_table(cls, path: Path) -> "MacroIndex":
+        return cls(read_meal_table(path))
+
+    def tree(self, axes: Tuple[int, ...]) -> Optional[List[Any]]:
+        if axes not in self.trees:
+            self.trees[axes] = self.build_tree(list(range(len(self.points))), axes, 0)
+        return self.trees[axes]
+
+    def build_tree(
+        self, row_ids: List[int], axes: Tuple[int, ...], depth: int
+    ) -> Optional[List[Any]]:
+        if not row_ids:
+            return None
+        axis = axes[depth % len(axes)]
+        row_ids.sort(key=lambda row_id: self.points[row_id][axis])
+        middle = len(row_ids) // 2
+        return [
+            row_ids[middle],
+            axis,
+            self.build_tree(row_ids[:middle], axes, depth + 1),
+            self.build_tree(row_ids[middle + 1 :], axes, depth + 1),
+        ]
+
+    def range(self, **bounds: Tuple[Optional[float], Optional[float]]) -> List[int]:
+        unknown = set(bounds) - set(MEAL_MACRO_FIELDS)
+        if unknown:
+            raise ValueError(f"unknown macro fields: {sorted(unknown)}")
+        if not bounds:
+            return list(range(len(self.values)))
+        slices = []
+        for field, (low, high) in bounds.items():
+            values = self.sorted_values[field]
+            start = bisect.bisect_left(values, low) if low is not None else 0
+            end = bisect.bisect_right(values, high) if high is not None else len(values)
+            slices.append((end - start, field, start, end))
+        _, field, start, end = min(slices)
+        checks = [
+            (MEAL_MACRO_FIELDS.index(name), low, high)
+            for name, (low, high) in bounds.items()
+        ]
+        return sorted(
+            row_id
+            for row_id in self.columns[field][start:end]
+            if all(
+                (low is None or self.values[row_id][axis] >= low)
+                and (high is None or self.values[row_id][axis] <= high)
+                for axis, low, high in checks
+            )
+        )
+
+    def nearest(self, profile: Dict[str, float], k: int = 10) -> List[Tuple[int, float]]:
+        unknown = set(profile) - set(MEAL_MACRO_FIELDS)
+        if unknown:
+            raise ValueError(f"unknown macro fields: {sorted(unknown)}")
+        if k <= 0:
+            return []
+        target = [
+            profile[field] / scale if field in profile else None
+            for field, scale in zip(MEAL_MACRO_FIELDS, self.scales)
+        ]
+        active = [(axis, value) for axis, value in enumerate(target) if value is not None]
+        if not active:
+            return [(row_id, 0.0) for row_id in range(min(k, len(self.points)))]
+        best: List[Tuple[float, int]] = []
+
+        def visit(node: Optional[List[Any]]) -> None:
+            if node is None:
+                return
+            row_id, axis, left, right = node
+            point = self.points[row_id]
+            distance = sum((point[dim] - value) ** 2 for dim, value in active)
+            heapq.heappush(best, (-distance, -row_id))
+            if len(best) > k:
+                heapq.heappop(best)
+            delta = target[axis] - point[axis]
+            near, far = (left, right) if delta < 0 else (right, left)
+            visit(near)
+            if len(best) < k or delta * delta <= -best[0][0]:
+                visit(far)
+
+        visit(self.tree(tuple(axis for axis, _ in active)))
+        return [
+            (-row_id, math.sqrt(-distance))
+            for distance, row_id in sorted(best, reverse=True)
+        ]
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "version": MACRO_INDEX_VERSION,
+            "row_count": len(self.values),
+            "columns": self.columns,
+        }
+
+
+def search_tokens(value: Optional[str]) -> List[str]:
+    return normalize_name(value or "").split()
+
+
+def item_search_tokens(category: Dict[str, Any], item: Dict[str, Any]) -> List[str]:
+    nutrition = item.get("nutrition") or {}
+    ingredients = nutrition.get("ingredients") or {}
+    tokens = search_tokens(item.get("name"))
+    tokens += search_tokens(item.get("description"))
+    tokens += search_tokens(category.get("title"))
+    for ingredient in ingredients.get("list") or []:
+        tokens += search_tokens(ingredient)
+    return tokens
+
+
+class MealSearchIndex:
+    def __init__(self) -> None:
+        self.term_counts: Dict[str, Dict[int, int]] = {}
+        self.lengths: List[int] = []
+        self._impacts: Optional[Dict[str, List[Tuple[int, float]]]] = None
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> "MealSearchIndex":
+        if data.get("version") != SEARCH_INDEX_VERSION:
+            raise ValueError("unsupported search index version")
+        index = cls()
+        index.lengths = [0] * data["row_count"]
+        index._impacts = {
+            term: list(zip(flat[::2], flat[1::2]))
+            for term, flat in data["postings"].items()
+        }
+        return index
+
+    def add(self, tokens: List[str]) -> None:
+        row_id = len(self.lengths)
+        self.lengths.append(len(tokens))
+        for token in tokens:
+            counts = self.term_counts.setdefault(token, {})
+            counts[row_id] = counts.get(row_id, 0) + 1
+        self._impacts = None
+
+    @property
+    def impacts(self) -> Dict[str, List[Tuple[int, float]]]:
+        if self._impacts is None:
+            rows = len(self.lengths)
+            average = sum(self.lengths) / rows if rows else 0.0
+            self._impacts = {}
+            for term, counts in self.term_counts.items():
+                idf = math.log(1 + (rows - len(counts) + 0.5) / (len(counts) + 0.5))
+                self._impacts[term] = [
+                    (
+                        row_id,
+                        idf
+                        * count
+                        * (BM25_K1 + 1)
+                        / (
+                            count
+                            + BM25_K1
+                            * (1 - BM25_B + BM25_B * self.lengths[row_id] / average)
+                        ),
+                    )
+                    for row_id, count in counts.items()
+                ]
+        return self._impacts
+
+    def search(
+        self,
+        query: Optional[str],
+        limit: int = DEFAULT_SEARCH_LIMIT,
+        candidates: Optional[Iterable[int]] = None,
+    ) -> List[Tuple[int, float]]:
+        allowed = set(candidates) if candidates is not None else None
+        scores: Dict[int, float] = {}
+        for token in set(search_tokens(query)):
+            for row_id, weight in self.impacts.get(token, ()):
+                if allowed is None or row_id in allowed:
+                    scores[row_id] = scores.get(row_id, 0.0) + weight
+        return heapq.nlargest(
+            limit, scores.items(), key=lambda entry: (entry[1], -entry[0])
+        )
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "version": SEARCH_INDEX_VERSION,
+            "row_count": len(self.lengths),
+            "postings": {
+                term: [
+                    value
+                    for row_id, weight in postings
+                    for value in (row_id, round(weight, 4))
+                ]
+                for term, postings in self.impacts.items()
+            },
+        }
+
+
+def name_trigrams(key: str) -> set:
+    return {key[i : i + 3] for i in range(len(key) - 2)}
+
+
+class MealNameIndex:
+    def __init__(self) -> None:
+        self.keys: List[str] = []
+        self.exact: Dict[str, List[int]] = {}
+        self.trigrams: Dict[str, List[int]] = {}
+
+    def add(self, key: str) -> None:
+        row_id = len(self.keys)
+        self.keys.append(key)
+        self.exact.setdefault(key, []).append(row_id)
+        for gram in sorted(name_trigrams(key)):
+            self.trigrams.setdefault(gram, []).append(row_id)
+
+    def lookup(self, name: Optional[str]) -> Optional[int]:
+        target = meal_key(name)
+        if not target:
+            return None
+        bucket = self.exact.get(target)
+        if bucket:
+            return bucket[0]
+        substrings = {
+            target[start:end]
+            for start in range(len(target))
+            for end in range(start, len(target) + 1)
+        }
+        contained = [
+            self.exact[key][0] for key in substrings if key in self.exact
+        ]
+        if contained:
+            return min(contained)
+        grams = name_trigrams(target)
+        if not grams:
+            return linear_name_lookup(self.keys, target, include_contained=False)
+        postings = [self.trigrams.get(gram) for gram in grams]
+        if not all(postings):
+            return None
+        for row_id in min(postings, key=len):
+            if target in self.keys[row_id]:
+                return row_id
+        return None
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "version": NAME_INDEX_VERSION,
+            "keys": self.keys,
+            "exact": self.exact,
+            "trigrams": self.trigrams,
+        }
+
+
+def linear_name_lookup(
+    keys: List[str], name: Optional[str], include_contained: bool = True
+) -> Optional[int]:
+    target = meal_key(name)
+    if not target:
+        return None
+    for row_id, key in enumerate(keys):
+        if key == target:
+            return row_id
+    if include_contained:
+        for row_id, key in enumerate(keys):
+            if key in target:
+                return row_id
+    for row_id, key in enumerate(keys):
+        if target in key:
+            return row_id
+    return None
+
+
+def benchmark_name_index(sizes: Iterable[int] = NAME_BENCHMARK_SIZES) -> int:
+    rng = random.Random(0)
+    words = NAME_BENCHMARK_WORDS
+    print(f"{'items':>8} {'build ms':>9} {'linear us':>10} {'index us':>9} {'speedup':>8}")
+    for size in sizes:
+        names = [
+            " ".join(rng.sample(words, rng.randint(2, 4))) + f" {row_id}"
+            for row_id in range(size)
+        ]
+        queries: List[str] = []
+        for _ in range(NAME_BENCHMARK_QUERIES):
+            name = rng.choice(names)
+            queries.append(
+                rng.choice(
+                    (name, f"the {name} special", name[2:-1], "unlisted dish")
+                )
+            )
+        keys = [meal_key(name) for name in names]
+        started = time.perf_counter()
+        index = MealNameIndex()
+        for key in keys:
+            index.add(key)
+        build_ms = (time.perf_counter() - started) * 1000
+        started = time.perf_counter()
+        expected = [linear_name_lookup(keys, query) for query in queries]
+        linear_us = (time.perf_counter() - started) * 1e6 / len(queries)
+        started = time.perf_counter()
+        found = [index.lookup(query) for query in queries]
+        index_us = (time.perf_counter() - started) * 1e6 / len(queries)
+        if found != expected:
+            print(f"{size}: index results differ from the linear scan")
+            return 1
+        print(
+            f"{size:>8} {build_ms:>9.1f} {linear_us:>10.1f} {index_us:>9.1f} "
+            f"{linear_us / max(index_us, 1e-9):>7.1f}x"
+        )
+    return 0
+
+
+def format_macro(value: float) -> str:
+    return f"{value:.3f}".rstrip("0").rstrip(".")
+
+
+def read_meal_table(path: Path) -> List[Dict[str, Any]]:
+    data = path.read_bytes()
+    magic, row_count, string_count, string_bytes = MEAL_TABLE_HEADER.unpack_from(
+        data
+    )
+    if magic != MEAL_TABLE_MAGIC:
+        raise ValueError(f"{path} is not a meal table")
+    offset = MEAL_TABLE_HEADER.size
+    bounds = struct.unpack_from(f"<{string_count + 1}I", data, offset)
+    offset += 4 * (string_count + 1)
+    blob = data[offset : offset + string_bytes]
+    strings = [
+        blob[bounds[i] : bounds[i + 1]].decode("utf-8") for i in range(string_count)
+    ]
+    offset += string_bytes + (-string_bytes % 4)
+    rows: List[Dict[str, Any]] = []
+    for values in MEAL_ROW_STRUCT.iter_unpack(
+        data[offset : offset + row_count * MEAL_ROW_STRUCT.size]
+    ):
+        row: Dict[str, Any] = {
+            field: strings[index]
+            for field, index in zip(MEAL_STRING_FIELDS, values[:7])
+        }
+        row.update(zip(MEAL_MACRO_FIELDS, values[7:]))
+        rows.append(row)
+    return rows
+
+
+def json_member(key: str, value: Any, indent: str) -> str:
+    text = json.dumps(value, indent=2, ensure_ascii=False).replace("\n", "\n" + indent)
+    return f"{indent}{json.dumps(key)}: {text}"
+
+
+class JsonDatasetWriter:
+    def __init__(
+        self,
+        path: Path,
+        header: Dict[str, Any],
+        symbols: Optional[SymbolTable] = None,
+        label_table: Optional[LabelTable] = None,
+    ) -> None:
+        self.path = path
+        self.header = header
+        self.symbols = symbols
+        self.label_table = label_table
+        self.units: List[Dict[str, Any]] = []
+
+    def write_unit(self, record: Dict[str, Any]) -> None:
+        self.units.append(record)
+
+    def close(self, summary: Dict[str, Any]) -> None:
+        payload = {
+            "source": self.header["source"],
+            "generated_at": self.header["generated_at"],
+            "units_total": self.header["units_total"],
+            "units_skipped": self.header["units_skipped"],
+            "items_total": summary["items_total"],
+            "excluded_names": self.header["excluded_names"],
+            "units": [
+                encode_record(unit, self.symbols, self.label_table)
+                for unit in self.units
+            ],
+        }
+        if self.label_table is not None:
+            payload["labels"] = self.label_table.encoded(self.symbols)
+        if self.symbols is not None:
+            payload["symbols"] = self.symbols.values
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(json.dumps(payload, indent=2, ensure_ascii=False))
+
+
+class StreamingJsonWriter:
+    def __init__(
+        self,
+        path: Path,
+        header: Dict[str, Any],
+        symbols: Optional[SymbolTable] = None,
+        label_table: Optional[LabelTable] = None,
+    ) -> None:
+        self.path = path
+        self.symbols = symbols
+        self.label_table = label_table
+        self.partial_path = path.with_name(path.name + ".partial")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.handle = self.partial_path.open("w", encoding="utf-8")
+        self.handle.write("{\n")
+        for key, value in header.items():
+            self.handle.write(json_member(key, value, "  ") + ",\n")
+        self.handle.write('  "units": [')
+        self.unit_count = 0
+
+    def write_unit(self, record: Dict[str, Any]) -> None:
+        text = json.dumps(
+            encode_record(record, self.symbols, self.label_table),
+            indent=2,
+            ensure_ascii=False,
+        )
+        self.handle.write("," if self.unit_count else "")
+        self.handle.write("\n    " + text.replace("\n", "\n    "))
+        self.handle.flush()
+        self.unit_count += 1
+
+    def close(self, summary: Dict[str, Any]) -> None:
+        self.handle.write("\n  ]" if self.unit_count else "]")
+        for key, value in summary.items():
+            self.handle.write(",\n" + json_member(key, value, "  "))
+        if self.label_table is not None:
+            labels = self.label_table.encoded(self.symbols)
+            self.handle.write(",\n" + json_member("labels", labels, "  "))
+        if self.symbols is not None:
+            self.handle.write(",\n" + json_member("symbols", self.symbols.values, "  "))
+        self.handle.write("\n}")
+        self.handle.close()
+        os.replace(self.partial_path, self.path)
+
+
+class NdjsonItemWriter:
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.partial_path = path.with_name(path.name + ".partial")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.handle = self.partial_path.open("w", encoding="utf-8")
+
+    def write_unit(self, record: Dict[str, Any]) -> None:
+        for category in record.get("categories", []):
+            for item in category.get("items", []):
+                line = {
+                    "unit_id": record.get("unit_id"),
+                    "unit_name": record.get("name"),
+                    "category_id": category.get("category_id"),
+                    "category_title": category.get("title"),
+                    "category_guidance": category.get("selection_guidance"),
+                    **item,
+                }
+                self.handle.write(json.dumps(line, ensure_ascii=False) + "\n")
+        self.handle.flush()
+
+    def close(self, summary: Dict[str, Any]) -> None:
+        self.handle.close()
+        os.replace(self.partial_path, self.path)
+
+
+class StreamingCsvWriter:
+    def __init__(self, path: Path, symbols: Optional[SymbolTable] = None) -> None:
+        self.path = path
+        self.symbols = symbols
+        self.partial_path = path.with_name(path.name + ".partial")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.handle = self.partial_path.open("w", newline="", encoding="utf-8")
+        self.writer = csv.writer(self.handle)
+        self.row_count = 0
+
+    def write_unit(self, record: Dict[str, Any]) -> None:
+        if self.symbols is not None:
+            record = encode_symbols(record, self.symbols)
+            record["name"] = self.symbols.encode(record.get("name"))
+        for values in iter_flat_values([record]):
+            if not self.row_count:
+                self.writer.writerow(CSV_FIELDNAMES)
+            self.writer.writerow(values)
+            self.row_count += 1
+        self.handle.flush()
+
+    def close(self, summary: Dict[str, Any]) -> None:
+        self.handle.close()
+        os.replace(self.partial_path, self.path)
+        if self.symbols is not None:
+            self.symbols.write_csv(symbols_path(self.path))
+
+
+class MealCsvWriter(StreamingCsvWriter):
+    def __init__(self, path: Path, sections: Optional[MealSections] = None) -> None:
+        super().__init__(path)
+        self.sections = sections
+
+    def write_unit(self, record: Dict[str, Any]) -> None:
+        for row in iter_meal_rows([record], self.sections):
+            if not self.row_count:
+                self.writer.writerow(MEALS_CSV_FIELDNAMES)
+            self.writer.writerow(
+                [row[field] for field in MEALS_CSV_FIELDNAMES[:6]]
+                + [format_macro(row[field]) for field in MEAL_MACRO_FIELDS]
+            )
+            self.row_count += 1
+        self.handle.flush()
+
+
+class NutrientMatrixWriter:
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.items: List[NutrientSource] = []
+
+    def write_unit(self, record: Dict[str, Any]) -> None:
+        for unit, _, item in iter_unit_items([record]):
+            nutrition = item.get("nutrition") or {}
+            self.items.append(
+                (
+                    unit.get("unit_id"),
+                    item.get("detail_id"),
+                    nutrition.get("nutrients") or [],
+                )
+            )
+
+    def close(self, summary: Dict[str, Any]) -> None:
+        NutrientMatrix.from_items(self.items).save(self.path)
+
+
+class IngredientIndexWriter:
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.index = IngredientIndex()
+
+    def write_unit(self, record: Dict[str, Any]) -> None:
+        for _, _, item in iter_unit_items([record]):
+            nutrition = item.get("nutrition") or {}
+            ingredients = nutrition.get("ingredients") or {}
+            self.index.add(item.get("detail_id"), ingredients.get("list") or [])
+
+    def close(self, summary: Dict[str, Any]) -> None:
+        self.index.write(self.path)
+
+
+class MacroIndexWriter:
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.rows: List[Dict[str, Any]] = []
+        self.keys: List[str] = []
+
+    def write_unit(self, record: Dict[str, Any]) -> None:
+        for row in iter_meal_rows([record]):
+            self.rows.append({field: row[field] for field in MEAL_MACRO_FIELDS})
+            self.keys.append(meal_key(row["item_name"]))
+
+    def close(self, summary: Dict[str, Any]) -> None:
+        payload = MacroIndex(self.rows).to_json()
+        payload["keys_sha256"] = meal_keys_digest(self.keys)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("w", encoding="utf-8") as handle:
+            json.dump(payload, handle, separators=(",", ":"))
+
+
+class MealSearchIndexWriter:
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.index = MealSearchIndex()
+        self.keys: List[str] = []
+
+    def write_unit(self, record: Dict[str, Any]) -> None:
+        for _, category, item in iter_unit_items([record]):
+            self.index.add(item_search_tokens(category, item))
+            self.keys.append(meal_key(item.get("name")))
+
+    def close(self, summary: Dict[str, Any]) -> None:
+        payload = self.index.to_json()
+        payload["keys_sha256"] = meal_keys_digest(self.keys)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("w", encoding="utf-8") as handle:
+            json.dump(payload, handle, separators=(",", ":"))
+
+
+class MealIndexWriter:
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.index = MealNameIndex()
+
+    def write_unit(self, record: Dict[str, Any]) -> None:
+        for row in iter_meal_rows([record]):
+            self.index.add(meal_key(row["item_name"]))
+
+    def close(self, summary: Dict[str, Any]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("w", encoding="utf-8") as handle:
+            json.dump(self.index.to_json(), handle, separators=(",", ":"))
+
+
+class MealTableWriter:
+    def __init__(self, path: Path, sections: Optional[MealSections] = None) -> None:
+        self.path = path
+        self.sections = sections
+        self.string_ids: Dict[str, int] = {}
+        self.rows = bytearray()
+        self.row_count = 0
+
+    def intern(self, value: str) -> int:
+        index = self.string_ids.get(value)
+        if index is None:
+            index = self.string_ids[value] = len(self.string_ids)
+        return index
+
+    def write_unit(self, record: Dict[str, Any]) -> None:
+        for row in iter_meal_rows([record], self.sections):
+            row["name_key"] = meal_key(row["item_name"])
+            self.rows += MEAL_ROW_STRUCT.pack(
+                *(self.intern(row[field]) for field in MEAL_STRING_FIELDS),
+                *(row[field] for field in MEAL_MACRO_FIELDS),
+            )
+            self.row_count += 1
+
+    def close(self, summary: Dict[str, Any]) -> None:
+        encoded = [value.encode("utf-8") for value in self.string_ids]
+        bounds = [0]
+        for value in encoded:
+            bounds.append(bounds[-1] + len(value))
+        blob = b"".join(encoded)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("wb") as handle:
+            handle.write(
+                MEAL_TABLE_HEADER.pack(
+                    MEAL_TABLE_MAGIC, self.row_count, len(encoded), len(blob)
+                )
+            )
+            handle.write(struct.pack(f"<{len(bounds)}I", *bounds))
+            handle.write(blob)
+            handle.write(b"\x00" * (-len(blob) % 4))
+            handle.write(self.rows)
+
+
+class ColumnarItemWriter:
+    def __init__(self, path: Path, file_format: str) -> None:
+        import pyarrow  # noqa: F401
+
+        self.path = path
+        self.file_format = file_format
+        self.columns: Dict[str, List[Any]] = {name: [] for name in COLUMNAR_FIELDS}
+        self.nutrients: Dict[str, List[Optional[Tuple[float, Optional[str]]]]] = {}
+        self.nutrient_units: Dict[str, Optional[str]] = {}
+        self.unmapped_allergens: Dict[str, int] = {}
+        self.row_count = 0
+
+    def write_unit(self, record: Dict[str, Any]) -> None:
+        columns = self.columns
+        for unit, category, item in iter_unit_items([record]):
+            nutrition = item.get("nutrition") or {}
+            ingredients = nutrition.get("ingredients") or {}
+            columns["unit_id"].append(unit.get("unit_id"))
+            columns["unit_name"].append(unit.get("name"))
+            columns["category_id"].append(category.get("category_id"))
+            columns["category_title"].append(category.get("title"))
+            columns["category_guidance"].append(category.get("selection_guidance"))
+            columns["item_detail_id"].append(item.get("detail_id"))
+            columns["item_name"].append(item.get("name"))
+            columns["description"].append(item.get("description"))
+            columns["allergens"].append(item.get("allergens") or [])
+            columns["allergen_mask"].append(
+                allergen_mask(item.get("allergens") or [], self.unmapped_allergens)
+            )
+            columns["serving_display"].append(item.get("serving_display"))
+            columns["serving_choices"].append(encode_cell(item.get("serving_choices")))
+            columns["calories"].append(nutrition.get("calories"))
+            columns["calories_raw"].append(nutrition.get("calories_raw"))
+            columns["serving_size"].append(nutrition.get("serving_size"))
+            columns["servings_per_container"].append(
+                nutrition.get("servings_per_container")
+            )
+            columns["ingredients_raw"].append(ingredients.get("raw"))
+            columns["ingredients"].append(ingredients.get("list") or [])
+            self.add_nutrients(nutrition.get("nutrients") or [])
+            self.row_count += 1
+
+    def add_nutrients(self, rows: List[Dict[str, Any]]) -> None:
+        values: Dict[str, Optional[Tuple[float, Optional[str]]]] = {}
+        for row in rows:
+            key = row.get("key")
+            if not key or key in values:
+                continue
+            if key not in self.nutrients:
+                self.nutrients[key] = [None] * self.row_count
+                self.nutrient_units[key] = None
+            quantity = row.get("quantity")
+            if quantity is None:
+                values[key] = None
+                continue
+            if self.nutrient_units[key] is None and row.get("unit"):
+                self.nutrient_units[key] = row["unit"]
+            values[key] = (quantity, row.get("unit"))
+        for key, column in self.nutrients.items():
+            column.append(values.get(key))
+
+    def table(self) -> Any:
+        import pyarrow as pa
+
+        dictionary = pa.dictionary(pa.int32(), pa.string())
+        types = {
+            "unit_id": pa.int32(),
+            "unit_name": dictionary,
+            "category_id": pa.int32(),
+            "category_title": dictionary,
+            "category_guidance": dictionary,
+            "item_detail_id": pa.int64(),
+            "allergens": pa.list_(pa.string()),
+            "allergen_mask": pa.uint64(),
+            "calories": pa.int32(),
+            "ingredients": pa.list_(pa.string()),
+        }
+        fields = []
+        arrays = []
+        for name, values in self.columns.items():
+            field_type = types.get(name, pa.string())
+            if field_type == dictionary:
+                array = pa.array(values, type=pa.string()).dictionary_encode()
+            else:
+                array = pa.array(values, type=field_type)
+            metadata = None
+            if name == "allergen_mask":
+                metadata = {
+                    "flags": json.dumps(DIETARY_FLAGS),
+                    "unmapped": json.dumps(self.unmapped_allergens, ensure_ascii=False),
+                }
+            fields.append(pa.field(name, field_type, metadata=metadata))
+            arrays.append(array)
+        for key, values in self.nutrients.items():
+            unit = self.nutrient_units[key]
+            fields.append(
+                pa.field(
+                    f"nutrient_{key}", pa.float64(), metadata={"unit": unit or ""}
+                )
+            )
+            converted = [
+                None if value is None else convert_quantity(*value, unit)
+                for value in values
+            ]
+            arrays.append(pa.array(converted, type=pa.float64()))
+        return pa.Table.from_arrays(arrays, schema=pa.schema(fields))
+
+    def close(self, summary: Dict[str, Any]) -> None:
+        table = self.table()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self.file_format == "arrow":
+            import pyarrow.feather as feather
+
+            feather.write_feather(table, str(self.path), compression="uncompressed")
+        else:
+            import pyarrow.parquet as pq
+
+            pq.write_table(table, str(self.path))
+        if self.unmapped_allergens:
+            labels = sorted(
+                self.unmapped_allergens.items(), key=lambda entry: -entry[1]
+            )
+            print(
+                f"{self.path.name}: {len(labels)} allergen labels have no dietary "
+                "flag and are left out of allergen_mask: "
+                + ", ".join(f"{label} ({count})" for label, count in labels)
+            )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Compares tracemalloc retained and peak memory of the previous dataset that
+--incremental keeps for the whole crawl: plain dict records decoded from JSON
+against the slotted models PreviousDataset holds, where identical labels
+collapse to one shared NutritionLabel.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from aurora_plate_scraper import (
+    NAME_BENCHMARK_WORDS,
+    PreviousDataset,
+    build_label,
+    build_nutrient_row,
+    build_unit_record,
+)
+
+BENCHMARK_UNITS = 40
+BENCHMARK_CATEGORIES = 8
+BENCHMARK_ITEMS = 25
+BENCHMARK_LABELS = 2_000
+BENCHMARK_ALLERGENS = ["Vegan", "Contains Milk", "Contains Soy"]
+BENCHMARK_NUTRIENTS = (
+    ("Total Fat", "g"),
+    ("Saturated Fat", "g"),
+    ("Trans Fat", "g"),
+    ("Cholesterol", "mg"),
+    ("Sodium", "mg"),
+    ("Total Carbohydrate", "g"),
+    ("Dietary Fiber", "g"),
+    ("Total Sugars", "g"),
+    ("Added Sugars", "g"),
+    ("Protein", "g"),
+    ("Calcium", "mg"),
+    ("Iron", "mg"),
+)
+
+
+def iter_synthetic_units() -> Iterator[Dict[str, Any]]:
+    rng = random.Random(0)
+    labels: Dict[int, Dict[str, Any]] = {}
+    words = NAME_BENCHMARK_WORDS
+    for unit_id in range(BENCHMARK_UNITS):
+        categories = []
+        for category_id in range(BENCHMARK_CATEGORIES):
+            items = []
+            for _ in range(BENCHMARK_ITEMS):
+                detail_id = rng.randrange(BENCHMARK_LABELS)
+                name = " ".join(rng.sample(words, 3)).title()
+                if detail_id not in labels:
+                    nutrients = [
+                        build_nutrient_row(
+                            label,
+                            f"{rng.randint(0, 900)}{unit}",
+                            f"{rng.randint(0, 60)}%",
+                        )
+                        for label, unit in BENCHMARK_NUTRIENTS
+                    ]
+                    labels[detail_id] = build_label(
+                        name,
+                        "1 Serving Per Container",
+                        "Serving Size 4 oz",
+                        str(rng.randint(50, 900)),
+                        nutrients,
+                        "Ingredients: " + ", ".join(rng.sample(words, 6)),
+                    )
+                items.append(
+                    {
+                        "detail_id": detail_id,
+                        "name": name,
+                        "description": f"{name} with {rng.choice(words)}",
+                        "allergens": rng.sample(BENCHMARK_ALLERGENS, 2),
+                        "serving_display": "4 oz",
+                        "nutrition": labels[detail_id],
+                    }
+                )
+            categories.append(
+                {
+                    "category_id": category_id,
+                    "title": f"Station {category_id}",
+                    "selection_guidance": None,
+                    "raw_title": f"Station {category_id}",
+                    "items": items,
+                }
+            )
+        yield build_unit_record(
+            {"id": unit_id, "name": f"Unit {unit_id}"}, categories, str(unit_id)
+        )
+
+
+def traced_memory(build: Callable[[], Any]) -> Tuple[Any, int, int]:
+    tracemalloc.start()
+    try:
+        held = build()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return held, current, peak
+
+
+def measure(
+    load_units: Callable[[], Iterator[Dict[str, Any]]]
+) -> Optional[List[Tuple[str, int, int]]]:
+    as_dicts, dict_current, dict_peak = traced_memory(lambda: list(load_units()))
+
+    previous, model_current, model_peak = traced_memory(
+        lambda: PreviousDataset({"units": list(load_units())})
+    )
+    if [unit.to_json() for unit in previous.units.values()] != as_dicts:
+        return None
+    return [
+        ("dicts", dict_current, dict_peak),
+        ("slotted", model_current, model_peak),
+    ]
+
+
+def benchmark_memory(dataset: Optional[Path]) -> int:
+    if dataset:
+        units = json.loads(dataset.read_text(encoding="utf-8"))["units"]
+    else:
+        units = list(iter_synthetic_units())
+    texts = [json.dumps(unit) for unit in units if "error" not in unit]
+    del units
+    rows = measure(lambda: (json.loads(text) for text in texts))
+    if rows is None:
+        print("slotted units do not serialize back to the dict records")
+        return 1
+    print(f"{'layout':<8} {'retained MB':>12} {'peak MB':>9}")
+    for layout, current, peak in rows:
+        print(f"{layout:<8} {current / 2**20:>12.1f} {peak / 2**20:>9.1f}")
+    return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "dataset",
+        type=Path,
+        nargs="?",
+        help="dataset JSON written by the scraper (synthetic catalog when omitted)",
+    )
+    raise SystemExit(benchmark_memory(parser.parse_args().dataset))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+import contextlib
+import io
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from aurora_plate_scraper import DIETARY_FLAG_BITS, ColumnarItemWriter
+
+try:
+    import pyarrow  # noqa: F401
+except ImportError:  # pragma: no cover - optional dependency
+    pyarrow = None
+
+
+def unit_record(*sugars) -> dict:
+    return {
+        "unit_id": 1,
+        "name": "Unit",
+        "categories": [
+            {
+                "category_id": 1,
+                "title": "Entrees",
+                "items": [
+                    {
+                        "detail_id": detail_id,
+                        "name": f"Item {detail_id}",
+                        "nutrition": {
+                            "nutrients": [
+                                {
+                                    "key": "added_sugars",
+                                    "quantity": quantity,
+                                    "unit": unit,
+                                }
+                            ]
+                        },
+                    }
+                    for detail_id, (quantity, unit) in enumerate(sugars, start=1)
+                ],
+            }
+        ],
+    }
+
+
+@unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+class ColumnarItemWriterTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_unit_comes_from_first_row_with_a_quantity(self) -> None:
+        writer = ColumnarItemWriter(Path(self.tmp.name) / "items.arrow", "arrow")
+        writer.write_unit(unit_record((None, None), (12.0, "g"), (500.0, "mg")))
+        table = writer.table()
+        column = table.column("nutrient_added_sugars")
+        self.assertEqual(column.to_pylist(), [None, 12.0, 0.5])
+        field = table.schema.field("nutrient_added_sugars")
+        self.assertEqual(field.metadata[b"unit"], b"g")
+
+    def test_parquet_round_trip(self) -> None:
+        import pyarrow.parquet as pq
+
+        path = Path(self.tmp.name) / "items.parquet"
+        writer = ColumnarItemWriter(path, "parquet")
+        writer.write_unit(unit_record((12.0, "g"), (None, None)))
+        writer.close({})
+        table = pq.read_table(path)
+        self.assertEqual(table.column("item_detail_id").to_pylist(), [1, 2])
+        self.assertEqual(
+            table.column("nutrient_added_sugars").to_pylist(), [12.0, None]
+        )
+
+    def test_allergen_mask_counts_unmapped_labels(self) -> None:
+        import pyarrow.feather as feather
+
+        record = unit_record((1.0, "g"), (2.0, "g"))
+        items = record["categories"][0]["items"]
+        items[0]["allergens"] = ["Contains Milk", "Vegan", "Mystery Icon"]
+        items[1]["allergens"] = ["Tree Nut", "Mystery Icon", "Spicy"]
+        path = Path(self.tmp.name) / "items.arrow"
+        writer = ColumnarItemWriter(path, "arrow")
+        writer.write_unit(record)
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            writer.close({})
+        table = feather.read_table(str(path))
+        self.assertEqual(
+            table.column("allergen_mask").to_pylist(),
+            [
+                DIETARY_FLAG_BITS["milk"] | DIETARY_FLAG_BITS["vegan"],
+                DIETARY_FLAG_BITS["tree_nuts"],
+            ],
+        )
+        metadata = table.schema.field("allergen_mask").metadata
+        self.assertEqual(
+            json.loads(metadata[b"unmapped"]), {"Mystery Icon": 2, "Spicy": 1}
+        )
+        self.assertIn("Mystery Icon (2), Spicy (1)", output.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+import csv
+import io
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from aurora_plate_scraper import StreamingCsvWriter, build_label, build_nutrient_row
+
+LABEL = build_label(
+    "Café Oatmeal",
+    "1 Serving Per Container",
+    "Serving Size 1 cup",
+    "150",
+    [build_nutrient_row("Sodium", "90mg", "4%")],
+    "Ingredients: Oats, Water, Salt (Sea Salt)",
+)
+UNITS = [
+    {
+        "unit_id": 1,
+        "name": "Unit 1",
+        "categories": [
+            {
+                "category_id": 10,
+                "title": "Breakfast",
+                "selection_guidance": "Choose 1",
+                "items": [
+                    {
+                        "detail_id": 7,
+                        "name": "Café Oatmeal",
+                        "description": 'Steel cut, "slow" cooked',
+                        "allergens": ["Vegan", "Contains Oats"],
+                        "serving_display": "1 cup",
+                        "serving_choices": {"type": "static", "value": "1 cup"},
+                        "nutrition": LABEL,
+                    },
+                    {"name": "Coffee"},
+                ],
+            }
+        ],
+    },
+    {"unit_id": 2, "name": "Unit 2", "error": "boom", "categories": []},
+]
+
+
+def encoded(value):
+    return json.dumps(value, ensure_ascii=False) if value is not None else None
+
+
+def legacy_csv(units: list) -> str:
+    rows = []
+    for unit in units:
+        for category in unit.get("categories", []):
+            for item in category.get("items", []):
+                nutrition = item.get("nutrition") or {}
+                ingredients = nutrition.get("ingredients") or {}
+                rows.append(
+                    {
+                        "unit_id": unit.get("unit_id"),
+                        "unit_name": unit.get("name"),
+                        "category_id": category.get("category_id"),
+                        "category_title": category.get("title"),
+                        "category_guidance": category.get("selection_guidance"),
+                        "item_detail_id": item.get("detail_id"),
+                        "item_name": item.get("name"),
+                        "description": item.get("description"),
+                        "allergens": "; ".join(item.get("allergens", [])),
+                        "serving_display": item.get("serving_display"),
+                        "serving_choices": encoded(item.get("serving_choices")),
+                        "calories": nutrition.get("calories"),
+                        "calories_raw": nutrition.get("calories_raw"),
+                        "serving_size": nutrition.get("serving_size"),
+                        "servings_per_container": nutrition.get(
+                            "servings_per_container"
+                        ),
+                        "ingredients_raw": ingredients.get("raw"),
+                        "ingredients_list": encoded(ingredients.get("list")),
+                        "nutrients": encoded(nutrition.get("nutrients")),
+                    }
+                )
+    handle = io.StringIO(newline="")
+    if rows:
+        writer = csv.DictWriter(handle, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+    return handle.getvalue()
+
+
+class StreamingCsvWriterTest(unittest.TestCase):
+    def write(self, units: list) -> str:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "items.csv"
+            writer = StreamingCsvWriter(path)
+            for record in units:
+                writer.write_unit(record)
+            writer.close({})
+            return path.read_bytes().decode("utf-8")
+
+    def test_matches_the_flattened_dict_writer_output(self) -> None:
+        self.assertEqual(self.write(UNITS), legacy_csv(UNITS))
+
+    def test_no_items_writes_an_empty_file(self) -> None:
+        self.assertEqual(self.write(UNITS[1:]), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+import unittest
+
+from aurora_plate_scraper import DatasetDelta, PreviousDataset, build_label
+
+
+def label(calories: int) -> dict:
+    return build_label("Label", None, None, str(calories), [], None)
+
+
+def item(detail_id: int, name: str, calories: int = 100) -> dict:
+    return {"detail_id": detail_id, "name": name, "nutrition": label(calories)}
+
+
+def unit(unit_id: int, panel_hash: str, *items: dict) -> dict:
+    return {
+        "unit_id": unit_id,
+        "name": f"Unit {unit_id}",
+        "panel_hash": panel_hash,
+        "category_count": 1,
+        "item_count": len(items),
+        "categories": [
+            {
+                "category_id": 10,
+                "title": "Entrees",
+                "selection_guidance": None,
+                "raw_title": "Entrees",
+                "items": list(items),
+            }
+        ],
+    }
+
+
+def bare(entry: dict) -> dict:
+    return {k: v for k, v in entry.items() if k != "nutrition"}
+
+
+class IncrementalTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.previous = PreviousDataset(
+            {
+                "generated_at": "2026-10-01T00:00:00+00:00",
+                "units": [
+                    unit(1, "a", item(101, "Oatmeal"), item(102, "Toast")),
+                    unit(2, "b", item(201, "Soup")),
+                    unit(3, "c", item(301, "Salad")),
+                    {"unit_id": 4, "name": "Unit 4", "error": "boom", "categories": []},
+                ],
+            }
+        )
+
+    def test_unchanged_unit_reuses_previous_categories(self) -> None:
+        categories = self.previous.unchanged_unit(1, "a")
+        expected = unit(1, "a", item(101, "Oatmeal"), item(102, "Toast"))
+        self.assertEqual(categories, expected["categories"])
+        self.assertIsNone(self.previous.unchanged_unit(1, "changed"))
+        self.assertIsNone(self.previous.unchanged_unit(4, "a"))
+
+    def test_attach_known_nutrition_only_for_identical_items(self) -> None:
+        categories = [
+            {
+                "title": "Entrees",
+                "items": [
+                    bare(item(101, "Oatmeal")),
+                    bare(item(102, "Toast with Jam")),
+                    bare(item(103, "Eggs")),
+                    {"name": "Coffee"},
+                ],
+            }
+        ]
+        self.previous.attach_known_nutrition(categories)
+        items = categories[0]["items"]
+        self.assertEqual(items[0]["nutrition"], label(100))
+        self.assertNotIn("nutrition", items[1])
+        self.assertNotIn("nutrition", items[2])
+        self.assertNotIn("nutrition", items[3])
+
+    def test_attached_nutrition_is_shared(self) -> None:
+        first = [{"title": "A", "items": [bare(item(201, "Soup"))]}]
+        second = [{"title": "B", "items": [bare(item(201, "Soup"))]}]
+        self.previous.attach_known_nutrition(first)
+        self.previous.attach_known_nutrition(second)
+        self.assertIs(
+            first[0]["items"][0]["nutrition"], second[0]["items"][0]["nutrition"]
+        )
+
+    def test_delta_reports_added_removed_and_modified(self) -> None:
+        delta = DatasetDelta(self.previous)
+        delta.add_unit(unit(1, "a", item(101, "Oatmeal"), item(102, "Toast")))
+        delta.add_unit(unit(2, "b2", item(201, "Soup", 150), item(202, "Bread")))
+        delta.add_unit({"unit_id": 5, "name": "Unit 5", "error": "boom"})
+        changes = delta.finish()
+        self.assertEqual(changes["unchanged_units"], 1)
+        self.assertEqual(changes["failed_units"], ["Unit 5"])
+        self.assertEqual(changes["previous_generated_at"], "2026-10-01T00:00:00+00:00")
+        self.assertEqual(
+            [entry["item"]["name"] for entry in changes["added"]], ["Bread"]
+        )
+        self.assertEqual(
+            [entry["item"]["name"] for entry in changes["removed"]], ["Salad"]
+        )
+        (modified,) = changes["modified"]
+        self.assertEqual(modified["item"]["nutrition"]["calories"], 150)
+        self.assertEqual(modified["previous"]["nutrition"]["calories"], 100)
+        totals = ("added_total", "removed_total", "modified_total")
+        self.assertEqual([changes[key] for key in totals], [1, 1, 1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from aurora_plate_scraper import (
+    IngredientIndex,
+    decode_postings,
+    encode_postings,
+    ingredient_token,
+)
+
+PLURALS = (
+    ("tomato", "tomatoes"),
+    ("potato", "potatoes"),
+    ("cookie", "cookies"),
+    ("brownie", "brownies"),
+    ("berry", "berries"),
+    ("anchovy", "anchovies"),
+    ("peach", "peaches"),
+    ("quiche", "quiches"),
+    ("radish", "radishes"),
+    ("glass", "glasses"),
+    ("leaf", "leaves"),
+    ("pie", "pies"),
+    ("egg", "eggs"),
+    ("cheese", "cheeses"),
+)
+
+
+class PostingsTest(unittest.TestCase):
+    def test_round_trip(self) -> None:
+        for row_ids in ([], [0], [0, 1, 2], [5, 127, 128, 16_511, 16_512, 2**32 - 1]):
+            encoded = encode_postings(row_ids)
+            self.assertEqual(decode_postings(encoded).tolist(), row_ids)
+
+    def test_small_gaps_take_one_byte(self) -> None:
+        self.assertEqual(len(encode_postings(range(0, 1270, 10))), 127)
+        self.assertEqual(len(encode_postings([200])), 2)
+
+
+class IngredientTokenTest(unittest.TestCase):
+    def test_plurals_fold_to_the_singular_token(self) -> None:
+        for singular, plural in PLURALS:
+            self.assertEqual(
+                ingredient_token(plural), ingredient_token(singular), plural
+            )
+
+    def test_singular_words_ending_in_s_are_kept(self) -> None:
+        for word in ("molasses", "asparagus", "hummus", "swiss", "citrus", "couscous"):
+            self.assertEqual(ingredient_token(word), word)
+        self.assertNotEqual(ingredient_token("soy"), ingredient_token("so"))
+
+    def test_queries_match_plural_ingredients(self) -> None:
+        index = IngredientIndex()
+        index.add(1, ["Diced Tomatoes (Tomatoes, Tomato Juice, Calcium Chloride)"])
+        index.add(2, ["Tomato Paste"])
+        index.add(3, ["Chocolate Chip Cookies", "Brownies"])
+        index.add(4, ["Molasses", "Sweet Potatoes"])
+        self.assertEqual(index.query(include=["tomato"]), [0, 1])
+        self.assertEqual(index.query(include=["diced tomatoes"]), [0])
+        self.assertEqual(index.query(include=["cookie"]), [2])
+        self.assertEqual(index.query(include=["brownie"]), [2])
+        self.assertEqual(index.query(include=["molasses"]), [3])
+        self.assertEqual(index.query(include=["sweet potato"]), [3])
+        self.assertEqual(index.query(exclude=["tomatoes"]), [2, 3])
+
+
+class IngredientIndexTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.index = IngredientIndex()
+        self.index.add(1001, ["Whole Wheat Flour", "Water", "Sea Salt"])
+        self.index.add(None, ["Tofu", "Soy Sauce (Water, Soybeans, Wheat, Salt)"])
+        self.index.add(1003, ["Rice", "Water"])
+        self.index.add(1004, [])
+
+    def test_query(self) -> None:
+        self.assertEqual(self.index.query(include=["water"]), [0, 1, 2])
+        self.assertEqual(self.index.query(include=["wheat"], exclude=["tofu"]), [0])
+        self.assertEqual(self.index.query(exclude=["salt"]), [2, 3])
+        self.assertEqual(self.index.query(include=["soy sauce"]), [1])
+        with self.assertRaises(ValueError):
+            self.index.query(include=["and of the"])
+
+    def test_write_read_round_trip(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "ingredients.idx"
+            self.index.write(path)
+            loaded = IngredientIndex.read(path)
+        self.assertEqual(loaded.detail_ids, [1001, None, 1003, 1004])
+        self.assertEqual(
+            {term: rows.tolist() for term, rows in loaded.postings.items()},
+            {term: rows.tolist() for term, rows in self.index.postings.items()},
+        )
+        for include, exclude in ((["water"], []), (["wheat"], ["tofu"]), ([], ["salt"])):
+            self.assertEqual(
+                loaded.query(include, exclude), self.index.query(include, exclude)
+            )
+
+    def test_read_rejects_other_files(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "ingredients.idx"
+            path.write_bytes(bytes(64))
+            with self.assertRaises(ValueError):
+                IngredientIndex.read(path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import aurora_plate_scraper
+from aurora_plate_scraper import (
+    CrawlJournal,
+    LabelCache,
+    ResponseCache,
+    parse_with_cache,
+)
+
+KEY = sys.intern("".join(["interning_", "probe_key"]))
+UNIT = sys.intern("".join(["probe", "_unit"]))
+TITLE = sys.intern("".join(["Probe ", "Station"]))
+
+
+def label() -> dict:
+    row = {"key": KEY, "label": "Probe", "quantity": 1.0, "unit": UNIT}
+    return {"label_name": "Probe", "nutrients": [row]}
+
+
+class InterningTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.dir = Path(self.tmp.name)
+
+    def assertInterned(self, data: dict) -> None:
+        row = data["nutrients"][0]
+        self.assertIs(row["key"], KEY)
+        self.assertIs(row["unit"], UNIT)
+
+    def test_label_cache_hits_are_interned(self) -> None:
+        cache = LabelCache(self.dir / "labels.sqlite")
+        cache[1] = label()
+        cache.close()
+        cache = LabelCache(self.dir / "labels.sqlite")
+        self.addCleanup(cache.close)
+        self.assertInterned(cache[1])
+
+    def test_parsed_response_hits_are_interned(self) -> None:
+        cache = ResponseCache(self.dir / "responses.sqlite")
+        self.addCleanup(cache.close)
+        parser = mock.Mock(side_effect=lambda markup: label())
+        with mock.patch.object(aurora_plate_scraper, "RESPONSE_CACHE", cache):
+            parse_with_cache("nutrition_label", "<div>probe</div>", parser)
+            data = parse_with_cache("nutrition_label", "<div>probe</div>", parser)
+        self.assertEqual(parser.call_count, 1)
+        self.assertInterned(data)
+
+    def test_journal_entries_are_interned(self) -> None:
+        path = self.dir / "journal.ndjson"
+        record = {
+            "unit_id": 1,
+            "name": "Unit 1",
+            "categories": [
+                {
+                    "title": TITLE,
+                    "raw_title": TITLE,
+                    "items": [{"name": "Probe", "nutrition": label()}],
+                }
+            ],
+        }
+        path.write_text(
+            json.dumps({"type": "unit", "record": record})
+            + "\n"
+            + json.dumps({"type": "label", "detail_id": 7, "data": label()})
+            + "\n"
+        )
+        journal = CrawlJournal(path, 1)
+        journal.load()
+        self.assertInterned(journal.labels[7])
+        category = journal.units[1]["categories"][0]
+        self.assertIs(category["title"], TITLE)
+        self.assertInterned(category["items"][0]["nutrition"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from aurora_plate_scraper import CrawlJournal
+
+
+def unit_record(unit_id: int) -> dict:
+    return {"unit_id": unit_id, "unit_name": f"Unit {unit_id}", "categories": []}
+
+
+class CrawlJournalTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = Path(self.tmp.name) / "journal.ndjson"
+
+    def crash(self, journal: CrawlJournal) -> None:
+        journal.checkpoint()
+        journal.handle.close()
+        journal.handle = None
+
+    def resume(self) -> CrawlJournal:
+        journal = CrawlJournal(self.path, 1)
+        journal.load()
+        journal.open(resume=True)
+        return journal
+
+    def test_resume_twice_after_torn_tail(self) -> None:
+        journal = CrawlJournal(self.path, 1)
+        journal.open(resume=False)
+        journal.record_unit(unit_record(1))
+        journal.record_label(10, {"nutrients": []})
+        self.crash(journal)
+        with self.path.open("ab") as handle:
+            handle.write(b'{"type": "unit", "record": {"unit_')
+
+        journal = self.resume()
+        self.assertEqual(set(journal.units), {1})
+        self.assertEqual(set(journal.labels), {10})
+        self.assertGreater(journal.label_times[10], 0)
+        journal.record_unit(unit_record(2))
+        self.crash(journal)
+
+        journal = self.resume()
+        self.assertEqual(set(journal.units), {1, 2})
+        self.assertEqual(set(journal.labels), {10})
+        self.crash(journal)
+        self.assertTrue(self.path.read_bytes().endswith(b"\n"))
+
+    def test_complete_removes_journal(self) -> None:
+        journal = CrawlJournal(self.path, 1)
+        journal.open(resume=False)
+        journal.record_unit(unit_record(1))
+        journal.complete()
+        self.assertFalse(self.path.exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
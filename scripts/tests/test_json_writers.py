@@ -0,0 +1,142 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from aurora_plate_scraper import (
+    JsonDatasetWriter,
+    LabelTable,
+    NdjsonItemWriter,
+    StreamingJsonWriter,
+    SymbolTable,
+    build_label,
+    build_nutrient_row,
+)
+
+HEADER = {
+    "source": "https://example.test",
+    "generated_at": "2026-10-15T00:00:00+00:00",
+    "units_total": 3,
+    "units_skipped": ["Marketplace"],
+    "excluded_names": ["Marketplace"],
+}
+LABEL = build_label(
+    "Café Oatmeal",
+    "1 Serving Per Container",
+    "Serving Size 1 cup",
+    "150",
+    [build_nutrient_row("Sodium", "90mg", "4%")],
+    "Ingredients: Oats, Water",
+)
+
+
+def units() -> list:
+    item = {"detail_id": 7, "name": "Café Oatmeal", "allergens": ["Vegan"]}
+    return [
+        {
+            "unit_id": 1,
+            "name": "Unit 1",
+            "panel_hash": "a",
+            "category_count": 1,
+            "item_count": 2,
+            "categories": [
+                {
+                    "category_id": 10,
+                    "title": "Breakfast",
+                    "selection_guidance": "Choose 1",
+                    "raw_title": "Breakfast (Choose 1)",
+                    "items": [{**item, "nutrition": LABEL}, {"name": "Coffee"}],
+                }
+            ],
+        },
+        {"unit_id": 2, "name": "Unit 2", "error": "boom", "categories": []},
+        {
+            "unit_id": 3,
+            "name": "Unit 3",
+            "panel_hash": "c",
+            "category_count": 1,
+            "item_count": 1,
+            "categories": [
+                {
+                    "category_id": 30,
+                    "title": "Grab N Go",
+                    "selection_guidance": None,
+                    "raw_title": "Grab N Go",
+                    "items": [{**item, "nutrition": LABEL}],
+                }
+            ],
+        },
+    ]
+
+
+class JsonWriterTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.dir = Path(self.tmp.name)
+
+    def write(self, writer_class, name: str, **tables) -> dict:
+        path = self.dir / name
+        writer = writer_class(
+            path, HEADER, tables.get("symbols"), tables.get("label_table")
+        )
+        for record in units():
+            writer.write_unit(record)
+        writer.close({"items_total": 3})
+        return json.loads(path.read_text(encoding="utf-8"))
+
+    def test_streamed_json_matches_the_in_memory_payload(self) -> None:
+        streamed = self.write(StreamingJsonWriter, "streamed.json")
+        in_memory = self.write(JsonDatasetWriter, "in_memory.json")
+        self.assertEqual(streamed, in_memory)
+        self.assertEqual(streamed["units"], units())
+        self.assertEqual(streamed["items_total"], 3)
+        self.assertFalse((self.dir / "streamed.json.partial").exists())
+
+    def test_streamed_json_matches_with_symbols_and_labels(self) -> None:
+        streamed = self.write(
+            StreamingJsonWriter,
+            "streamed.json",
+            symbols=SymbolTable(),
+            label_table=LabelTable(),
+        )
+        in_memory = self.write(
+            JsonDatasetWriter,
+            "in_memory.json",
+            symbols=SymbolTable(),
+            label_table=LabelTable(),
+        )
+        self.assertEqual(streamed, in_memory)
+        self.assertEqual(len(streamed["labels"]), 1)
+
+    def test_empty_stream_is_valid_json(self) -> None:
+        path = self.dir / "empty.json"
+        writer = StreamingJsonWriter(path, HEADER)
+        writer.close({"items_total": 0})
+        self.assertEqual(json.loads(path.read_text())["units"], [])
+
+    def test_ndjson_lines_match_the_dataset_items(self) -> None:
+        path = self.dir / "items.ndjson"
+        writer = NdjsonItemWriter(path)
+        for record in units():
+            writer.write_unit(record)
+        writer.close({})
+        lines = [json.loads(line) for line in path.read_text().splitlines()]
+        expected = [
+            {
+                "unit_id": unit["unit_id"],
+                "unit_name": unit["name"],
+                "category_id": category["category_id"],
+                "category_title": category["title"],
+                "category_guidance": category["selection_guidance"],
+                **item,
+            }
+            for unit in units()
+            for category in unit["categories"]
+            for item in category["items"]
+        ]
+        self.assertEqual(lines, expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from aurora_plate_scraper import LabelCache
+
+LABEL = {"label_name": "Oatmeal", "calories": 150, "nutrients": []}
+
+
+class LabelCacheTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = Path(self.tmp.name) / "labels.sqlite"
+
+    def test_hits_share_one_label(self) -> None:
+        cache = LabelCache(self.path)
+        self.addCleanup(cache.close)
+        cache[1] = dict(LABEL)
+        self.assertIs(cache[1], cache[1])
+
+    def test_reopened_hits_share_one_label(self) -> None:
+        cache = LabelCache(self.path)
+        cache[1] = dict(LABEL)
+        cache.close()
+        cache = LabelCache(self.path)
+        self.addCleanup(cache.close)
+        self.assertEqual(cache[1], LABEL)
+        self.assertIs(cache[1], cache[1])
+
+    def test_store_keeps_the_original_fetch_time(self) -> None:
+        cache = LabelCache(self.path, max_age=3600)
+        self.addCleanup(cache.close)
+        cache.store(1, dict(LABEL), time.time() - 7200)
+        cache.store(2, dict(LABEL), time.time() - 60)
+        self.assertNotIn(1, cache)
+        self.assertIn(2, cache)
+        fetched_at = cache.conn.execute(
+            "SELECT fetched_at FROM labels WHERE detail_id = 2"
+        ).fetchone()[0]
+        self.assertLess(fetched_at, time.time() - 30)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from aurora_plate_scraper import (
+    JsonDatasetWriter,
+    LabelTable,
+    PreviousDataset,
+    StreamingJsonWriter,
+    SymbolTable,
+    build_label,
+    build_nutrient_row,
+    denormalize_unit_record,
+    normalize_unit_record,
+)
+
+
+HEADER = {
+    "source": "https://example.test",
+    "generated_at": "2026-10-15T00:00:00+00:00",
+    "units_total": 2,
+    "units_skipped": [],
+    "excluded_names": [],
+}
+
+
+def label(sodium: str) -> dict:
+    return build_label(
+        "Oatmeal",
+        None,
+        "Serving Size 1 cup",
+        "150",
+        [build_nutrient_row("Sodium", sodium, "4%")],
+        "Ingredients: Oats, Water",
+    )
+
+
+def unit(unit_id: int, *items: dict) -> dict:
+    return {
+        "unit_id": unit_id,
+        "name": f"Unit {unit_id}",
+        "panel_hash": str(unit_id),
+        "category_count": 1,
+        "item_count": len(items),
+        "categories": [
+            {
+                "category_id": unit_id * 10,
+                "title": "Breakfast",
+                "selection_guidance": None,
+                "raw_title": "Breakfast",
+                "items": list(items),
+            }
+        ],
+    }
+
+
+UNITS = [
+    unit(
+        1,
+        {"detail_id": 7, "name": "Oatmeal", "nutrition": label("90mg")},
+        {"detail_id": 8, "name": "Oatmeal Bowl", "nutrition": label("90mg")},
+        {"name": "Coffee"},
+    ),
+    unit(2, {"detail_id": 7, "name": "Oatmeal", "nutrition": label("95mg")}),
+]
+
+
+class LabelTableTest(unittest.TestCase):
+    def test_identical_bodies_share_one_key(self) -> None:
+        table = LabelTable()
+        self.assertEqual(table.add(7, label("90mg")), "7")
+        self.assertEqual(table.add(8, label("90mg")), "7")
+        self.assertEqual(table.add(7, dict(label("90mg"))), "7")
+        self.assertEqual(list(table.bodies), ["7"])
+
+    def test_changed_body_for_the_same_id_gets_its_own_key(self) -> None:
+        table = LabelTable()
+        table.add(7, label("90mg"))
+        key = table.add(7, label("95mg"))
+        self.assertTrue(key.startswith("7:"))
+        self.assertEqual(table.bodies[key], label("95mg"))
+        self.assertEqual(len(table.bodies), 2)
+
+    def test_normalize_round_trip(self) -> None:
+        table = LabelTable()
+        normalized = [normalize_unit_record(record, table) for record in UNITS]
+        items = normalized[0]["categories"][0]["items"]
+        self.assertEqual([item.get("label_id") for item in items], ["7", "7", None])
+        self.assertNotIn("nutrition", items[0])
+        self.assertEqual(
+            [denormalize_unit_record(record, table.bodies) for record in normalized],
+            UNITS,
+        )
+
+    def test_writers_round_trip_through_the_previous_dataset(self) -> None:
+        for writer_class in (JsonDatasetWriter, StreamingJsonWriter):
+            for symbols in (None, SymbolTable()):
+                with tempfile.TemporaryDirectory() as tmp:
+                    path = Path(tmp) / "dataset.json"
+                    writer = writer_class(path, HEADER, symbols, LabelTable())
+                    for record in UNITS:
+                        writer.write_unit(record)
+                    writer.close({"items_total": 4})
+                    payload = json.loads(path.read_text(encoding="utf-8"))
+                self.assertEqual(len(payload["labels"]), 2)
+                previous = PreviousDataset(payload)
+                self.assertEqual(
+                    [previous.unit_record(record["unit_id"]) for record in UNITS],
+                    UNITS,
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import json
+import math
+import random
+import tempfile
+import unittest
+from pathlib import Path
+
+from aurora_plate_scraper import (
+    MEAL_MACRO_FIELDS,
+    MacroIndex,
+    MacroIndexWriter,
+    meal_key,
+    meal_keys_digest,
+)
+
+
+def random_rows(count: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    return [
+        {field: float(rng.randint(0, 400)) for field in MEAL_MACRO_FIELDS}
+        for _ in range(count)
+    ]
+
+
+def brute_force(index: MacroIndex, profile: dict, k: int) -> list:
+    scored = []
+    for row_id, point in enumerate(index.points):
+        distance = sum(
+            (point[axis] - profile[field] / index.scales[axis]) ** 2
+            for axis, field in enumerate(MEAL_MACRO_FIELDS)
+            if field in profile
+        )
+        scored.append((distance, row_id))
+    return [row_id for _, row_id in sorted(scored)[:k]]
+
+
+class MacroIndexTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.rows = random_rows(500)
+        self.index = MacroIndex(self.rows)
+
+    def test_range_matches_a_scan(self) -> None:
+        bounds = {"calories": (100.0, 300.0), "protein_g": (None, 50.0)}
+        expected = [
+            row_id
+            for row_id, row in enumerate(self.rows)
+            if 100 <= row["calories"] <= 300 and row["protein_g"] <= 50
+        ]
+        self.assertEqual(self.index.range(**bounds), expected)
+        with self.assertRaises(ValueError):
+            self.index.range(fiber_g=(0.0, 1.0))
+
+    def test_nearest_matches_brute_force(self) -> None:
+        for profile in (
+            {field: 200.0 for field in MEAL_MACRO_FIELDS},
+            {"calories": 250.0, "protein_g": 30.0},
+            {"sodium_mg": 10.0},
+        ):
+            found = self.index.nearest(profile, k=7)
+            self.assertEqual(
+                [row_id for row_id, _ in found], brute_force(self.index, profile, 7)
+            )
+            self.assertTrue(all(math.isfinite(distance) for _, distance in found))
+
+    def test_nearest_edge_cases(self) -> None:
+        self.assertEqual(self.index.nearest({"calories": 100.0}, k=0), [])
+        self.assertEqual(self.index.nearest({"calories": 100.0}, k=-3), [])
+        self.assertEqual(self.index.nearest({}, k=2), [(0, 0.0), (1, 0.0)])
+        self.assertEqual(MacroIndex([]).nearest({"calories": 100.0}), [])
+
+    def test_writer_records_keys_digest(self) -> None:
+        record = {
+            "unit_id": 1,
+            "name": "Unit",
+            "categories": [
+                {
+                    "title": "Entrees",
+                    "items": [
+                        {"name": "Tofu Bowl", "nutrition": {"calories": 300}},
+                        {"name": "Oatmeal", "nutrition": {"calories": 150}},
+                    ],
+                }
+            ],
+        }
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "macros.json"
+            writer = MacroIndexWriter(path)
+            writer.write_unit(record)
+            writer.close({})
+            data = json.loads(path.read_text())
+        self.assertEqual(data["row_count"], 2)
+        self.assertEqual(data["columns"]["calories"], [1, 0])
+        self.assertEqual(
+            data["keys_sha256"],
+            meal_keys_digest([meal_key("Tofu Bowl"), meal_key("Oatmeal")]),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import csv
+import tempfile
+import unittest
+from pathlib import Path
+
+from aurora_plate_scraper import MEALS_CSV_FIELDNAMES, MealCsvWriter
+
+RECORD = {
+    "unit_id": 1,
+    "name": "The Skillet",
+    "categories": [
+        {
+            "title": "Breakfast Entrees",
+            "items": [
+                {
+                    "name": "Scrambled Eggs",
+                    "serving_display": "4 oz",
+                    "nutrition": {
+                        "calories": 180,
+                        "ingredients": {"raw": "Eggs, Butter, Salt"},
+                        "nutrients": [
+                            {"key": "total_fat", "quantity": 13.5, "unit": "g"},
+                            {"key": "protein", "quantity": 12.0, "unit": "g"},
+                            {"key": "sodium", "quantity": 0.32, "unit": "g"},
+                        ],
+                    },
+                },
+            ],
+        },
+        {
+            "title": "Espresso Classics",
+            "items": [{"name": "Latte", "nutrition": {"calories": 120}}],
+        },
+        {"title": "Sides", "items": [{"name": "Fruit Cup"}]},
+    ],
+}
+SECTIONS = {("The Skillet", "Espresso Classics", "Latte"): "Drink"}
+
+
+class MealCsvWriterTest(unittest.TestCase):
+    def write(self, path: Path, *records: dict) -> list:
+        writer = MealCsvWriter(path, SECTIONS)
+        for record in records:
+            writer.write_unit(record)
+        writer.close({})
+        with path.open(newline="", encoding="utf-8") as handle:
+            return list(csv.DictReader(handle))
+
+    def test_round_trip_keeps_sections_and_typed_macros(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "meals.csv"
+            rows = self.write(path, RECORD)
+            self.assertEqual(
+                path.read_text(encoding="utf-8").splitlines()[0],
+                ",".join(MEALS_CSV_FIELDNAMES),
+            )
+        self.assertEqual(
+            [(row["item_name"], row["meal_section"]) for row in rows],
+            [("Scrambled Eggs", "Breakfast"), ("Latte", "Drink"), ("Fruit Cup", "Any")],
+        )
+        eggs = rows[0]
+        self.assertEqual(eggs["location"], "The Skillet")
+        self.assertEqual(eggs["ingredients"], "Eggs, Butter, Salt")
+        self.assertEqual(eggs["calories"], "180")
+        self.assertEqual(eggs["fat_g"], "13.5")
+        self.assertEqual(eggs["sodium_mg"], "320")
+        self.assertEqual(rows[2]["calories"], "0")
+
+    def test_no_partial_file_left_behind(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "meals.csv"
+            self.write(path, RECORD)
+            names = [entry.name for entry in Path(tmp).iterdir()]
+        self.assertEqual(names, ["meals.csv"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from aurora_plate_scraper import (
+    MEAL_TABLE_MAGIC,
+    MealTableWriter,
+    iter_meal_rows,
+    load_meal_sections,
+    meal_key,
+    read_meal_table,
+)
+
+RECORD = {
+    "unit_id": 1,
+    "name": "Marketplace",
+    "categories": [
+        {
+            "title": "Entrées",
+            "items": [
+                {
+                    "name": "Tofu Bowl",
+                    "serving_display": "1 bowl",
+                    "nutrition": {
+                        "calories": 420,
+                        "ingredients": {"raw": "Tofu, Rice, Soy Sauce"},
+                        "nutrients": [
+                            {"key": "total_fat", "quantity": 12.5, "unit": "g"},
+                            {"key": "sodium", "quantity": 0.75, "unit": "g"},
+                        ],
+                    },
+                },
+                {"name": "Water", "nutrition": None},
+            ],
+        },
+        {"title": "Sides", "items": [{"name": "Tofu Bowl"}]},
+        {"title": "Late Night Grill", "items": [{"name": "Fries"}]},
+    ],
+}
+
+
+class MealTableTest(unittest.TestCase):
+    def test_round_trip(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "meals.bin"
+            writer = MealTableWriter(path)
+            writer.write_unit(RECORD)
+            writer.write_unit({"unit_id": 2, "name": "Empty", "categories": []})
+            writer.close({})
+            rows = read_meal_table(path)
+        expected = [
+            {**row, "name_key": meal_key(row["item_name"])}
+            for row in iter_meal_rows([RECORD])
+        ]
+        self.assertEqual(rows, expected)
+        self.assertEqual(rows[0]["category"], "Entrées")
+        self.assertEqual(rows[0]["sodium_mg"], 750.0)
+        self.assertEqual(rows[1]["serving_size"], "")
+
+    def test_sections_carry_through(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            sections_path = Path(tmp) / "sections.csv"
+            sections_path.write_text(
+                "location,meal_section,category,item_name\n"
+                "Marketplace,Lunch,Entrées,Tofu Bowl\n"
+                "Marketplace,Breakfast,Entrées,Water\n",
+                encoding="utf-8",
+            )
+            path = Path(tmp) / "meals.bin"
+            writer = MealTableWriter(path, load_meal_sections(sections_path))
+            writer.write_unit(RECORD)
+            writer.close({})
+            rows = read_meal_table(path)
+        self.assertEqual(
+            [(row["item_name"], row["meal_section"]) for row in rows],
+            [
+                ("Tofu Bowl", "Lunch"),
+                ("Water", "Breakfast"),
+                ("Tofu Bowl", "Any"),
+                ("Fries", "Snack"),
+            ],
+        )
+        self.assertEqual(load_meal_sections(Path(tmp) / "missing.csv"), {})
+
+    def test_empty_table(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "meals.bin"
+            MealTableWriter(path).close({})
+            self.assertTrue(path.read_bytes().startswith(MEAL_TABLE_MAGIC))
+            self.assertEqual(read_meal_table(path), [])
+
+    def test_rejects_other_files(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "meals.bin"
+            path.write_bytes(b"NOTMEALS" + bytes(12))
+            with self.assertRaises(ValueError):
+                read_meal_table(path)
+
+
+if __name__ == "__main__":
+    unittest.main()
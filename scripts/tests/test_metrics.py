@@ -0,0 +1,99 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+import requests
+
+from aurora_plate_scraper import METRICS_PREFIX, CrawlMetrics
+
+BASE = "https://example.test/api"
+
+
+def response(status: int, body: bytes = b"") -> requests.Response:
+    resp = requests.Response()
+    resp.status_code = status
+    resp._content = body
+    return resp
+
+
+class CrawlMetricsTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.metrics = CrawlMetrics()
+        observe = self.metrics.observe_request
+        observe(f"{BASE}/units/", 0.03, response(200, b"abcd"), retry=False)
+        observe(f"{BASE}/units", 0.2, response(304), retry=False)
+        observe(f"{BASE}/label", 0.7, response(503, b"busy"), retry=False)
+        observe(f"{BASE}/label", 12.0, None, retry=True)
+        observe(f"{BASE}/label", 0.04, response(200, b"ok"), retry=True)
+        self.metrics.observe_cache(True)
+        self.metrics.observe_cache(False)
+        self.metrics.observe_cache(True)
+        self.metrics.observe_parse("label", 0.002)
+
+    def test_summary_counts_per_endpoint(self) -> None:
+        summary = self.metrics.summary({"units_total": 2})
+        self.assertEqual(summary["units_total"], 2)
+        self.assertEqual(list(summary["endpoints"]), ["label", "units"])
+        units = summary["endpoints"]["units"]
+        self.assertEqual(
+            {key: units[key] for key in ("requests", "failures", "not_modified")},
+            {"requests": 2, "failures": 0, "not_modified": 1},
+        )
+        self.assertEqual(units["bytes"], 4)
+        label = summary["endpoints"]["label"]
+        self.assertEqual(label["requests"], 3)
+        self.assertEqual(label["failures"], 2)
+        self.assertEqual(label["retries"], 2)
+        self.assertEqual(label["bytes"], 6)
+        self.assertEqual(label["latency_seconds"]["count"], 3)
+        self.assertEqual(label["latency_seconds"]["buckets"]["30.0"], 3)
+        self.assertEqual(label["latency_seconds"]["buckets"]["10.0"], 2)
+        self.assertEqual(
+            summary["nutrition_cache"], {"hits": 2, "misses": 1, "hit_rate": 0.6667}
+        )
+        self.assertEqual(summary["parse_seconds"]["label"]["count"], 1)
+
+    def test_prometheus_exposition(self) -> None:
+        text = self.metrics.prometheus({"units_total": 2})
+        lines = text.splitlines()
+        self.assertTrue(text.endswith("\n"))
+        failures = f"{METRICS_PREFIX}_failures_total"
+        self.assertIn(f"# TYPE {failures} counter", lines)
+        self.assertIn(
+            f"# HELP {failures} HTTP requests that raised or returned status >= 400.",
+            lines,
+        )
+        self.assertIn(f'{failures}{{endpoint="label"}} 2', lines)
+        self.assertIn(f'{failures}{{endpoint="units"}} 0', lines)
+        not_modified = f"{METRICS_PREFIX}_not_modified_total"
+        self.assertIn(f'{not_modified}{{endpoint="units"}} 1', lines)
+        latency = f"{METRICS_PREFIX}_request_duration_seconds"
+        self.assertIn(f'{latency}_bucket{{endpoint="label",le="+Inf"}} 3', lines)
+        self.assertIn(f'{latency}_count{{endpoint="label"}} 3', lines)
+        self.assertIn(f'{latency}_sum{{endpoint="label"}} 12.740000', lines)
+        lookups = f"{METRICS_PREFIX}_nutrition_cache_lookups_total"
+        self.assertIn(f'{lookups}{{result="hit"}} 2', lines)
+        self.assertIn(f'{lookups}{{result="miss"}} 1', lines)
+        self.assertIn(f"# TYPE {METRICS_PREFIX}_units gauge", lines)
+        self.assertIn(f"{METRICS_PREFIX}_units 2", lines)
+        for line in lines:
+            if not line.startswith("#"):
+                name, value = line.rsplit(" ", 1)
+                self.assertTrue(name.startswith(METRICS_PREFIX), line)
+                float(value)
+
+    def test_write_both_formats(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            json_path = Path(tmp) / "out" / "metrics.json"
+            prom_path = Path(tmp) / "out" / "metrics.prom"
+            self.metrics.write(json_path, prom_path, {"units_total": 2})
+            summary = json.loads(json_path.read_text())
+            self.assertEqual(summary["endpoints"]["label"]["failures"], 2)
+            self.assertIn(f"{METRICS_PREFIX}_units 2", prom_path.read_text())
+            written = sorted(path.name for path in prom_path.parent.iterdir())
+            self.assertEqual(written, ["metrics.json", "metrics.prom"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+
+from aurora_plate_scraper import PreviousDataset, Unit
+
+LABEL = {
+    "label_name": "Oatmeal",
+    "servings_per_container": None,
+    "serving_size": "Serving Size 1 cup",
+    "calories": 150,
+    "calories_raw": "150",
+    "nutrients": [
+        {
+            "key": "sodium",
+            "label": "Sodium",
+            "amount": "90mg",
+            "quantity": 90.0,
+            "unit": "mg",
+            "daily_value_percent": 4.0,
+            "daily_value_raw": "4%",
+        }
+    ],
+    "ingredients": {"raw": "Oats, Water", "list": ["Oats", "Water"]},
+}
+
+
+def unit_record(unit_id: int) -> dict:
+    return {
+        "unit_id": unit_id,
+        "name": f"Unit {unit_id}",
+        "panel_hash": f"hash{unit_id}",
+        "category_count": 1,
+        "item_count": 2,
+        "categories": [
+            {
+                "category_id": 10,
+                "title": "Breakfast",
+                "selection_guidance": None,
+                "raw_title": "Breakfast",
+                "items": [
+                    {
+                        "detail_id": 1001,
+                        "name": "Oatmeal",
+                        "allergens": ["Vegan"],
+                        "nutrition": dict(LABEL),
+                    },
+                    {"name": "Coffee"},
+                ],
+            }
+        ],
+    }
+
+
+class ModelTest(unittest.TestCase):
+    def test_unit_round_trip(self) -> None:
+        record = unit_record(1)
+        self.assertEqual(Unit.from_json(record).to_json(), record)
+        error = {"unit_id": 2, "name": "Unit 2", "error": "boom", "categories": []}
+        self.assertEqual(Unit.from_json(error).to_json(), error)
+
+    def test_previous_dataset_shares_identical_labels(self) -> None:
+        previous = PreviousDataset({"units": [unit_record(1), unit_record(2)]})
+        self.assertIsInstance(previous.units[1], Unit)
+        first, second = previous.items[1001]
+        self.assertIs(first.nutrition, second.nutrition)
+        self.assertEqual(
+            previous.unchanged_unit(1, "hash1"), unit_record(1)["categories"]
+        )
+        self.assertIsNone(previous.unchanged_unit(1, "other"))
+
+
+if __name__ == "__main__":
+    unittest.main()
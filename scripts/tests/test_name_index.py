@@ -0,0 +1,51 @@
+import json
+import unittest
+
+from aurora_plate_scraper import MealNameIndex, linear_name_lookup, meal_key
+
+NAMES = [
+    "Grilled Chicken Sandwich",
+    "Chicken Noodle Soup",
+    "Tofu Stir Fry",
+    "Vegan Chili",
+    "Chili Cheese Fries",
+    "Grilled Cheese",
+    "Fries",
+    "Hot Tea",
+]
+
+
+class MealNameIndexTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.keys = [meal_key(name) for name in NAMES]
+        self.index = MealNameIndex()
+        for key in self.keys:
+            self.index.add(key)
+
+    def test_lookup_matches_a_linear_scan(self) -> None:
+        queries = NAMES + [
+            "the grilled chicken sandwich special",
+            "Chili",
+            "cheese",
+            "noodle",
+            "ot",
+            "fr",
+            "Fries!",
+            "unlisted dish",
+            "",
+            None,
+        ]
+        for query in queries:
+            self.assertEqual(
+                self.index.lookup(query), linear_name_lookup(self.keys, query), query
+            )
+
+    def test_json_keeps_postings(self) -> None:
+        data = json.loads(json.dumps(self.index.to_json()))
+        self.assertEqual(data["keys"], self.keys)
+        self.assertEqual(data["exact"][meal_key("Fries")], [6])
+        self.assertEqual(data["trigrams"]["chi"], [0, 1, 3, 4])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from aurora_plate_scraper import NutrientMatrix
+
+try:
+    import numpy  # noqa: F401
+except ImportError:  # pragma: no cover - optional dependency
+    numpy = None
+
+
+def sugars(quantity, unit):
+    return [{"key": "added_sugars", "quantity": quantity, "unit": unit}]
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class NutrientMatrixTest(unittest.TestCase):
+    def test_unit_comes_from_first_row_with_a_quantity(self) -> None:
+        items = [
+            (1, 1, sugars(None, None)),
+            (1, 2, sugars(12.0, "g")),
+            (1, 3, sugars(12.0, "g")),
+        ]
+        for ordered in (items, items[::-1]):
+            matrix = NutrientMatrix.from_items(ordered)
+            self.assertEqual(matrix.units, ["g"])
+            self.assertEqual(int(matrix.mask.sum()), 2)
+            self.assertEqual(matrix.totals()["added_sugars"], 24.0)
+
+    def test_later_rows_convert_to_the_column_unit(self) -> None:
+        matrix = NutrientMatrix.from_items(
+            [(1, 1, sugars(500.0, "mg")), (1, 2, sugars(1.0, "g"))]
+        )
+        self.assertEqual(matrix.units, ["mg"])
+        self.assertEqual(matrix.values[:, 0].tolist(), [500.0, 1000.0])
+
+    def test_save_load_round_trip(self) -> None:
+        matrix = NutrientMatrix.from_items(
+            [
+                (1, 10, sugars(4.0, "g") + [{"key": "sodium", "quantity": 90.0}]),
+                (None, None, sugars(None, None)),
+                (2, 11, [{"key": "protein", "quantity": 7.5, "unit": "g"}]),
+            ]
+        )
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "nutrients.npz"
+            matrix.save(path)
+            loaded = NutrientMatrix.load(path)
+        self.assertEqual(loaded.keys, ["added_sugars", "sodium", "protein"])
+        self.assertEqual(loaded.units, ["g", None, "g"])
+        self.assertEqual(loaded.values.tolist(), matrix.values.tolist())
+        self.assertEqual(loaded.mask.tolist(), matrix.mask.tolist())
+        self.assertEqual(loaded.unit_ids.tolist(), [1, -1, 2])
+        self.assertEqual(loaded.detail_ids.tolist(), [10, -1, 11])
+        self.assertEqual(loaded.totals(), matrix.totals())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+import contextlib
+import io
+import tempfile
+import unittest
+from pathlib import Path
+
+from aurora_plate_scraper import (
+    check_parser_parity,
+    extract_units,
+    parse_nutrition_label_fast,
+    parse_nutrition_label_soup,
+    parse_unit_structure,
+)
+
+CORPUS_DIR = Path(__file__).parent / "fixtures" / "corpus"
+
+
+def read_page(name: str) -> str:
+    return (CORPUS_DIR / name).read_text(encoding="utf-8")
+
+
+class ParserParityTest(unittest.TestCase):
+    def check(self, corpus_dir: Path) -> int:
+        with contextlib.redirect_stdout(io.StringIO()):
+            return check_parser_parity(corpus_dir)
+
+    def test_fixture_corpus_matches_across_backends(self) -> None:
+        self.assertEqual(self.check(CORPUS_DIR), 0)
+
+    def test_empty_corpus_fails(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            self.assertEqual(self.check(Path(tmp)), 1)
+            self.assertEqual(self.check(Path(tmp) / "missing"), 1)
+
+    def test_fixture_pages_parse(self) -> None:
+        units = extract_units(read_page("homepage.html"))
+        self.assertEqual([unit["id"] for unit in units], [1, 2, 3, 4, 99])
+        categories = parse_unit_structure(read_page("panel_1.html"))
+        self.assertEqual([category["category_id"] for category in categories], [10, 11])
+        self.assertEqual(len(categories[0]["items"]), 3)
+
+    def test_fast_label_path_matches_soup(self) -> None:
+        for name in ("label_1007.html", "label_1008.html", "label_1011.html"):
+            markup = read_page(name)
+            self.assertEqual(
+                parse_nutrition_label_fast(markup), parse_nutrition_label_soup(markup)
+            )
+        nutrients = parse_nutrition_label_soup(read_page("label_1008.html"))["nutrients"]
+        added = next(row for row in nutrients if row["key"] == "added_sugars")
+        self.assertIsNone(added["quantity"])
+
+
+if __name__ == "__main__":
+    unittest.main()
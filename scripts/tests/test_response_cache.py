@@ -0,0 +1,153 @@
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import requests
+
+import aurora_plate_scraper
+from aurora_plate_scraper import (
+    LabelCache,
+    ResponseCache,
+    parse_args,
+    request_with_retry,
+    run_crawl,
+)
+
+URL = "https://example.test/menu"
+HOMEPAGE = '<html><a data-unitoid="1" href="#">Unit 1</a></html>'
+
+
+def response(status: int, body: bytes = b"", headers: dict = None) -> requests.Response:
+    resp = requests.Response()
+    resp.status_code = status
+    resp._content = body
+    resp.encoding = "utf-8"
+    resp.headers.update(headers or {})
+    resp.url = URL
+    return resp
+
+
+class FakeSession:
+    def __init__(self, *responses: requests.Response) -> None:
+        self.responses = list(responses)
+        self.headers = []
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        self.headers.append(dict(kwargs.get("headers") or {}))
+        return self.responses.pop(0)
+
+
+class ResponseCacheTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.dir = Path(self.tmp.name)
+
+    def test_not_modified_serves_the_cached_body(self) -> None:
+        cache = ResponseCache(self.dir / "responses.sqlite")
+        self.addCleanup(cache.close)
+        session = FakeSession(
+            response(200, b"first", {"ETag": '"v1"', "Last-Modified": "Mon"}),
+            response(304),
+        )
+        with mock.patch.object(aurora_plate_scraper, "RESPONSE_CACHE", cache):
+            first = request_with_retry(session, "get", URL, throttle=False)
+            second = request_with_retry(session, "get", URL, throttle=False)
+        self.assertEqual(first.text, "first")
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second.text, "first")
+        self.assertEqual(session.headers[0], {})
+        self.assertEqual(
+            session.headers[1], {"If-None-Match": '"v1"', "If-Modified-Since": "Mon"}
+        )
+
+    def test_changed_response_replaces_the_cached_body(self) -> None:
+        cache = ResponseCache(self.dir / "responses.sqlite")
+        self.addCleanup(cache.close)
+        session = FakeSession(
+            response(200, b"first", {"ETag": '"v1"'}),
+            response(200, b"second"),
+            response(200, b"third"),
+        )
+        with mock.patch.object(aurora_plate_scraper, "RESPONSE_CACHE", cache):
+            for _ in range(3):
+                last = request_with_retry(session, "get", URL, throttle=False)
+        self.assertEqual(last.text, "third")
+        self.assertEqual(session.headers[1], {"If-None-Match": '"v1"'})
+        self.assertEqual(session.headers[2], {})
+
+
+class RunCrawlCleanupTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.dir = Path(self.tmp.name)
+        self.opened = []
+        for name in ("JSON_OUTPUT_PATH", "CSV_OUTPUT_PATH"):
+            patcher = mock.patch.object(
+                aurora_plate_scraper, name, self.dir / name.lower()
+            )
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        for name, base in (("ResponseCache", ResponseCache), ("LabelCache", LabelCache)):
+            tracked = type(name, (base,), {})
+            tracked.__init__ = self.track(base.__init__)
+            patcher = mock.patch.object(aurora_plate_scraper, name, tracked)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def track(self, init):
+        def wrapped(store, *args, **kwargs):
+            init(store, *args, **kwargs)
+            self.opened.append(store)
+
+        return wrapped
+
+    def args(self):
+        return parse_args(
+            [
+                "--response-cache",
+                str(self.dir / "responses.sqlite"),
+                "--label-cache",
+                str(self.dir / "labels.sqlite"),
+                "--journal",
+                str(self.dir / "journal.ndjson"),
+                "--metrics",
+                str(self.dir / "metrics.json"),
+            ]
+        )
+
+    def assertCleanedUp(self, stores: int) -> None:
+        self.assertIsNone(aurora_plate_scraper.RESPONSE_CACHE)
+        self.assertIsNone(aurora_plate_scraper.METRICS)
+        self.assertEqual(len(self.opened), stores)
+        for store in self.opened:
+            with self.assertRaises(sqlite3.ProgrammingError):
+                store.conn.execute("SELECT 1")
+
+    def test_homepage_failure_closes_the_response_cache(self) -> None:
+        failure = requests.ConnectionError("homepage down")
+        with mock.patch.object(
+            aurora_plate_scraper, "request_with_retry", side_effect=failure
+        ):
+            with self.assertRaises(requests.ConnectionError):
+                run_crawl(self.args())
+        self.assertCleanedUp(1)
+
+    def test_crawl_failure_closes_both_caches(self) -> None:
+        homepage = mock.Mock(text=HOMEPAGE)
+        with mock.patch.object(
+            aurora_plate_scraper, "request_with_retry", return_value=homepage
+        ), mock.patch.object(
+            aurora_plate_scraper, "crawl_sync", side_effect=RuntimeError("boom")
+        ), mock.patch("builtins.print"):
+            with self.assertRaises(RuntimeError):
+                run_crawl(self.args())
+        self.assertCleanedUp(2)
+        self.assertTrue((self.dir / "journal.ndjson").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import json
+import unittest
+
+from aurora_plate_scraper import SEARCH_INDEX_VERSION, MealSearchIndex, search_tokens
+
+NAMES = [
+    "Grilled Chicken Sandwich",
+    "Chicken Noodle Soup",
+    "Tofu Stir Fry",
+    "Vegan Chili",
+    "Chili Cheese Fries",
+    "Grilled Cheese",
+    "Fries",
+    "Hot Tea",
+]
+
+
+class MealSearchIndexTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.index = MealSearchIndex()
+        for name in NAMES:
+            self.index.add(search_tokens(name))
+
+    def test_ranks_rarer_terms_higher(self) -> None:
+        found = self.index.search("grilled chicken")
+        self.assertEqual(found[0][0], 0)
+        self.assertEqual({row_id for row_id, _ in found}, {0, 1, 5})
+        chili = dict(self.index.search("chili"))
+        self.assertEqual(set(chili), {3, 4})
+        self.assertEqual(self.index.search("chili", candidates=[4]), [(4, chili[4])])
+        self.assertEqual(self.index.search("pizza"), [])
+        self.assertEqual(len(self.index.search("chili fries cheese", limit=2)), 2)
+
+    def test_json_round_trip(self) -> None:
+        data = json.loads(json.dumps(self.index.to_json()))
+        self.assertEqual(data["version"], SEARCH_INDEX_VERSION)
+        loaded = MealSearchIndex.from_json(data)
+        for query in ("grilled chicken", "chili", "cheese fries", "tea", "pizza"):
+            expected = self.index.search(query)
+            found = loaded.search(query)
+            self.assertEqual([row for row, _ in found], [row for row, _ in expected])
+            for (_, score), (_, want) in zip(found, expected):
+                self.assertAlmostEqual(score, want, places=3)
+
+    def test_from_json_rejects_other_versions(self) -> None:
+        data = self.index.to_json()
+        data["version"] = SEARCH_INDEX_VERSION - 1
+        with self.assertRaises(ValueError):
+            MealSearchIndex.from_json(data)
+
+
+if __name__ == "__main__":
+    unittest.main()
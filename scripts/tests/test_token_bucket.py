@@ -0,0 +1,40 @@
+import unittest
+
+from aurora_plate_scraper import TokenBucket
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TokenBucketTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.clock = FakeClock()
+        self.bucket = TokenBucket(rate=2.0, burst=3, clock=self.clock)
+
+    def test_burst_is_free_then_requests_queue_at_the_rate(self) -> None:
+        self.assertEqual([self.bucket.reserve() for _ in range(3)], [0.0, 0.0, 0.0])
+        self.assertEqual([self.bucket.reserve() for _ in range(3)], [0.5, 1.0, 1.5])
+
+    def test_tokens_refill_at_the_rate(self) -> None:
+        for _ in range(3):
+            self.bucket.reserve()
+        self.clock.now += 1.0
+        self.assertEqual([self.bucket.reserve() for _ in range(3)], [0.0, 0.0, 0.5])
+
+    def test_refill_is_capped_at_the_burst(self) -> None:
+        self.clock.now += 60.0
+        delays = [self.bucket.reserve() for _ in range(4)]
+        self.assertEqual(delays, [0.0, 0.0, 0.0, 0.5])
+
+    def test_zero_rate_disables_the_limit(self) -> None:
+        bucket = TokenBucket(rate=0.0, burst=1, clock=self.clock)
+        self.assertEqual([bucket.reserve() for _ in range(5)], [0.0] * 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
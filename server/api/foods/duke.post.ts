@@ -6,6 +6,7 @@ import {
   MealRow,
   findMealMatchByName,
   normalizeMealKey,
+  rankMealsByText,
 } from "../../utils/meals";
 import { requireAuthenticatedUser } from "../utils/require-auth";
 
@@ -39,6 +40,7 @@ type DukeMealRequest = {
 };
 
 const MAX_MEALS_IN_PROMPT = 60;
+const RANKED_MEALS_IN_PROMPT = 20;
 
 const buildSelectionPrompt = (
   location: string,
@@ -106,7 +108,17 @@ export default defineEventHandler(async (event) => {
   );
   const candidatePool = locationMatches.length ? locationMatches : meals;
 
-  const prompt = buildSelectionPrompt(location, description, candidatePool);
+  const rankedCandidates = rankMealsByText(
+    description,
+    meals,
+    candidatePool,
+    RANKED_MEALS_IN_PROMPT
+  );
+  const prompt = buildSelectionPrompt(
+    location,
+    description,
+    rankedCandidates ?? candidatePool
+  );
 
   const completion = await fetch(
     "https://openrouter.ai/api/v1/chat/completions",
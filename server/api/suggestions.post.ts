@@ -3,7 +3,10 @@ import { useRuntimeConfig } from "#imports";
 import {
   loadMealsDataset,
   MealRow,
+  MacroBounds,
   findMealMatchByName,
+  filterMealsByMacros,
+  rankMealsByMacros,
 } from "../utils/meals";
 import { requireAuthenticatedUser } from "./utils/require-auth";
 
@@ -21,6 +24,8 @@ type SuggestionFilters = {
 
 type UserContext = Record<string, any>;
 
+const MEALS_IN_PROMPT = 40;
+
 type SuggestionRequest = {
   userId?: string;
   filters: SuggestionFilters;
@@ -98,6 +103,21 @@ function matchesFilters(row: MealRow, filters: SuggestionFilters) {
   return true;
 }
 
+const isBound = (value: unknown): value is number =>
+  typeof value === "number" && !Number.isNaN(value);
+
+function buildMacroBounds(filters: SuggestionFilters) {
+  const bounds: MacroBounds = {};
+  if (isBound(filters.calories)) bounds.calories = { max: filters.calories };
+  if (isBound(filters.maxFat)) bounds.fat_g = { max: filters.maxFat };
+  if (isBound(filters.minProtein))
+    bounds.protein_g = { min: filters.minProtein };
+  if (isBound(filters.maxCarbs)) bounds.carb_g = { max: filters.maxCarbs };
+  if (isBound(filters.maxSugar)) bounds.sugar_g = { max: filters.maxSugar };
+  if (isBound(filters.maxSodium)) bounds.sodium_mg = { max: filters.maxSodium };
+  return bounds;
+}
+
 function buildPrompt(
   filters: SuggestionFilters,
   userContext: UserContext,
@@ -117,7 +137,7 @@ User Filters:
 ${JSON.stringify(filters)}
 
 Dataset (narrowed):
-${JSON.stringify(meals.slice(0, 40))}`;
+${JSON.stringify(meals)}`;
 }
 
 function extractJsonArray(raw: string) {
@@ -249,7 +269,11 @@ export default defineEventHandler(async (event) => {
   }
 
   const meals = await loadMealsDataset();
-  const narrowed = meals.filter((row) => matchesFilters(row, body.filters));
+  const bounds = buildMacroBounds(body.filters);
+  const candidates = filterMealsByMacros(meals, bounds) ?? meals;
+  const narrowed = candidates.filter((row) =>
+    matchesFilters(row, body.filters)
+  );
   if (!narrowed.length) {
     throw createError({
       statusCode: 404,
@@ -257,7 +281,11 @@ export default defineEventHandler(async (event) => {
     });
   }
 
-  const prompt = buildPrompt(body.filters, body.userContext, narrowed);
+  const prompt = buildPrompt(
+    body.filters,
+    body.userContext,
+    rankMealsByMacros(narrowed, bounds, MEALS_IN_PROMPT)
+  );
 
   const completion = await fetch(
     "https://openrouter.ai/api/v1/chat/completions",
@@ -1,3 +1,4 @@
+import { createHash } from "node:crypto";
 import { readFile } from "node:fs/promises";
 import { join } from "node:path";
 
@@ -17,6 +18,45 @@ export type MealRow = {
 };
 
 let cachedMeals: MealRow[] | null = null;
+const mealKeys = new WeakMap<MealRow, string>();
+const mealIndexes = new WeakMap<MealRow[], MealNameIndex>();
+
+type MealNameIndex = {
+  keys: string[];
+  exact: Map<string, number[]>;
+  trigrams: Map<string, number[]>;
+};
+
+type MealSearchIndex = {
+  postings: Map<string, number[]>;
+};
+
+const mealSearchIndexes = new WeakMap<MealRow[], MealSearchIndex>();
+
+const MEAL_MACRO_COLUMNS = [
+  "calories",
+  "fat_g",
+  "carb_g",
+  "protein_g",
+  "sugar_g",
+  "sodium_mg",
+] as const;
+
+type MacroField = (typeof MEAL_MACRO_COLUMNS)[number];
+
+export type MacroBounds = Partial<
+  Record<MacroField, { min?: number; max?: number }>
+>;
+
+const macroIndexes = new WeakMap<MealRow[], Record<MacroField, number[]>>();
+
+const MEAL_INDEX_VERSION = 1;
+const MEAL_SEARCH_INDEX_VERSION = 2;
+const MACRO_INDEX_VERSION = 2;
+
+const MEAL_TABLE_MAGIC = "HMEALS1\0";
+const MEAL_TABLE_HEADER_BYTES = 20;
+const MEAL_ROW_BYTES = 52;
 
 export const normalizeMealKey = (value?: string | null) =>
   (value || "")
@@ -24,14 +64,261 @@ export const normalizeMealKey = (value?: string | null) =>
     .toLowerCase()
     .replace(/[^a-z0-9]/g, "");
 
+const mealKey = (row: MealRow) => {
+  let key = mealKeys.get(row);
+  if (key === undefined) {
+    key = normalizeMealKey(row.item_name);
+    mealKeys.set(row, key);
+  }
+  return key;
+};
+
+const nameTrigrams = (key: string) => {
+  const grams = new Set<string>();
+  for (let i = 0; i + 3 <= key.length; i++) grams.add(key.slice(i, i + 3));
+  return grams;
+};
+
+function lookupMealIndex(index: MealNameIndex, target: string) {
+  const bucket = index.exact.get(target);
+  if (bucket) return bucket[0];
+  let contained = -1;
+  for (let start = 0; start < target.length; start++) {
+    for (let end = start; end <= target.length; end++) {
+      const rows = index.exact.get(target.slice(start, end));
+      if (rows && (contained < 0 || rows[0] < contained)) contained = rows[0];
+    }
+  }
+  if (contained >= 0) return contained;
+  const grams = nameTrigrams(target);
+  if (!grams.size) return index.keys.findIndex((key) => key.includes(target));
+  let rarest: number[] | undefined;
+  for (const gram of grams) {
+    const rows = index.trigrams.get(gram);
+    if (!rows) return -1;
+    if (!rarest || rows.length < rarest.length) rarest = rows;
+  }
+  return rarest!.find((row) => index.keys[row].includes(target)) ?? -1;
+}
+
+async function readPublicJson(name: string) {
+  try {
+    return JSON.parse(await readFile(join(process.cwd(), "public", name), "utf8"));
+  } catch {
+    return null;
+  }
+}
+
+async function attachMealIndex(rows: MealRow[]) {
+  const raw = await readPublicJson("duke_meals_index.json");
+  if (raw?.version !== MEAL_INDEX_VERSION || raw.keys?.length !== rows.length) return;
+  if (!rows.every((row, idx) => mealKey(row) === raw.keys[idx])) return;
+  mealIndexes.set(rows, {
+    keys: raw.keys,
+    exact: new Map(Object.entries(raw.exact)),
+    trigrams: new Map(Object.entries(raw.trigrams)),
+  });
+}
+
+const mealKeysDigest = (rows: MealRow[]) =>
+  createHash("sha256").update(rows.map(mealKey).join("\n")).digest("hex");
+
+const isSortedColumn = (column: unknown, rows: MealRow[], field: MacroField) => {
+  if (!Array.isArray(column) || column.length !== rows.length) return false;
+  const seen = new Uint8Array(rows.length);
+  for (let i = 0; i < column.length; i++) {
+    const row = column[i];
+    if (!Number.isInteger(row) || row < 0 || row >= rows.length || seen[row]) {
+      return false;
+    }
+    seen[row] = 1;
+    if (i && rows[column[i - 1]][field] > rows[row][field]) return false;
+  }
+  return true;
+};
+
+async function attachMealSearchIndex(rows: MealRow[], digest: string) {
+  const raw = await readPublicJson("duke_meals_search.json");
+  if (
+    raw?.version !== MEAL_SEARCH_INDEX_VERSION ||
+    raw.row_count !== rows.length ||
+    raw.keys_sha256 !== digest
+  )
+    return;
+  mealSearchIndexes.set(rows, { postings: new Map(Object.entries(raw.postings)) });
+}
+
+async function attachMacroIndex(rows: MealRow[], digest: string) {
+  const raw = await readPublicJson("duke_meals_macros.json");
+  if (
+    raw?.version !== MACRO_INDEX_VERSION ||
+    raw.row_count !== rows.length ||
+    raw.keys_sha256 !== digest
+  )
+    return;
+  if (
+    !MEAL_MACRO_COLUMNS.every((field) =>
+      isSortedColumn(raw.columns?.[field], rows, field)
+    )
+  )
+    return;
+  macroIndexes.set(rows, raw.columns);
+}
+
+const attachMealIndexes = (rows: MealRow[]) => {
+  const digest = mealKeysDigest(rows);
+  return Promise.all([
+    attachMealIndex(rows),
+    attachMealSearchIndex(rows, digest),
+    attachMacroIndex(rows, digest),
+  ]);
+};
+
+const boundPosition = (
+  column: number[],
+  meals: MealRow[],
+  field: MacroField,
+  accept: (value: number) => boolean
+) => {
+  let low = 0;
+  let high = column.length;
+  while (low < high) {
+    const mid = (low + high) >>> 1;
+    if (accept(meals[column[mid]][field])) high = mid;
+    else low = mid + 1;
+  }
+  return low;
+};
+
+export function filterMealsByMacros(meals: MealRow[], bounds: MacroBounds) {
+  const columns = macroIndexes.get(meals);
+  const fields = Object.keys(bounds) as MacroField[];
+  if (!columns || !fields.length) return null;
+  let best: { field: MacroField; start: number; end: number } | null = null;
+  for (const field of fields) {
+    const { min, max } = bounds[field]!;
+    const column = columns[field];
+    const start =
+      min === undefined
+        ? 0
+        : boundPosition(column, meals, field, (value) => value >= min);
+    const end =
+      max === undefined
+        ? column.length
+        : boundPosition(column, meals, field, (value) => value > max);
+    if (!best || end - start < best.end - best.start) best = { field, start, end };
+  }
+  const rows = columns[best!.field]
+    .slice(best!.start, best!.end)
+    .filter((row) =>
+      fields.every((field) => {
+        const { min, max } = bounds[field]!;
+        const value = meals[row][field];
+        return (
+          (min === undefined || value >= min) &&
+          (max === undefined || value <= max)
+        );
+      })
+    );
+  return rows.sort((a, b) => a - b).map((row) => meals[row]);
+}
+
+const macroHeadroom = (row: MealRow, bounds: MacroBounds) => {
+  let total = 0;
+  let count = 0;
+  for (const field of Object.keys(bounds) as MacroField[]) {
+    const { min, max } = bounds[field]!;
+    const value = row[field];
+    if (max !== undefined && max > 0) {
+      total += Math.max(0, 1 - value / max);
+      count += 1;
+    }
+    if (min !== undefined && min > 0) {
+      total += Math.min(1, Math.max(0, value / min - 1));
+      count += 1;
+    }
+  }
+  return count ? total / count : 0;
+};
+
+export function rankMealsByMacros(
+  meals: MealRow[],
+  bounds: MacroBounds,
+  limit = 40
+) {
+  if (!Object.keys(bounds).length) return meals.slice(0, limit);
+  return meals
+    .map((row, position) => ({
+      row,
+      position,
+      empty: row.calories <= 0,
+      score: macroHeadroom(row, bounds),
+    }))
+    .sort(
+      (a, b) =>
+        Number(a.empty) - Number(b.empty) ||
+        b.score - a.score ||
+        a.position - b.position
+    )
+    .slice(0, limit)
+    .map(({ row }) => row);
+}
+
+export const mealSearchTokens = (value?: string | null) =>
+  (value || "")
+    .toString()
+    .normalize("NFKD")
+    .replace(/[^\x00-\x7f]/g, "")
+    .toLowerCase()
+    .replace(/[^a-z0-9]+/g, " ")
+    .trim()
+    .split(" ")
+    .filter(Boolean);
+
+export function rankMealsByText(
+  text: string,
+  meals: MealRow[],
+  pool: MealRow[] = meals,
+  limit = 20
+) {
+  const index = mealSearchIndexes.get(meals);
+  if (!index) return null;
+  const allowed = pool === meals ? null : new Set(pool);
+  const scores = new Map<number, number>();
+  for (const token of new Set(mealSearchTokens(text))) {
+    const postings = index.postings.get(token);
+    if (!postings) continue;
+    for (let i = 0; i < postings.length; i += 2) {
+      const row = postings[i];
+      if (allowed && !allowed.has(meals[row])) continue;
+      scores.set(row, (scores.get(row) ?? 0) + postings[i + 1]);
+    }
+  }
+  const ranked = [...scores.entries()]
+    .sort((a, b) => b[1] - a[1] || a[0] - b[0])
+    .slice(0, limit)
+    .map(([row]) => meals[row]);
+  const seen = new Set(ranked);
+  for (const row of pool) {
+    if (ranked.length >= limit) break;
+    if (!seen.has(row)) ranked.push(row);
+  }
+  return ranked;
+}
+
 export function findMealMatchByName(name: string | undefined, meals: MealRow[]) {
   if (!name) return null;
   const target = normalizeMealKey(name);
   if (!target) return null;
+  const index = mealIndexes.get(meals);
+  if (index) {
+    const row = lookupMealIndex(index, target);
+    return row >= 0 ? meals[row] : null;
+  }
   return (
-    meals.find((row) => normalizeMealKey(row.item_name) === target) ||
-    meals.find((row) => target.includes(normalizeMealKey(row.item_name))) ||
-    meals.find((row) => normalizeMealKey(row.item_name).includes(target)) ||
+    meals.find((row) => mealKey(row) === target) ||
+    meals.find((row) => target.includes(mealKey(row))) ||
+    meals.find((row) => mealKey(row).includes(target)) ||
     null
   );
 }
@@ -47,6 +334,11 @@ const toNumber = (input: any) => {
   return Number.isFinite(num) ? num : 0;
 };
 
+const toTypedNumber = (input?: string) => {
+  const num = Number(input);
+  return Number.isFinite(num) ? num : 0;
+};
+
 function parseCsvLine(line: string) {
   const values: string[] = [];
   let current = "";
@@ -71,14 +363,75 @@ function parseCsvLine(line: string) {
   return values;
 }
 
+const roundMacro = (value: number) => Math.round(value * 1000) / 1000;
+
+function decodeMealTable(buffer: Buffer): MealRow[] | null {
+  if (buffer.length < MEAL_TABLE_HEADER_BYTES) return null;
+  if (buffer.toString("latin1", 0, 8) !== MEAL_TABLE_MAGIC) return null;
+  const view = new DataView(buffer.buffer, buffer.byteOffset, buffer.byteLength);
+  const rowCount = view.getUint32(8, true);
+  const stringCount = view.getUint32(12, true);
+  const stringBytes = view.getUint32(16, true);
+  const offsetsStart = MEAL_TABLE_HEADER_BYTES;
+  const blobStart = offsetsStart + (stringCount + 1) * 4;
+  const rowsStart = blobStart + stringBytes + ((4 - (stringBytes % 4)) % 4);
+  if (buffer.length < rowsStart + rowCount * MEAL_ROW_BYTES) return null;
+  const strings = new Array<string>(stringCount);
+  for (let i = 0; i < stringCount; i++) {
+    const start = view.getUint32(offsetsStart + i * 4, true);
+    const end = view.getUint32(offsetsStart + (i + 1) * 4, true);
+    strings[i] = buffer.toString("utf8", blobStart + start, blobStart + end);
+  }
+  const rows = new Array<MealRow>(rowCount);
+  for (let i = 0; i < rowCount; i++) {
+    const base = rowsStart + i * MEAL_ROW_BYTES;
+    const text = (field: number) => strings[view.getUint32(base + field * 4, true)];
+    const macro = (field: number) =>
+      roundMacro(view.getFloat32(base + 28 + field * 4, true));
+    const row: MealRow = {
+      location: text(0),
+      meal_section: text(1),
+      category: text(2),
+      item_name: text(3),
+      serving_size: text(4),
+      ingredients: text(5),
+      calories: macro(0),
+      fat_g: macro(1),
+      carb_g: macro(2),
+      protein_g: macro(3),
+      sugar_g: macro(4),
+      sodium_mg: macro(5),
+    };
+    mealKeys.set(row, text(6));
+    rows[i] = row;
+  }
+  return rows;
+}
+
+async function loadMealTable() {
+  const binPath = join(process.cwd(), "public", "duke_meals_compact.bin");
+  try {
+    return decodeMealTable(await readFile(binPath));
+  } catch {
+    return null;
+  }
+}
+
 export async function loadMealsDataset() {
   if (cachedMeals) return cachedMeals;
+  const table = await loadMealTable();
+  if (table) {
+    await attachMealIndexes(table);
+    cachedMeals = table;
+    return table;
+  }
   const csvPath = join(process.cwd(), "public", "duke_meals_compact.csv");
   const text = await readFile(csvPath, "utf8");
   const lines = text.split(/\r?\n/).filter((line) => line.trim().length);
   if (!lines.length) return [];
   const headers = parseCsvLine(lines[0]);
   const rows: MealRow[] = [];
+  const typed = MEAL_MACRO_COLUMNS.every((column) => headers.includes(column));
   for (let i = 1; i < lines.length; i++) {
     const values = parseCsvLine(lines[i]);
     if (!values.length) continue;
@@ -86,6 +439,23 @@ export async function loadMealsDataset() {
     headers.forEach((header, idx) => {
       row[header] = values[idx];
     });
+    if (typed) {
+      rows.push({
+        location: row.location,
+        meal_section: row.meal_section,
+        category: row.category,
+        item_name: row.item_name,
+        serving_size: row.serving_size,
+        ingredients: row.ingredients ?? "",
+        calories: toTypedNumber(row.calories),
+        fat_g: toTypedNumber(row.fat_g),
+        carb_g: toTypedNumber(row.carb_g),
+        protein_g: toTypedNumber(row.protein_g),
+        sugar_g: toTypedNumber(row.sugar_g),
+        sodium_mg: toTypedNumber(row.sodium_mg),
+      });
+      continue;
+    }
     rows.push({
       location: row.location,
       meal_section: row.meal_section,
@@ -101,6 +471,7 @@ export async function loadMealsDataset() {
       sodium_mg: toNumber(row["Total Sodium"] ?? row.sodium_mg),
     });
   }
+  await attachMealIndexes(rows);
   cachedMeals = rows;
   return rows;
 }